@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Iterable
+
+import numpy as np
+
+from cache import LRUCache
+from catalog import ExerciseCatalog
+from data.muscles import MUSCLE_GROUPS
+
+MUSCLES = list(MUSCLE_GROUPS)
+OPTIMAL_WEEKLY = np.array(
+    [MUSCLE_GROUPS[m].get("optimal_weekly", 10) for m in MUSCLES], dtype=np.float64
+)
+
+THRESHOLDS = [
+    (130, "overloaded", "#ff4444"),
+    (80, "optimal", "#44ff44"),
+    (40, "moderate", "#ffa500"),
+    (10, "underloaded", "#ffff00"),
+    (0, "untrained", "#cccccc"),
+]
+
+MSGS = {
+    "overloaded": ("Перегрузка ({pr}%). Снизьте нагрузку.", "high"),
+    "optimal": ("Оптимально ({pr}%).", "low"),
+    "moderate": ("Средняя нагрузка ({pr}%). Можно увеличить.", "medium"),
+    "underloaded": ("Недогруз ({pr}%). Добавьте упражнения.", "high"),
+    "untrained": ("Не тренируется ({pr}%).", "high"),
+}
+
+PRIORITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+# Results depend only on cycle.data and the catalog version, so identical
+# programs (e.g. clones of a popular public cycle) share one entry.
+analytics_cache = LRUCache(int(os.environ.get("ANALYTICS_CACHE_MAX_BYTES", str(8 * 1024 * 1024))))
+
+
+class LoadMatrix:
+    """
+    Dense exercise x muscle matrix built from one catalog version.
+    row_of maps an exercise id to its row; columns follow MUSCLES.
+    """
+
+    def __init__(self, cat: ExerciseCatalog):
+        self.version = cat.version
+        self.row_of = {ex_id: row for row, ex_id in enumerate(cat.by_id)}
+        self.matrix = np.zeros((len(self.row_of), len(MUSCLES)), dtype=np.float64)
+        col_of = {m: col for col, m in enumerate(MUSCLES)}
+        for ex_id, row in self.row_of.items():
+            for muscle, pr in cat.by_id[ex_id].get("muscles", {}).items():
+                col = col_of.get(muscle)
+                if col is not None:
+                    self.matrix[row, col] = float(pr)
+
+    def sets_entries(self, day_exercises: Iterable) -> tuple[list, list]:
+        """Turn one day's exercise list into sparse (rows, sets) entries."""
+        rows, sets = [], []
+        for ex in day_exercises:
+            row = self.row_of.get(_exercise_id(ex.get("id", "")))
+            if row is None:
+                continue
+            try:
+                sets.append(int(ex.get("sets", 3)))
+            except (TypeError, ValueError):
+                continue
+            rows.append(row)
+        return rows, sets
+
+
+_matrix: LoadMatrix | None = None
+_matrix_lock = threading.Lock()
+
+
+def load_matrix(cat: ExerciseCatalog) -> LoadMatrix:
+    """Return the load matrix for the catalog, rebuilding it after a reload."""
+    global _matrix
+    matrix = _matrix
+    if matrix is None or matrix.version != cat.version:
+        with _matrix_lock:
+            if _matrix is None or _matrix.version != cat.version:
+                _matrix = LoadMatrix(cat)
+            matrix = _matrix
+    return matrix
+
+
+def _exercise_id(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _round(values: np.ndarray, digits: int) -> np.ndarray:
+    """
+    Element-wise round() with Python's semantics: the exact binary value is
+    rounded half-even. np.round alone rounds values * 10**digits after that
+    product was already rounded, and disagrees on many .xx5 terms.
+    """
+    scale = 10.0 ** digits
+    scaled = values * scale
+    rounded = np.rint(scaled)
+    # Only an exact .5 in `scaled` can hide which side the true value is on
+    floor = np.floor(scaled)
+    tie = scaled - floor == 0.5
+    if tie.any():
+        # Dekker's product: values * scale == scaled + err exactly
+        exact = values[tie]
+        hi = exact * 134217729.0
+        hi = hi - (hi - exact)
+        err = (hi * scale - scaled[tie]) + (exact - hi) * scale
+        rounded[tie] = np.where(err > 0, floor[tie] + 1, np.where(err < 0, floor[tie], rounded[tie]))
+    return rounded / scale
+
+
+def _terms(lm: LoadMatrix, rows: list, sets: list, scale) -> np.ndarray:
+    """Per-occurrence (entries x muscles) loads, each rounded to 2 places."""
+    loads = np.asarray(sets, dtype=np.float64)[:, None] * lm.matrix[np.asarray(rows, dtype=np.intp)]
+    return _round(loads * scale, 2)
+
+
+def _group_sums(terms: np.ndarray, sizes: list) -> np.ndarray:
+    """
+    Sum consecutive runs of `sizes` rows, adding them in order like the old
+    += loop (np.add.reduceat does not, and drifts in the last digit).
+    """
+    groups = np.repeat(np.arange(len(sizes), dtype=np.intp), sizes)
+    sums = np.zeros((len(sizes), terms.shape[1]), dtype=np.float64)
+    np.add.at(sums, groups, terms)
+    return sums
+
+
+def _load_status(optimal_prs: dict) -> dict:
+    load_status = {}
+    for mid, pr in optimal_prs.items():
+        for thr, lbl, clr in THRESHOLDS:
+            if pr > thr:
+                load_status[mid] = {"status": lbl, "color": clr, "pr": pr}
+                break
+    return load_status
+
+
+def _recommendations(load_status: dict) -> list:
+    recs = []
+    for mid, data in load_status.items():
+        name = MUSCLE_GROUPS[mid]["name"]
+        tmpl, prio = MSGS[data["status"]]
+        recs.append({
+            "message": f"{name}: {tmpl.format(pr=data['pr'])}",
+            "priority": prio,
+            "muscle": name,
+        })
+    recs.sort(key=lambda x: PRIORITY_ORDER[x["priority"]])
+    return recs[:5]
+
+
+def analyze_cycle(data: dict, cat: ExerciseCatalog) -> dict:
+    """
+    Muscle-load analytics for one cycle's data ({day name: [exercise, ...]}).
+    Every (exercise, muscle) term is rounded to 2 places before it is summed,
+    exactly as the per-exercise loop did, so stored percentages and load
+    statuses do not shift.
+    """
+    lm = load_matrix(cat)
+    days_count = len(data)
+    day_names = list(data)
+    sizes, rows, sets = [], [], []
+    for day_exercises in data.values():
+        day_rows, day_sets = lm.sets_entries(day_exercises)
+        sizes.append(len(day_rows))
+        rows.extend(day_rows)
+        sets.extend(day_sets)
+
+    scale = 7 / days_count if days_count else 0.0
+    terms = _terms(lm, rows, sets, scale)
+    daily = _group_sums(terms, sizes)
+    total = terms.sum(axis=0)
+    average = _round(daily.sum(axis=0) * scale, 2)
+    optimal = _round(total / OPTIMAL_WEEKLY * 100, 1)
+    # Sums of 2-place terms: rounding only drops float noise
+    daily = np.round(daily, 2)
+    total = np.round(total, 2)
+
+    optimal_prs = dict(zip(MUSCLES, optimal.tolist()))
+    load_status = _load_status(optimal_prs)
+    return {
+        "days_count": days_count,
+        "daily_analytics": {
+            name: dict(zip(MUSCLES, row)) for name, row in zip(day_names, daily.tolist())
+        },
+        "total_analytics": dict(zip(MUSCLES, total.tolist())),
+        "average_daily": dict(zip(MUSCLES, average.tolist())),
+        "optimal_percentages": optimal_prs,
+        "load_status": load_status,
+        "recommendations": _recommendations(load_status),
+    }
+
+
+def score_cycles(datas: list, cat: ExerciseCatalog) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Batch entry point: weekly muscle loads for many cycles at once, rounded
+    the same way as analyze_cycle().
+    Returns (total, optimal_percentages), both shaped (len(datas), len(MUSCLES)).
+    """
+    lm = load_matrix(cat)
+    sizes, rows, sets, scales = [], [], [], []
+    for data in datas:
+        size = 0
+        if data:
+            scale = 7 / len(data)
+            for day_exercises in data.values():
+                day_rows, day_sets = lm.sets_entries(day_exercises)
+                rows.extend(day_rows)
+                sets.extend(day_sets)
+                size += len(day_rows)
+            scales.extend([scale] * size)
+        sizes.append(size)
+    terms = _terms(lm, rows, sets, np.asarray(scales, dtype=np.float64)[:, None])
+    total = _group_sums(terms, sizes)
+    return np.round(total, 2), _round(total / OPTIMAL_WEEKLY * 100, 1)
+
+
+def cycle_data_key(data: dict) -> str:
+    """Content hash of a cycle's data, independent of key order."""
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def cached_analyze_cycle(data: dict, cat: ExerciseCatalog) -> dict:
+    """
+    analyze_cycle() through analytics_cache. The returned dict is shared
+    between requests and must not be mutated.
+    """
+    key = (cycle_data_key(data), cat.version)
+    result = analytics_cache.get(key)
+    if result is None:
+        result = analyze_cycle(data, cat)
+        analytics_cache.set(key, result, len(json.dumps(result, ensure_ascii=False)))
+    return result
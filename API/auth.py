@@ -1,10 +1,43 @@
+import asyncio
+import base64
+import datetime
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
 from data.users import User
+from data.sessions import UserSession
+
+# Hashes below BCRYPT_ROUNDS are rehashed at that cost on the next successful login
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
+
+# Tokens are signed with SESSION_SECRET. Without it a random per-process key is
+# used, which is fine for a single worker but invalidates tokens on restart.
+SESSION_SECRET = os.environ.get("SESSION_SECRET", "").encode() or secrets.token_bytes(32)
+SESSION_TTL_SECONDS = int(os.environ.get("SESSION_TTL_SECONDS", "3600"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Operators' token for /admin/ endpoints; without it they answer 404
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+HASH_POOL_WORKERS = int(os.environ.get("HASH_POOL_WORKERS", "4"))
+HASH_POOL_MAX_QUEUE = int(os.environ.get("HASH_POOL_MAX_QUEUE", "64"))
 
 
 def hash_password(password: str) -> str:
@@ -24,20 +57,224 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return plain_password == hashed_password
 
 
-def authenticate_user(username: str, password: str, db: Session) -> User:
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """
+    Verify a password and return (ok, new_hash). new_hash is set when the
+    stored hash uses outdated settings or is a legacy plaintext password.
+    """
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except Exception:
+        # Legacy plaintext passwords are upgraded to bcrypt on success
+        if plain_password == hashed_password:
+            return True, pwd_context.hash(plain_password)
+        return False, None
+
+
+class HashPool:
+    """
+    Bounded thread pool for bcrypt work, so hashing never blocks the event
+    loop. bcrypt releases the GIL, so threads give real parallelism. When more
+    than workers + max_queue jobs are pending, new jobs are rejected with 503
+    instead of piling up behind a login burst.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.wait_seconds = 0.0
+        self.busy_seconds = 0.0
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the pool and await its result."""
+        with self._lock:
+            if self.pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server is busy, please try again.",
+                )
+            self.pending += 1
+            self.submitted += 1
+        queued_at = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.wait_seconds += started - queued_at
+                    self.busy_seconds += finished - started
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    def stats(self) -> dict:
+        """Snapshot of pool counters."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": min(self.pending, self.workers),
+                "queue_depth": max(self.pending - self.workers, 0),
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "wait_seconds": round(self.wait_seconds, 6),
+                "busy_seconds": round(self.busy_seconds, 6),
+            }
+
+
+hash_pool = HashPool(HASH_POOL_WORKERS, HASH_POOL_MAX_QUEUE)
+
+
+async def authenticate_user(
+    username: str,
+    password: str,
+    db: Session,
+    session_user: Optional[User] = None,
+) -> User:
     """
     Authenticate a user by username and password.
+    If the request already carries a valid session token, the token's user is
+    returned without touching bcrypt. Otherwise the password is checked on the
+    hash pool and the stored hash is upgraded when passlib asks for it.
     Returns the User object on success, raises HTTPException on failure.
     """
+    if session_user is not None:
+        if session_user.username != username:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Session token does not belong to this user.",
+            )
+        return session_user
     user = db.query(User).filter(User.username == username).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="This user does not exist.",
         )
-    if not verify_password(password, user.password):
+    ok, new_hash = await hash_pool.run(verify_and_update_password, password, user.password)
+    if not ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid password.",
         )
+    if new_hash:
+        user.password = new_hash
+        db.commit()
     return user
+
+
+# --------------- Session tokens ---------------
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(SESSION_SECRET, payload.encode(), hashlib.sha256).digest())
+
+
+def create_session_token(user: User, db: Session) -> tuple[str, datetime.datetime]:
+    """
+    Issue a signed session token for the user and record it in the sessions
+    table so it can be revoked. Returns (token, expires_at).
+    """
+    now = datetime.datetime.utcnow()
+    expires_at = now + datetime.timedelta(seconds=SESSION_TTL_SECONDS)
+    jti = secrets.token_hex(16)
+    payload = _b64encode(json.dumps(
+        {"sub": user.username, "jti": jti, "exp": int(time.time()) + SESSION_TTL_SECONDS},
+        separators=(",", ":"),
+    ).encode())
+    # Drop this user's dead sessions so the table does not grow without bound.
+    db.query(UserSession).filter(
+        UserSession.user == user.username, UserSession.expires_at < now
+    ).delete()
+    db.add(UserSession(id=jti, user=user.username, expires_at=expires_at))
+    db.commit()
+    return f"{payload}.{_sign(payload)}", expires_at
+
+
+def decode_session_token(token: str) -> dict:
+    """
+    Check the token signature and expiry without touching the database.
+    Returns the payload, raises HTTPException(401) on any problem.
+    """
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired session token.",
+    )
+    payload, _, signature = token.partition(".")
+    # Bytes, since compare_digest rejects str with non-ASCII characters
+    if not payload or not hmac.compare_digest(signature.encode(), _sign(payload).encode()):
+        raise invalid
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        raise invalid
+    if not isinstance(claims, dict):
+        raise invalid
+    exp = claims.get("exp")
+    if not isinstance(exp, (int, float)) or exp < time.time():
+        raise invalid
+    return claims
+
+
+def authenticate_token(token: str, db: Session) -> User:
+    """
+    Resolve a session token to its User. The signature is checked in memory;
+    the revocation check and user lookup share one indexed query.
+    """
+    claims = decode_session_token(token)
+    user = (
+        db.query(User)
+        .join(UserSession, UserSession.user == User.username)
+        .filter(
+            UserSession.id == claims.get("jti"),
+            UserSession.revoked == 0,
+            User.username == claims.get("sub"),
+        )
+        .first()
+    )
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired session token.",
+        )
+    return user
+
+
+def revoke_session_token(token: str, db: Session) -> None:
+    """Mark the session behind a token as revoked."""
+    claims = decode_session_token(token)
+    db.query(UserSession).filter(UserSession.id == claims.get("jti")).update(
+        {UserSession.revoked: 1}
+    )
+    db.commit()
+
+
+def check_admin_token(token: str) -> None:
+    """Raise unless `token` is the configured ADMIN_TOKEN."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required.")
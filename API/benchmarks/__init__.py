@@ -0,0 +1 @@
+"""In-process benchmarks against a seeded temporary database; see run.py."""
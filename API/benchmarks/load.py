@@ -0,0 +1,250 @@
+"""
+Mixed-workload load driver against the ASGI app, fully offline.
+
+    cd API && python -m benchmarks.load --users 2000 --requests 5000 --concurrency 16
+    python -m benchmarks.load --db /tmp/big.db --duration 60 --mix calendar=1,duty=3,feed=2
+
+Requests go through httpx's ASGI transport straight into web.app (with its
+lifespan running), so no server or network is involved. --db reuses a
+database made by `python -m benchmarks.seed`; without it a temporary one is
+seeded at the given scale. Active users are drawn from the same power law as
+the social graph and carry pre-issued session tokens, so bcrypt does not
+skew the numbers. Prints count, errors, throughput and p50/p95/p99 per kind
+of request; --out also saves them as JSON.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from benchmarks.run import git_commit, percentile
+from benchmarks.seed import PowerLaw, add_scale_arguments, scale_from_args, seed
+from data import db_session
+
+DEFAULT_MIX = "calendar=4,day=3,duty=2,feed=3,search=1"
+SEARCH_TERMS = ["Цикл", "упражнение", "День", "упражнение 1", "Цикл 2", "bio"]
+
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        mix[kind.strip()] = float(weight or 1)
+    unknown = set(mix) - set(REQUESTS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown request kinds: {', '.join(sorted(unknown))}")
+    return mix
+
+
+class Actor:
+    """A signed-in user with a few of their duty rows to toggle."""
+
+    def __init__(self, username: str, token: str, duties: list):
+        self.username = username
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.duties = duties
+
+
+def prepare_actors(count: int, zipf: float, seed_value: int) -> tuple:
+    """
+    Session tokens for the `count` most followed users, drawn by that rank,
+    and the (first, last) date of the duty history.
+    """
+    from sqlalchemy import func
+
+    from auth import create_session_token
+    from data.duties import Duty
+    from data.users import User
+
+    rng = random.Random(seed_value)
+    db = db_session.create_session()
+    try:
+        users = db.query(User).order_by(User.followers_count.desc(), User.id).limit(count).all()
+        actors = []
+        for user in users:
+            token, _ = create_session_token(user, db)
+            duties = (
+                db.query(Duty.date, Duty.duty_name)
+                .filter(Duty.user_id == user.id)
+                .order_by(Duty.date.desc())
+                .limit(20)
+                .all()
+            )
+            actors.append(Actor(user.username, token, [tuple(d) for d in duties]))
+        first = db.query(func.min(Duty.date)).scalar()
+    finally:
+        db.close()
+    today = datetime.date.today()
+    history = (datetime.date.fromisoformat(first) if first else today, today)
+    return PowerLaw(rng, actors, zipf, shuffle=False), history
+
+
+def _random_date(rng, history) -> datetime.date:
+    first, last = history
+    return first + datetime.timedelta(days=rng.randint(0, (last - first).days))
+
+
+def _calendar(rng, actor, history):
+    day = _random_date(rng, history)
+    return "/month_duties/", {"user": actor.username, "year": day.year, "month": day.month}
+
+
+def _day(rng, actor, history):
+    day = rng.choice(actor.duties)[0] if actor.duties else _random_date(rng, history).isoformat()
+    return "/day/", {"user": actor.username, "day": day}
+
+
+def _duty(rng, actor, history):
+    if not actor.duties:
+        return _day(rng, actor, history)
+    day, name = rng.choice(actor.duties)
+    return "/duty/", {"user": actor.username, "selected_date": day, "duty_name": name}
+
+
+def _feed(rng, actor, history):
+    return "/feed/", {"user": actor.username, "limit": 50, "view": "summary"}
+
+
+def _search(rng, actor, history):
+    return "/search_cycles/", {"user": actor.username, "query": rng.choice(SEARCH_TERMS), "view": "summary"}
+
+
+REQUESTS = {
+    "calendar": _calendar,
+    "day": _day,
+    "duty": _duty,
+    "feed": _feed,
+    "search": _search,
+}
+
+
+async def drive(app, actors, history, mix: dict, concurrency: int, total: int, duration: float, seed_value: int):
+    """Run the mix and return ({kind: [latency seconds]}, {kind: errors}, wall seconds)."""
+    import httpx
+
+    kinds, weights = list(mix), list(mix.values())
+    latencies, errors = defaultdict(list), defaultdict(int)
+    issued = 0
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker(n: int, client):
+        nonlocal issued
+        rng = random.Random(seed_value * 1000 + n)
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if deadline is None:
+                if issued >= total:
+                    return
+                issued += 1
+            kind = rng.choices(kinds, weights=weights)[0]
+            actor = actors.pick()
+            path, body = REQUESTS[kind](rng, actor, history)
+            started = time.perf_counter()
+            response = await client.post(path, json=body, headers=actor.headers)
+            latencies[kind].append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors[kind] += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(n, client) for n in range(concurrency)))
+            wall = time.perf_counter() - started
+    return latencies, errors, wall
+
+
+def summarize(latencies: dict, errors: dict, wall: float) -> dict:
+    report = {}
+    every = []
+    for kind in sorted(latencies):
+        samples = sorted(latencies[kind])
+        every.extend(samples)
+        report[kind] = _stats(samples, errors.get(kind, 0), wall)
+    every.sort()
+    if every:
+        report["all"] = _stats(every, sum(errors.values()), wall)
+    return report
+
+
+def _stats(samples: list, errors: int, wall: float) -> dict:
+    ms = [s * 1000 for s in samples]
+    return {
+        "count": len(ms),
+        "errors": errors,
+        "rps": round(len(ms) / wall, 2) if wall else 0.0,
+        "p50_ms": round(statistics.median(ms), 3),
+        "p95_ms": round(percentile(ms, 0.95), 3),
+        "p99_ms": round(percentile(ms, 0.99), 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="database seeded by benchmarks.seed (default: seed a temporary one)")
+    add_scale_arguments(parser)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"request kinds and weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000, help="total requests (ignored with --duration)")
+    parser.add_argument("--duration", type=float, default=0.0, help="run for this many seconds instead")
+    parser.add_argument("--actors", type=int, default=200, help="distinct signed-in users")
+    parser.add_argument("--out", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    scale = scale_from_args(args)
+    if args.db:
+        db_session.global_init(args.db)
+    else:
+        db_session.global_init(os.path.join(tempfile.mkdtemp(prefix="regime-load-"), "load.db"))
+        db = db_session.create_session()
+        try:
+            print(f"seeded {seed(db, scale)}", file=sys.stderr)
+        finally:
+            db.close()
+
+    import web
+
+    for name in ("regime-maker", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    actors, history = prepare_actors(args.actors, scale.zipf, scale.seed)
+    latencies, errors, wall = asyncio.run(drive(
+        web.app, actors, history, args.mix, args.concurrency, args.requests, args.duration, scale.seed,
+    ))
+    report = summarize(latencies, errors, wall)
+
+    print(f"{'kind':10} {'count':>7} {'errors':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for kind, row in report.items():
+        print(
+            f"{kind:10} {row['count']:7d} {row['errors']:6d} {row['rps']:8.1f} "
+            f"{row['p50_ms']:9.2f} {row['p95_ms']:9.2f} {row['p99_ms']:9.2f}"
+        )
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "commit": git_commit(),
+                    "db": args.db or "",
+                    "scale": None if args.db else scale.as_dict(),
+                    "mix": args.mix,
+                    "concurrency": args.concurrency,
+                    "wall_seconds": round(wall, 3),
+                },
+                "report": report,
+            }, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Run the benchmark suite in-process and save the results as JSON.
+
+    cd API && python -m benchmarks.run --users 500 --iterations 100
+    python -m benchmarks.run --compare benchmarks/results/<older>.json
+
+A temporary SQLite database is seeded by benchmarks.seed, the app is driven
+through TestClient (no server, no network) and every case is timed for
+--iterations runs after --warmup untimed ones. Cases named "*_cold" clear
+the relevant cache before each run. Results go to benchmarks/results/
+unless --out is given; --compare prints the change in median against an
+earlier result file.
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from benchmarks.seed import PASSWORD, add_scale_arguments, scale_from_args, seed
+from data import db_session
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[], object]
+    # Untimed, before every iteration (e.g. clearing a cache)
+    before: Optional[Callable[[], None]] = None
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(case: Case, iterations: int, warmup: int) -> dict:
+    """Timings of one case in milliseconds."""
+    samples = []
+    for i in range(warmup + iterations):
+        if case.before is not None:
+            case.before()
+        started = time.perf_counter()
+        case.run()
+        elapsed = time.perf_counter() - started
+        if i >= warmup:
+            samples.append(elapsed * 1000)
+    samples.sort()
+    return {
+        "iterations": iterations,
+        "min_ms": round(samples[0], 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p95_ms": round(percentile(samples, 0.95), 4),
+        "max_ms": round(samples[-1], 4),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _ok(response):
+    assert response.status_code == 200, response.text
+    return response
+
+
+def build_cases(client, web) -> list:
+    """Cases against a seeded database; probes are the most connected users."""
+    from sqlalchemy import func
+
+    import profiles
+    from analytics import analytics_cache
+    from data.cycles import Cycle
+    from data.users import User
+    from responses import body_cache
+
+    db = db_session.create_session()
+    try:
+        reader = db.query(User.username).order_by(User.following_count.desc(), User.id).first()[0]
+        author = db.query(User.username).order_by(User.followers_count.desc(), User.id).first()[0]
+        cycle_name = (
+            db.query(Cycle.name).filter(Cycle.user == reader).order_by(Cycle.id).first()[0]
+        )
+        day = db.query(func.max(Cycle.start_at)).filter(Cycle.user == reader).scalar()
+    finally:
+        db.close()
+
+    token = _ok(client.post("/login/", json={"username": reader, "password": PASSWORD})).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    creds = {"user": reader}
+    today = datetime.date.today()
+
+    def post(path: str, **body):
+        return lambda: _ok(client.post(path, json={**creds, **body}, headers=headers))
+
+    def get(path: str):
+        return lambda: _ok(client.get(path))
+
+    read_db = db_session.create_read_session()
+    page_of_cycles = (
+        read_db.query(Cycle).filter(Cycle.is_public == 1).order_by(Cycle.id.desc()).limit(50).all()
+    )
+
+    return [
+        Case("analytics_cold", post("/analytics/", cycle_name=cycle_name), analytics_cache.clear),
+        Case("analytics", post("/analytics/", cycle_name=cycle_name)),
+        Case("month_duties", post("/month_duties/", year=today.year, month=today.month)),
+        Case("day", post("/day/", day=day)),
+        Case("feed", post("/feed/", limit=50)),
+        Case("feed_summary", post("/feed/", limit=50, view="summary")),
+        Case("profile_cold", get(f"/profile/{author}/"), profiles.profile_cache.clear),
+        Case("profile", get(f"/profile/{author}/")),
+        Case(
+            "cycles_to_dicts_cold",
+            lambda: web._cycles_to_dicts(page_of_cycles, read_db, reader),
+            body_cache.clear,
+        ),
+        Case("cycles_to_dicts", lambda: web._cycles_to_dicts(page_of_cycles, read_db, reader)),
+    ]
+
+
+def compare(results: dict, baseline_path: str) -> None:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} ({baseline['meta'].get('commit') or 'unknown commit'}):")
+    for name, current in results["cases"].items():
+        old = baseline["cases"].get(name)
+        if old is None:
+            print(f"  {name:24} new")
+            continue
+        change = (current["median_ms"] / old["median_ms"] - 1) * 100 if old["median_ms"] else 0.0
+        print(f"  {name:24} {old['median_ms']:10.3f} -> {current['median_ms']:10.3f} ms  {change:+7.1f}%")
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_scale_arguments(parser)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="run only these cases")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare medians against")
+    args = parser.parse_args(argv)
+
+    scale = scale_from_args(args)
+    db_session.global_init(os.path.join(tempfile.mkdtemp(prefix="regime-bench-"), "bench.db"))
+    db = db_session.create_session()
+    started = time.perf_counter()
+    try:
+        rows = seed(db, scale)
+    finally:
+        db.close()
+    seed_seconds = time.perf_counter() - started
+    print(f"seeded {rows} in {seed_seconds:.1f}s", file=sys.stderr)
+
+    import web
+    from fastapi.testclient import TestClient
+
+    # Per-request INFO lines would dominate the output and the timings
+    for name in ("regime-maker", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "scale": scale.as_dict(),
+            "rows": rows,
+            "seed_seconds": round(seed_seconds, 2),
+        },
+        "cases": {},
+    }
+    with TestClient(web.app) as client:
+        for case in build_cases(client, web):
+            if args.only and case.name not in args.only:
+                continue
+            results["cases"][case.name] = stats = measure(case, args.iterations, args.warmup)
+            print(f"{case.name:24} median {stats['median_ms']:9.3f} ms  p95 {stats['p95_ms']:9.3f} ms")
+
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        out = os.path.join(RESULTS_DIR, f"{stamp}-{results['meta']['commit'] or 'nogit'}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {out}", file=sys.stderr)
+    if args.compare:
+        compare(results, args.compare)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Synthetic data for benchmarks and load tests.
+
+seed() fills an empty database with users, cycles (programs drawn from
+the real exercise catalog), clone chains, follows, likes and a history of
+duty rows, then rebuilds everything the app derives from them (counters,
+timeline, trending). Follows, likes and clone sources are drawn from a
+power law (Zipf, exponent --zipf) over a random popularity ranking, so a
+few authors get most of the attention as in a real social graph. The same
+Scale always produces the same data.
+
+Rows go straight into the ORM models' tables in batches of CHUNK, so only
+the public cycles (clone sources) are held in memory. Duty history
+dominates the row count (about users * history_days * 3), so keep
+--history-days modest for very large graphs:
+
+    cd API && python -m benchmarks.seed /tmp/big.db --users 100000 --history-days 30
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+import counters
+import trending
+from auth import hash_password
+from catalog import EXERCISES_PATH
+from data import db_session
+from data.cycle_bodies import CycleBody, body_hash
+from data.cycles import Cycle
+from data.duties import Duty
+from data.follows import Follow
+from data.likes import Like
+from data.migrations import _backfill_timeline
+from data.users import User
+from schedule import REST_DESCRIPTION, CycleSchedule, duties_on
+
+PASSWORD = "bench-pass"
+CHUNK = 5000
+
+
+@dataclass
+class Scale:
+    users: int = 200
+    cycles_per_user: int = 4
+    public_ratio: float = 0.5
+    # Share of cycles that are clones of an earlier public cycle
+    clone_ratio: float = 0.2
+    follows_per_user: int = 20
+    likes_per_user: int = 30
+    history_days: int = 90
+    # Zipf exponent of follower/like/clone popularity; 0 is uniform
+    zipf: float = 1.1
+    seed: int = 1
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser) -> None:
+    """One --flag per Scale field, with the dataclass defaults."""
+    for field, value in Scale().as_dict().items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(value), default=value)
+
+
+def scale_from_args(args: argparse.Namespace) -> Scale:
+    return Scale(**{field: getattr(args, field) for field in Scale().as_dict()})
+
+
+class _Batch:
+    """Buffered executemany INSERTs into one model's table."""
+
+    def __init__(self, db: Session, model):
+        self.db = db
+        self.model = model
+        self.rows = []
+        self.count = 0
+
+    def add(self, row: dict) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= CHUNK:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.rows:
+            self.db.execute(insert(self.model), self.rows)
+            self.count += len(self.rows)
+            self.rows = []
+
+
+class PowerLaw:
+    """
+    Draws items with probability proportional to 1 / rank**s. Ranks follow
+    the given order, or a random one fixed at construction with shuffle.
+    """
+
+    def __init__(self, rng: random.Random, items: list, s: float, shuffle: bool = True):
+        self.rng = rng
+        self.items = list(items)
+        if shuffle:
+            rng.shuffle(self.items)
+        self.cum_weights = list(itertools.accumulate(
+            1.0 / (rank ** s) for rank in range(1, len(self.items) + 1)
+        ))
+
+    def pick(self):
+        return self.rng.choices(self.items, cum_weights=self.cum_weights)[0]
+
+    def distinct(self, k: int, exclude=None) -> list:
+        """Up to k distinct items, never `exclude`."""
+        k = min(k, len(self.items) - (exclude is not None))
+        picked = set()
+        while len(picked) < k:
+            for item in self.rng.choices(self.items, cum_weights=self.cum_weights, k=k - len(picked)):
+                if item != exclude:
+                    picked.add(item)
+        return list(picked)
+
+
+def _exercise_ids() -> list:
+    with open(EXERCISES_PATH, "r", encoding="utf-8") as f:
+        return [ex["id"] for ex in json.load(f) if ex.get("id")]
+
+
+def _program(rng: random.Random, exercise_ids: list) -> tuple:
+    """(days_count, descriptions, data) of a random split with a rest day now and then."""
+    days_count = rng.randint(3, 7)
+    descriptions, data = [], {}
+    for day in range(days_count):
+        name = f"День {day + 1}"
+        if rng.random() < 0.2:
+            descriptions.append(REST_DESCRIPTION)
+            data[name] = []
+            continue
+        picks = rng.sample(exercise_ids, min(len(exercise_ids), rng.randint(3, 8)))
+        descriptions.append(", ".join(f"упражнение {ex_id}" for ex_id in picks))
+        data[name] = [{"id": ex_id, "sets": rng.randint(2, 5), "reps": rng.randint(6, 15)} for ex_id in picks]
+    return days_count, descriptions, data
+
+
+def seed(db: Session, scale: Scale, today: datetime.date = None) -> dict:
+    """Fill an empty database at `scale` and commit. Returns row counts."""
+    rng = random.Random(scale.seed)
+    today = today or datetime.date.today()
+    now = datetime.datetime.utcnow()
+    exercise_ids = _exercise_ids()
+    password = hash_password(PASSWORD)
+    history_start = today - datetime.timedelta(days=scale.history_days)
+
+    users, bodies, cycles = _Batch(db, User), _Batch(db, CycleBody), _Batch(db, Cycle)
+    duties = _Batch(db, Duty)
+    usernames = [f"bench_{i:06d}" for i in range(scale.users)]
+    for i, name in enumerate(usernames):
+        users.add({"id": i + 1, "username": name, "password": password, "created_at": now, "bio": f"bio {name}"})
+    users.flush()
+
+    # One popularity ranking drives followers, and which authors get cloned
+    popular_users = PowerLaw(rng, usernames, scale.zipf)
+    author_rank = {name: rank for rank, name in enumerate(popular_users.items, start=1)}
+    public, public_weights = [], []
+    descriptions_of = {}
+    cycle_id = clones = 0
+    for user_id, owner in enumerate(usernames, start=1):
+        schedules = []
+        for n in range(scale.cycles_per_user):
+            cycle_id += 1
+            if public and rng.random() < scale.clone_ratio:
+                source = rng.choices(public, weights=public_weights)[0]
+                clones += 1
+                cycle = {
+                    **source,
+                    "name": f"{source['name'].split(' (')[0]} ({n + 1})",
+                    "original_author": source["original_author"] or source["user"],
+                }
+            else:
+                days_count, descriptions, data = _program(rng, exercise_ids)
+                key = body_hash(descriptions, data)
+                if key not in descriptions_of:
+                    descriptions_of[key] = descriptions
+                    bodies.add({"hash": key, "descriptions": descriptions, "data": data})
+                cycle = {
+                    "name": f"Цикл {n + 1}",
+                    "days_count": days_count,
+                    "pause": rng.randint(0, 2),
+                    "body_hash": key,
+                    "original_author": "",
+                }
+            start_at = history_start + datetime.timedelta(days=rng.randrange(max(scale.history_days, 1)))
+            cycle.update({
+                "id": cycle_id,
+                "user": owner,
+                "start_at": start_at.isoformat(),
+                "is_public": int(rng.random() < scale.public_ratio),
+            })
+            cycles.add(cycle)
+            if cycle["is_public"]:
+                public.append(cycle)
+                public_weights.append(1.0 / author_rank[owner] ** scale.zipf)
+            schedule = CycleSchedule(
+                start_at.toordinal(),
+                cycle["days_count"] + cycle["pause"],
+                descriptions_of[cycle["body_hash"]],
+            )
+            schedules.append(schedule)
+        # Duty history: every scheduled day in the window, most of them done
+        for offset in range(scale.history_days):
+            date = history_start + datetime.timedelta(days=offset)
+            for duty_name in duties_on(schedules, date):
+                done = int(rng.random() < 0.7)
+                duties.add({
+                    "user_id": user_id, "date": date.isoformat(), "duty_name": duty_name,
+                    "done": done, "version": done,
+                })
+    for batch in (bodies, cycles, duties):
+        batch.flush()
+
+    follows = _Batch(db, Follow)
+    for follower in usernames:
+        for following in popular_users.distinct(scale.follows_per_user, exclude=follower):
+            follows.add({"follower": follower, "following": following, "created_at": now})
+    follows.flush()
+
+    likes = _Batch(db, Like)
+    popular_cycles = PowerLaw(rng, [c["id"] for c in public], scale.zipf)
+    for liker in usernames:
+        for liked in popular_cycles.distinct(scale.likes_per_user):
+            liked_at = now - datetime.timedelta(seconds=rng.randrange(30 * 24 * 3600))
+            likes.add({"user": liker, "cycle_id": liked, "created_at": liked_at})
+    likes.flush()
+    db.commit()
+
+    counters.repair(db)
+    with db_session.engine.begin() as conn:
+        _backfill_timeline(conn)
+    trending.rebalance(db)
+    return {
+        "users": users.count,
+        "cycles": cycles.count,
+        "bodies": bodies.count,
+        "clones": clones,
+        "follows": follows.count,
+        "likes": likes.count,
+        "duties": duties.count,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db", help="SQLite file to create (must not exist yet)")
+    add_scale_arguments(parser)
+    args = parser.parse_args(argv)
+    db_session.global_init(args.db)
+    db = db_session.create_session()
+    started = time.perf_counter()
+    try:
+        if db.query(User.id).first() is not None:
+            parser.error(f"{args.db} already has users; seed an empty database.")
+        rows = seed(db, scale_from_args(args))
+    finally:
+        db.close()
+    print(f"seeded {rows} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
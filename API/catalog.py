@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+EXERCISES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "db", "exercises.json")
+
+
+class ExerciseCatalog:
+    """
+    In-memory copy of db/exercises.json.
+    Exercises are indexed by id with a muscle -> exercise ids reverse index,
+    and the JSON response body is serialized once per load. The file is
+    re-read when its mtime changes (checked at most every check_interval s).
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.version = 0
+        self.exercises: list = []
+        self.by_id: dict[int, dict] = {}
+        self.by_muscle: dict[str, list[int]] = {}
+        self.payload: bytes = b"[]"
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._listeners: list[Callable[["ExerciseCatalog"], None]] = []
+
+    def on_reload(self, callback: Callable[["ExerciseCatalog"], None]) -> None:
+        """Register a callback that runs after every (re)load."""
+        self._listeners.append(callback)
+
+    def refresh(self, force: bool = False) -> None:
+        """Reload the file if it changed since the last load."""
+        now = time.monotonic()
+        if not force and self.version and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime and not force:
+            return
+        with self._lock:
+            if mtime == self._mtime and not force:
+                return
+            self._load(mtime)
+        for callback in self._listeners:
+            callback(self)
+
+    def _load(self, mtime: float) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            exercises = json.load(f)
+        by_id = {}
+        by_muscle: dict[str, list[int]] = {}
+        for ex in exercises:
+            ex_id = int(ex["id"])
+            by_id[ex_id] = ex
+            for muscle in ex.get("muscles", {}):
+                by_muscle.setdefault(muscle, []).append(ex_id)
+        self.exercises = exercises
+        self.by_id = by_id
+        self.by_muscle = by_muscle
+        self.payload = json.dumps(
+            exercises, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        self._mtime = mtime
+        self.version += 1
+
+    def current(self) -> "ExerciseCatalog":
+        """Return the catalog, reloading it first if the file changed."""
+        self.refresh()
+        if not self.version:
+            raise FileNotFoundError(self.path)
+        return self
+
+    def get(self, ex_id) -> Optional[dict]:
+        """Look up an exercise by id; None for unknown or malformed ids."""
+        try:
+            return self.by_id.get(int(ex_id))
+        except (TypeError, ValueError):
+            return None
+
+    def for_muscle(self, muscle: str) -> list[dict]:
+        """All exercises that load the given muscle group."""
+        return [self.by_id[ex_id] for ex_id in self.by_muscle.get(muscle, [])]
+
+
+catalog = ExerciseCatalog(EXERCISES_PATH)
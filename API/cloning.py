@@ -0,0 +1,68 @@
+"""
+Cloning public cycles into a user's private list.
+
+A clone keeps the source name when it is free and otherwise takes the
+first free "name (n)" with n >= 2. All names for a batch are resolved from
+a single query over the user's existing names with those prefixes, and the
+clones are added to the caller's transaction together.
+"""
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+import counters
+from data.cycles import Cycle
+
+
+def _like_prefix(name: str) -> str:
+    escaped = name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped} (%)"
+
+
+def free_names(db: Session, user: str, base_names: list) -> list:
+    """A distinct unused cycle name for each of base_names, in order."""
+    bases = set(base_names)
+    prefixes = [Cycle.name.like(_like_prefix(base), escape="\\") for base in bases]
+    taken = {
+        row[0] for row in
+        db.query(Cycle.name).filter(Cycle.user == user, or_(Cycle.name.in_(bases), *prefixes))
+    }
+    # Next suffix to try per base, so repeated bases in a batch do not rescan
+    next_suffix = {base: 2 for base in bases}
+    result = []
+    for base in base_names:
+        if base not in taken:
+            name = base
+        else:
+            suffix = next_suffix[base]
+            while f"{base} ({suffix})" in taken:
+                suffix += 1
+            name = f"{base} ({suffix})"
+            next_suffix[base] = suffix + 1
+        taken.add(name)
+        result.append(name)
+    return result
+
+
+def clone_cycles(db: Session, user: str, sources: list, start_at: str) -> list:
+    """
+    Add private copies of `sources` to `user`'s cycles (uncommitted) and
+    return them in the same order. Clones share the source's program body,
+    so no JSON is copied. The original author is carried along clone chains.
+    """
+    clones = [
+        Cycle(
+            name=name,
+            user=user,
+            days_count=source.days_count,
+            pause=source.pause,
+            body_hash=source.body_hash,
+            start_at=start_at,
+            is_public=0,
+            original_author=getattr(source, "original_author", "") or source.user,
+        )
+        for source, name in zip(sources, free_names(db, user, [s.name for s in sources]))
+    ]
+    db.add_all(clones)
+    counters.bump_user(db, user, cycles_count=len(clones))
+    return clones
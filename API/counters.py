@@ -0,0 +1,73 @@
+"""
+Denormalized social counters.
+
+users.followers_count / following_count / cycles_count / public_cycles_count
+and cycles.ins_count are changed with relative "x = x + delta" UPDATEs in
+the same transaction as the write they describe, so they commit or roll
+back together and concurrent writers never overwrite each other's counts.
+repair() recomputes all of them from the source tables.
+"""
+
+from typing import Optional
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from data.cycles import Cycle
+from data.follows import Follow
+from data.likes import Like
+from data.users import User
+
+
+def bump_user(db: Session, username: str, **deltas: int) -> None:
+    """Add deltas to a user's counters, e.g. bump_user(db, name, cycles_count=1)."""
+    values = {name: getattr(User, name) + delta for name, delta in deltas.items() if delta}
+    if values:
+        db.execute(
+            update(User).where(User.username == username).values(**values),
+            execution_options={"synchronize_session": False},
+        )
+
+
+def bump_ins(db: Session, cycle_id: int, delta: int) -> Optional[int]:
+    """Add delta to a cycle's ins_count and return the new value (None if no such cycle)."""
+    row = db.execute(
+        update(Cycle)
+        .where(Cycle.id == cycle_id)
+        .values(ins_count=Cycle.ins_count + delta)
+        .returning(Cycle.ins_count),
+        execution_options={"synchronize_session": False},
+    ).first()
+    return row[0] if row else None
+
+
+def _count(column, *where):
+    return select(func.count(column)).where(*where).scalar_subquery()
+
+
+def repair(db: Session) -> dict:
+    """
+    Recompute every counter from follows, cycles and likes and commit.
+    Returns the number of users and cycles whose stored counts had drifted.
+    """
+    user_counts = {
+        User.followers_count: _count(Follow.id, Follow.following == User.username),
+        User.following_count: _count(Follow.id, Follow.follower == User.username),
+        User.cycles_count: _count(Cycle.id, Cycle.user == User.username),
+        User.public_cycles_count: _count(
+            Cycle.id, and_(Cycle.user == User.username, Cycle.is_public == 1)
+        ),
+    }
+    users = db.execute(
+        update(User)
+        .where(or_(*[column != actual for column, actual in user_counts.items()]))
+        .values({column: actual for column, actual in user_counts.items()}),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    ins = _count(Like.id, Like.cycle_id == Cycle.id)
+    cycles = db.execute(
+        update(Cycle).where(Cycle.ins_count != ins).values(ins_count=ins),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    db.commit()
+    return {"users": users, "cycles": cycles}
@@ -1,6 +1,11 @@
 from .users import User
 from .cycles import Cycle
+from .cycle_bodies import CycleBody
 from .notes import Note
 from .follows import Follow
 from .likes import Like
-from .comments import Comment
\ No newline at end of file
+from .comments import Comment
+from .sessions import UserSession
+from .duties import Duty
+from .timeline import TimelineEntry
+from .trending import Trending, TrendingEpoch
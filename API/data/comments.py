@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from .db_session import Base
 import datetime
 
@@ -14,5 +14,9 @@ class Comment(Base):
     text = Column(String(500), nullable=False)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+    __table_args__ = (
+        Index('ix_comments_target', 'target_type', 'target_id', 'id'),
+    )
+
     def __repr__(self):
         return f"{self.user} → {self.target_type}#{self.target_id}"
@@ -0,0 +1,52 @@
+import hashlib
+import json
+
+from sqlalchemy import Column, String, JSON
+from sqlalchemy.orm import Session
+from .db_session import Base, dialect_insert
+
+
+def body_hash(descriptions: list, data: dict) -> str:
+    """Content address of a cycle program, independent of dict key order."""
+    canonical = json.dumps(
+        {"descriptions": descriptions, "data": data},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CycleBody(Base):
+    """
+    The program of a cycle (day descriptions + exercise data), stored once
+    per distinct content. Cycles reference it by hash, so clones share one
+    row; changing a cycle's program points it at another body (copy on
+    write) and never edits a shared one.
+    """
+    __tablename__ = 'cycle_bodies'
+
+    hash = Column(String(64), primary_key=True)
+    descriptions = Column(JSON)
+    data = Column(JSON)
+
+    def __repr__(self):
+        return f"body {self.hash[:12]}"
+
+
+def intern_body(db: Session, descriptions: list, data: dict) -> str:
+    """Store a program unless an identical one exists; return its hash."""
+    key = body_hash(descriptions, data)
+    db.execute(
+        dialect_insert(db, CycleBody)
+        .values(hash=key, descriptions=descriptions, data=data)
+        .on_conflict_do_nothing(index_elements=["hash"])
+    )
+    return key
+
+
+def release_body(db: Session, key: str) -> None:
+    """Delete a body once no cycle references it any more."""
+    from .cycles import Cycle
+    db.query(CycleBody).filter(
+        CycleBody.hash == key,
+        ~db.query(Cycle.id).filter(Cycle.body_hash == key).exists(),
+    ).delete(synchronize_session=False)
@@ -1,5 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
 from .db_session import Base
+from .cycle_bodies import CycleBody
 import datetime
 
 
@@ -10,12 +12,32 @@ class Cycle(Base):
     name = Column(String(50), nullable=False)
     user = Column(String(50), nullable=False)
     days_count = Column(Integer)
-    descriptions = Column(JSON)
-    data = Column(JSON)
+    # Program (descriptions + data) lives in cycle_bodies, shared between clones
+    body_hash = Column(String(64), ForeignKey('cycle_bodies.hash'), index=True)
     pause = Column(Integer)
     start_at = Column(String(50))
     is_public = Column(Integer, default=0)
     original_author = Column(String(50), default="")
+    # Number of likes ("IN"s), kept in step by counters.py
+    ins_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        Index('ix_cycles_user_name', 'user', 'name', unique=True),
+        Index('ix_cycles_user_public', 'user', 'is_public'),
+        Index('ix_cycles_public_id', 'is_public', 'id'),
+    )
+
+    # Not loaded with the row: list views read bodies in bulk through
+    # responses.body_fragments(), the calendar joins in only descriptions
+    body = relationship(CycleBody, lazy="select")
+
+    @property
+    def descriptions(self) -> list:
+        return self.body.descriptions if self.body is not None else []
+
+    @property
+    def data(self) -> dict:
+        return self.body.data if self.body is not None else {}
 
     def __str__(self):
         return self.name
@@ -1,48 +1,157 @@
-from sqlalchemy import create_engine
+import math
+import os
+import random
+import sqlite3
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import Session
 
 Base = declarative_base()
 factory = None
+read_factory = None
+engine = None
+read_engine = None
 
+# Applied to every SQLite connection. WAL lets readers run alongside the single
+# writer; NORMAL sync is durable enough under WAL and much cheaper than FULL.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+    "mmap_size": os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+    # negative values are KiB
+    "cache_size": os.environ.get("SQLITE_CACHE_SIZE", "-20000"),
+}
 
-def global_init(db_file: str):
-    global factory
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _is_sqlite_file(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def _create_engine(url: str, read_only: bool = False) -> Engine:
+    """Create an engine from a URL, configured from the environment."""
+    parsed = make_url(url)
+    options = {"echo": _env_flag("DB_ECHO")}
+    is_sqlite = parsed.get_backend_name() == "sqlite"
+    in_memory = is_sqlite and not _is_sqlite_file(url)
+    if is_sqlite:
+        options["connect_args"] = {"check_same_thread": False}
+    if not in_memory:
+        options["pool_size"] = int(os.environ.get("DB_POOL_SIZE", "5"))
+        options["max_overflow"] = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+        options["pool_timeout"] = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+        options["pool_pre_ping"] = not is_sqlite
+    new_engine = create_engine(parsed, **options)
+
+    if is_sqlite:
+        pragmas = dict(SQLITE_PRAGMAS)
+        if read_only or in_memory:
+            pragmas.pop("journal_mode")
+        if read_only:
+            pragmas["query_only"] = "ON"
+
+        @event.listens_for(new_engine, "connect")
+        def _set_sqlite_pragmas(dbapi_conn, _record):
+            cursor = dbapi_conn.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            # Trending weights use power(), which SQLite builds may leave out
+            try:
+                cursor.execute("SELECT power(2, 1)")
+            except sqlite3.OperationalError:
+                dbapi_conn.create_function("power", 2, math.pow, deterministic=True)
+            cursor.close()
+
+    return new_engine
+
+
+def global_init(db_file: str = ""):
+    """
+    Set up the engine and session factories.
+    DATABASE_URL takes precedence over db_file. Read-heavy endpoints use a
+    separate engine (DATABASE_READ_URL, or the same SQLite file opened with
+    query_only) so they do not queue behind writers for pooled connections.
+    """
+    global factory, read_factory, engine, read_engine
 
     if factory:
         return
 
-    if not db_file or not db_file.strip():
-        raise Exception("Database file path is required.")
+    url = os.environ.get("DATABASE_URL", "").strip()
+    if not url:
+        if not db_file or not db_file.strip():
+            raise Exception("Database file path is required.")
+        url = f"sqlite:///{db_file.strip()}"
 
-    conn_str = f'sqlite:///{db_file.strip()}?check_same_thread=False'
-
-    engine = create_engine(conn_str, echo=False)
+    engine = _create_engine(url)
     factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
     from . import __all_models
+    from .migrations import LATEST_VERSION, current_version, run_migrations
 
-    Base.metadata.create_all(bind=engine)
-    _run_migrations(engine)
-
-
-def _run_migrations(engine):
-    """Add new columns to existing tables (safe to run multiple times)."""
-    from sqlalchemy import text
-    migrations = [
-        "ALTER TABLE users ADD COLUMN bio TEXT DEFAULT ''",
-        "ALTER TABLE cycles ADD COLUMN is_public INTEGER DEFAULT 0",
-    ]
     with engine.connect() as conn:
-        for sql in migrations:
-            try:
-                conn.execute(text(sql))
-                conn.commit()
-            except Exception:
-                pass
+        version = current_version(conn)
+    if version < LATEST_VERSION:
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine, version)
+
+    read_url = os.environ.get("DATABASE_READ_URL", "").strip()
+    if read_url:
+        read_engine = _create_engine(read_url, read_only=True)
+    elif _is_sqlite_file(url):
+        read_engine = _create_engine(url, read_only=True)
+    else:
+        read_engine = engine
+    read_factory = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 
 def create_session() -> Session:
     global factory
     return factory()
+
+
+def create_read_session() -> Session:
+    """Session for read-only queries (query_only on SQLite)."""
+    global read_factory
+    return read_factory()
+
+
+def dialect_insert(db: Session, model):
+    """INSERT construct for the session's dialect, with ON CONFLICT support."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
+def is_busy_error(exc: OperationalError) -> bool:
+    """True for SQLITE_BUSY / SQLITE_LOCKED errors that are worth retrying."""
+    message = str(exc.orig).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+def retry_on_busy(db: Session, fn, attempts: int = 5, base_delay: float = 0.02):
+    """
+    Run fn() and retry it with jittered exponential backoff when SQLite
+    reports the database as locked. The session is rolled back between tries.
+    This blocks while it waits, so async handlers run it with asyncio.to_thread.
+    """
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except OperationalError as exc:
+            if not is_busy_error(exc) or attempt == attempts - 1:
+                raise
+            db.rollback()
+            time.sleep(base_delay * (2 ** attempt) * (0.5 + random.random()))
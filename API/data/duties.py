@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+from .db_session import Base
+
+
+class Duty(Base):
+    __tablename__ = 'duties'
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    # ISO date, same format as the keys of the legacy User.days blob
+    date = Column(String(10), nullable=False)
+    duty_name = Column(String(500), nullable=False)
+    done = Column(Integer, nullable=False, default=0)
+    # bumped on every state change, for optimistic concurrency checks
+    version = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'date', 'duty_name', name='uq_duty'),
+    )
+
+    def __repr__(self):
+        return f"user#{self.user_id} {self.date} {self.duty_name}={self.done}"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, Index, UniqueConstraint
 from .db_session import Base
 import datetime
 
@@ -7,12 +7,15 @@ class Follow(Base):
     __tablename__ = 'follows'
 
     id = Column(Integer, primary_key=True, index=True)
-    follower = Column(String(50), nullable=False, index=True)
-    following = Column(String(50), nullable=False, index=True)
+    follower = Column(String(50), nullable=False)
+    following = Column(String(50), nullable=False)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
     __table_args__ = (
         UniqueConstraint('follower', 'following', name='uq_follow'),
+        # (key, id) so follower/following pages are index range scans
+        Index('ix_follows_follower', 'follower', 'id'),
+        Index('ix_follows_following', 'following', 'id'),
     )
 
     def __repr__(self):
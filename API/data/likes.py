@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, Index, UniqueConstraint
 from .db_session import Base
 import datetime
 
@@ -8,11 +8,12 @@ class Like(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user = Column(String(50), nullable=False, index=True)
-    cycle_id = Column(Integer, nullable=False, index=True)
+    cycle_id = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
     __table_args__ = (
         UniqueConstraint('user', 'cycle_id', name='uq_like'),
+        Index('ix_likes_cycle_id', 'cycle_id', 'id'),
     )
 
     def __repr__(self):
@@ -0,0 +1,239 @@
+"""
+Versioned schema migrations.
+
+Each migration runs once, in its own transaction, and is recorded in the
+schema_version table. global_init() only touches DDL when the recorded
+version is behind LATEST_VERSION, so booting a worker against an up-to-date
+database costs one version lookup.
+
+Tables for new models are created by Base.metadata.create_all() before the
+pending migrations run; migrations add columns, indexes and move data.
+"""
+
+import datetime
+import json
+import time
+
+from sqlalchemy import inspect, text, update
+from sqlalchemy.engine import Connection, Engine
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    """ALTER TABLE ... ADD COLUMN unless the column already exists."""
+    if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _legacy_columns(conn: Connection) -> None:
+    _add_column(conn, "users", "bio", "TEXT DEFAULT ''")
+    _add_column(conn, "cycles", "is_public", "INTEGER DEFAULT 0")
+    _add_column(conn, "cycles", "original_author", "VARCHAR(50) DEFAULT ''")
+
+
+def _user_days_to_duties(conn: Connection) -> None:
+    """Move duty history from the users.days JSON blob into the duties table."""
+    _add_column(conn, "duties", "version", "INTEGER NOT NULL DEFAULT 0")
+    rows = conn.execute(text(
+        "SELECT id, days FROM users WHERE days IS NOT NULL AND days NOT IN ('{}', 'null')"
+    )).all()
+    for user_id, days in rows:
+        if isinstance(days, str):
+            days = json.loads(days)
+        values = [
+            {"user_id": user_id, "date": day, "duty_name": name, "done": int(done), "version": 0}
+            for day, duties in (days or {}).items()
+            for name, done in (duties or {}).items()
+        ]
+        if values:
+            conn.execute(text(
+                "INSERT INTO duties (user_id, date, duty_name, done, version) "
+                "VALUES (:user_id, :date, :duty_name, :done, :version) ON CONFLICT DO NOTHING"
+            ), values)
+        conn.execute(text("UPDATE users SET days = '{}' WHERE id = :id"), {"id": user_id})
+
+
+def _hot_query_indexes(conn: Connection) -> None:
+    """Indexes behind the per-user, public-feed and comment lookups."""
+    # (user, name) becomes unique; rename any duplicates left by older versions
+    for table in ("cycles", "notes"):
+        conn.execute(text(
+            f'UPDATE {table} SET name = name || \' (\' || id || \')\' '
+            f'WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY "user", name)'
+        ))
+    conn.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS ix_cycles_user_name ON cycles ("user", name)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_cycles_user_public ON cycles ("user", is_public)'))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_cycles_public_id ON cycles (is_public, id)"))
+    conn.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS ix_notes_user_name ON notes ("user", name)'))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_comments_target ON comments (target_type, target_id, id)"
+    ))
+
+
+def _backfill_timeline(conn: Connection) -> None:
+    """Materialize existing feeds: own public cycles plus followed authors' ones."""
+    from .timeline import TIMELINE_FANOUT_LIMIT
+    conn.execute(text(
+        'INSERT INTO timeline (owner, cycle_id, author) '
+        'SELECT "user", id, "user" FROM cycles WHERE is_public = 1 '
+        'ON CONFLICT DO NOTHING'
+    ))
+    conn.execute(text(
+        'INSERT INTO timeline (owner, cycle_id, author) '
+        'SELECT f.follower, c.id, c."user" FROM follows f '
+        'JOIN cycles c ON c."user" = f.following AND c.is_public = 1 '
+        'WHERE f.following IN ('
+        '  SELECT following FROM follows GROUP BY following HAVING COUNT(*) <= :limit'
+        ') ON CONFLICT DO NOTHING'
+    ), {"limit": TIMELINE_FANOUT_LIMIT})
+
+
+def _pagination_indexes(conn: Connection) -> None:
+    """Widen the follow/like lookup indexes to (key, id) for keyset pagination."""
+    for name, table, columns in (
+        ("ix_follows_follower", "follows", "follower, id"),
+        ("ix_follows_following", "follows", "following, id"),
+        ("ix_likes_cycle_id", "likes", "cycle_id, id"),
+    ):
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        conn.execute(text(f"CREATE INDEX {name} ON {table} ({columns})"))
+
+
+def _social_counters(conn: Connection) -> None:
+    """Denormalized like/follow/cycle counters, backfilled from the source tables."""
+    for column in ("followers_count", "following_count", "cycles_count", "public_cycles_count"):
+        _add_column(conn, "users", column, "INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "cycles", "ins_count", "INTEGER NOT NULL DEFAULT 0")
+    conn.execute(text(
+        'UPDATE users SET '
+        'followers_count = (SELECT COUNT(*) FROM follows WHERE following = users.username), '
+        'following_count = (SELECT COUNT(*) FROM follows WHERE follower = users.username), '
+        'cycles_count = (SELECT COUNT(*) FROM cycles WHERE "user" = users.username), '
+        'public_cycles_count = '
+        '(SELECT COUNT(*) FROM cycles WHERE "user" = users.username AND is_public = 1)'
+    ))
+    conn.execute(text(
+        "UPDATE cycles SET ins_count = (SELECT COUNT(*) FROM likes WHERE cycle_id = cycles.id)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_cycles_public_ins ON cycles (is_public, ins_count, id)"
+    ))
+
+
+def _search_index(conn: Connection) -> None:
+    """
+    FTS5 tables for cycle and user search. They are filled from the ORM
+    write paths (search_index.py), which also backfill them on first boot.
+    Skipped where FTS5 is unavailable; search then falls back to ILIKE.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    if not conn.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar():
+        return
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS cycles_fts USING fts5("
+        "name, descriptions, exercises, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    ))
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5("
+        "username, bio, tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3')"
+    ))
+
+
+def _trending(conn: Connection) -> None:
+    """
+    Trending rows for existing public cycles, scored from their recent likes
+    with the rebalance's SQL so /trending/ is ordered before the first
+    rebalance runs. The fallback feed no longer reads cycles by ins_count.
+    """
+    from .trending import Trending, recent_score
+    now = time.time()
+    conn.execute(text("DROP INDEX IF EXISTS ix_cycles_public_ins"))
+    conn.execute(text(
+        "INSERT INTO trending_epoch (id, epoch) VALUES (1, :now) ON CONFLICT DO NOTHING"
+    ), {"now": now})
+    # Seed from the stored epoch, which is `now` unless the row already existed
+    now = conn.execute(text("SELECT epoch FROM trending_epoch WHERE id = 1")).scalar()
+    conn.execute(text(
+        "INSERT INTO trending (cycle_id, score) SELECT id, 0.0 FROM cycles WHERE is_public = 1 "
+        "ON CONFLICT DO NOTHING"
+    ))
+    conn.execute(update(Trending).values(score=recent_score(conn.dialect.name, now)))
+
+
+def _dedupe_cycle_bodies(conn: Connection) -> None:
+    """
+    Move cycles.descriptions/data into content-addressed cycle_bodies rows,
+    one per distinct program, and clear the per-cycle copies.
+    """
+    from .cycle_bodies import body_hash
+    _add_column(conn, "cycles", "body_hash", "VARCHAR(64)")
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_cycles_body_hash ON cycles (body_hash)"))
+    columns = {c["name"] for c in inspect(conn).get_columns("cycles")}
+    if not {"descriptions", "data"} <= columns:
+        return
+    rows = conn.execute(text(
+        "SELECT id, descriptions, data FROM cycles WHERE body_hash IS NULL"
+    )).all()
+    for cycle_id, descriptions, data in rows:
+        descriptions = json.loads(descriptions) if isinstance(descriptions, str) else descriptions
+        data = json.loads(data) if isinstance(data, str) else data
+        descriptions, data = descriptions or [], data or {}
+        key = body_hash(descriptions, data)
+        conn.execute(text(
+            "INSERT INTO cycle_bodies (hash, descriptions, data) VALUES (:hash, :descriptions, :data) "
+            "ON CONFLICT DO NOTHING"
+        ), {
+            "hash": key,
+            "descriptions": json.dumps(descriptions, ensure_ascii=False),
+            "data": json.dumps(data, ensure_ascii=False),
+        })
+        conn.execute(text(
+            "UPDATE cycles SET body_hash = :hash, descriptions = NULL, data = NULL WHERE id = :id"
+        ), {"hash": key, "id": cycle_id})
+
+
+def _trending_lease(conn: Connection) -> None:
+    _add_column(conn, "trending_epoch", "lease_owner", "VARCHAR(64)")
+    _add_column(conn, "trending_epoch", "lease_until", "FLOAT NOT NULL DEFAULT 0")
+
+
+MIGRATIONS = [
+    (1, "legacy bio / is_public / original_author columns", _legacy_columns),
+    (2, "users.days JSON -> duties table", _user_days_to_duties),
+    (3, "indexes for hot queries", _hot_query_indexes),
+    (4, "fan-out timeline backfill", _backfill_timeline),
+    (5, "(key, id) indexes for keyset pagination", _pagination_indexes),
+    (6, "denormalized social counters", _social_counters),
+    (7, "FTS5 search index", _search_index),
+    (8, "trending scores", _trending),
+    (9, "content-addressed cycle bodies", _dedupe_cycle_bodies),
+    (10, "trending rebalance lease", _trending_lease),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn: Connection) -> int:
+    """Highest applied migration, 0 for a database without schema_version."""
+    if not inspect(conn).has_table("schema_version"):
+        return 0
+    return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+
+
+def run_migrations(engine: Engine, from_version: int) -> None:
+    """Apply every migration newer than from_version."""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER PRIMARY KEY, description VARCHAR(200), applied_at TIMESTAMP)"
+        ))
+    for version, description, migrate in MIGRATIONS:
+        if version <= from_version:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": version, "d": description, "t": datetime.datetime.utcnow()},
+            )
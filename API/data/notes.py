@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
 import datetime as _dt
 from .db_session import Base
 import datetime
@@ -14,6 +14,10 @@ class Note(Base):
     start_at = Column(String(50))
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+    __table_args__ = (
+        Index('ix_notes_user_name', 'user', 'name', unique=True),
+    )
+
     def __str__(self):
         return self.name
 
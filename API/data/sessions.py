@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from .db_session import Base
+import datetime
+
+
+class UserSession(Base):
+    __tablename__ = 'sessions'
+
+    # jti of the signed token; the token itself is never stored
+    id = Column(String(32), primary_key=True)
+    user = Column(String(50), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    revoked = Column(Integer, default=0)
+
+    def __repr__(self):
+        return f"{self.user} session#{self.id}"
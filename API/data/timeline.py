@@ -0,0 +1,27 @@
+import os
+
+from sqlalchemy import Column, Integer, String, Index, UniqueConstraint
+from .db_session import Base
+
+# Authors with more followers than this are read in pull mode instead of
+# being fanned out on publish.
+TIMELINE_FANOUT_LIMIT = int(os.environ.get("TIMELINE_FANOUT_LIMIT", "1000"))
+
+
+class TimelineEntry(Base):
+    __tablename__ = 'timeline'
+
+    id = Column(Integer, primary_key=True, index=True)
+    # whose feed this row belongs to
+    owner = Column(String(50), nullable=False)
+    cycle_id = Column(Integer, nullable=False, index=True)
+    author = Column(String(50), nullable=False)
+
+    __table_args__ = (
+        # feed reads are a range scan over (owner, cycle_id DESC)
+        UniqueConstraint('owner', 'cycle_id', name='uq_timeline'),
+        Index('ix_timeline_owner_author', 'owner', 'author'),
+    )
+
+    def __repr__(self):
+        return f"{self.owner} ← cycle#{self.cycle_id} by {self.author}"
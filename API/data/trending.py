@@ -0,0 +1,76 @@
+import datetime
+import os
+
+from sqlalchemy import Column, Integer, Float, Index, String, func, literal, select
+from .db_session import Base
+from .likes import Like
+
+# Time for a like's weight in the trending score to halve.
+TRENDING_HALF_LIFE_SECONDS = float(os.environ.get("TRENDING_HALF_LIFE_SECONDS", str(3 * 24 * 3600)))
+
+# Likes older than this many half-lives weigh < 1e-9 of a fresh one and are dropped
+RECENT_HALF_LIVES = 30
+
+
+class Trending(Base):
+    """
+    Decayed like score of a public cycle. Each like adds
+    2 ** ((liked_at - epoch) / half_life), so scores are comparable without
+    rewriting every row as time passes; see trending.py.
+    """
+    __tablename__ = 'trending'
+
+    cycle_id = Column(Integer, primary_key=True, autoincrement=False)
+    score = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        # top-N reads and (score, id) cursors are a backwards index scan
+        Index('ix_trending_score', 'score', 'cycle_id'),
+    )
+
+    def __repr__(self):
+        return f"cycle#{self.cycle_id}: {self.score:.3f}"
+
+
+class TrendingEpoch(Base):
+    """
+    Single row: the unix time scores are currently relative to, and the
+    lease of the worker process that runs the periodic rebalance.
+    """
+    __tablename__ = 'trending_epoch'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    epoch = Column(Float, nullable=False)
+    lease_owner = Column(String(64), nullable=True)
+    lease_until = Column(Float, nullable=False, default=0.0, server_default="0")
+
+
+def unix_time(dialect_name: str, column):
+    """SQL for the unix time of a naive-UTC DateTime column."""
+    if dialect_name == "sqlite":
+        return (func.julianday(column) - 2440587.5) * 86400.0
+    return func.extract("epoch", column)
+
+
+def like_weight(liked_at, epoch=None):
+    """SQL weight of a like at `liked_at`, relative to the stored epoch unless one is given."""
+    if epoch is None:
+        stored = select(TrendingEpoch.epoch).where(TrendingEpoch.id == 1).scalar_subquery()
+        epoch = func.coalesce(stored, liked_at)
+    return func.power(2.0, (liked_at - epoch) / TRENDING_HALF_LIFE_SECONDS)
+
+
+def recent_score(dialect_name: str, now: float):
+    """
+    SQL for a trending row's score relative to epoch = now: the summed
+    weights of its cycle's likes from the last RECENT_HALF_LIVES half-lives.
+    """
+    since = datetime.datetime.fromtimestamp(
+        now - RECENT_HALF_LIVES * TRENDING_HALF_LIFE_SECONDS, datetime.timezone.utc
+    ).replace(tzinfo=None)
+    recent = (
+        select(func.sum(like_weight(unix_time(dialect_name, Like.created_at), literal(now))))
+        .where(Like.cycle_id == Trending.cycle_id, Like.created_at >= since)
+        .scalar_subquery()
+    )
+    return func.coalesce(recent, 0.0)
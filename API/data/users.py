@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy.orm import deferred
 from .db_session import Base
 import datetime
 
@@ -10,8 +11,14 @@ class User(Base):
     username = Column(String(50), unique=True, nullable=False)
     password = Column(String(255))
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
-    days = Column(JSON)
+    # Legacy per-day blob (superseded by duties); not read with the row
+    days = deferred(Column(JSON))
     bio = Column(String(500), default="")
+    # Denormalized counters, kept in step by counters.py
+    followers_count = Column(Integer, nullable=False, default=0, server_default="0")
+    following_count = Column(Integer, nullable=False, default=0, server_default="0")
+    cycles_count = Column(Integer, nullable=False, default=0, server_default="0")
+    public_cycles_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     def __str__(self):
         return self.username
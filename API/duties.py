@@ -0,0 +1,84 @@
+from typing import Optional
+
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+
+from data.db_session import dialect_insert
+from data.duties import Duty
+
+
+def load_day(db: Session, user_id: int, day: str) -> dict:
+    """Duty name -> done flag for one user and date."""
+    return dict(
+        db.query(Duty.duty_name, Duty.done)
+        .filter(Duty.user_id == user_id, Duty.date == day)
+        .all()
+    )
+
+
+def sync_day(db: Session, user_id: int, day: str, duties: dict) -> dict:
+    """
+    Make the stored rows for a date match the duties due that day, keeping
+    the done flag of duties that already exist. Only the differences are
+    written. Returns the merged duty dict.
+    """
+    existing = load_day(db, user_id, day)
+    for key in duties:
+        if key in existing:
+            duties[key] = existing[key]
+    missing = [key for key in duties if key not in existing]
+    stale = [key for key in existing if key not in duties]
+    if missing:
+        db.execute(
+            dialect_insert(db, Duty)
+            .values([{"user_id": user_id, "date": day, "duty_name": key, "done": 0} for key in missing])
+            .on_conflict_do_nothing(index_elements=["user_id", "date", "duty_name"])
+        )
+    if stale:
+        db.query(Duty).filter(
+            Duty.user_id == user_id, Duty.date == day, Duty.duty_name.in_(stale)
+        ).delete(synchronize_session=False)
+    if missing or stale:
+        db.commit()
+    return duties
+
+
+def set_duty(
+    db: Session,
+    user_id: int,
+    day: str,
+    duty_name: str,
+    done: Optional[int] = None,
+    expected_version: Optional[int] = None,
+) -> Optional[tuple[int, int]]:
+    """
+    Change one duty in a single UPDATE and return its new (done, version).
+    With done=None the flag is flipped; otherwise it is set, which is
+    idempotent and leaves the version alone when nothing changes. With
+    expected_version the update only applies if the row still has that
+    version. Returns None when no row matched.
+    """
+    if done is None:
+        values = {"done": 1 - Duty.done, "version": Duty.version + 1}
+    else:
+        values = {
+            "done": done,
+            "version": case((Duty.done == done, Duty.version), else_=Duty.version + 1),
+        }
+    stmt = update(Duty).where(
+        Duty.user_id == user_id, Duty.date == day, Duty.duty_name == duty_name
+    )
+    if expected_version is not None:
+        stmt = stmt.where(Duty.version == expected_version)
+    row = db.execute(stmt.values(**values).returning(Duty.done, Duty.version)).first()
+    db.commit()
+    return tuple(row) if row else None
+
+
+def get_duty_version(db: Session, user_id: int, day: str, duty_name: str) -> Optional[int]:
+    """Current version of a duty, or None if it does not exist."""
+    return (
+        db.query(Duty.version)
+        .filter(Duty.user_id == user_id, Duty.date == day, Duty.duty_name == duty_name)
+        .scalar()
+    )
@@ -0,0 +1,276 @@
+"""
+Prometheus metrics for the API, served as text from /metrics.
+
+MetricsMiddleware records per-route latency, in-flight requests and, via
+SQLAlchemy engine events, the number and duration of SQL statements each
+request ran. Caches and the bcrypt pool are read at scrape time by
+collectors registered on the same registry, so they cost nothing per
+request. Routes are labelled by their template (/profile/{username}/), and
+unmatched paths share one label, to keep label cardinality bounded.
+"""
+
+import contextvars
+import threading
+import time
+from typing import Callable, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, labels: tuple, value: float) -> None:
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                # per-bucket counts, then sum
+                entry = self._values[labels] = [[0] * len(self.buckets), 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+
+    def render(self) -> list:
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        lines = self.header()
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_number(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrics plus collectors, which return extra lines at scrape time."""
+
+    def __init__(self):
+        self.metrics: list = []
+        self.collectors: list = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, fn: Callable[[], Iterable[str]]) -> None:
+        self.collectors.append(fn)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            lines.extend(collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.register(Histogram(
+    "http_request_duration_seconds", "Request latency by route and status.",
+    ("method", "route", "status"),
+))
+IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "Requests being handled right now.", ("method", "route"),
+))
+REQUEST_STATEMENTS = registry.register(Histogram(
+    "http_request_db_statements", "SQL statements run while handling one request.",
+    ("method", "route"), STATEMENT_BUCKETS,
+))
+REQUEST_DB_SECONDS = registry.register(Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements while handling one request.",
+    ("method", "route"),
+))
+STATEMENTS = registry.register(Counter(
+    "db_statements_total", "SQL statements executed, including background work.", ("engine",),
+))
+STATEMENT_SECONDS = registry.register(Counter(
+    "db_statement_seconds_total", "Time spent executing SQL statements.", ("engine",),
+))
+
+
+class _RequestStats:
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+# Shared by reference with threadpool workers, which run in a copy of the context
+_current: contextvars.ContextVar = contextvars.ContextVar("metrics_request", default=None)
+
+
+def instrument_engine(engine: Engine, label: str) -> None:
+    """Count statements and their time on `engine`, globally and for the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_started
+        STATEMENTS.inc((label,))
+        STATEMENT_SECONDS.inc((label,), elapsed)
+        stats = _current.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.seconds += elapsed
+
+
+def cache_collector(caches: dict) -> Callable[[], list]:
+    """Collector for LRUCache.stats() of each {name: cache}."""
+
+    def collect() -> list:
+        snapshot = {name: cache.stats() for name, cache in caches.items()}
+        lines = []
+        for metric, key, kind, documentation in (
+            ("cache_hits_total", "hits", "counter", "Cache lookups that found an entry."),
+            ("cache_misses_total", "misses", "counter", "Cache lookups that found nothing."),
+            ("cache_evictions_total", "evictions", "counter", "Entries evicted to stay within budget."),
+            ("cache_entries", "entries", "gauge", "Entries currently cached."),
+            ("cache_bytes", "bytes", "gauge", "Approximate size of the cached entries."),
+            ("cache_max_bytes", "max_bytes", "gauge", "Size budget of the cache."),
+        ):
+            lines += [f"# HELP {metric} {documentation}", f"# TYPE {metric} {kind}"]
+            lines += [f'{metric}{{cache="{name}"}} {stats[key]}' for name, stats in snapshot.items()]
+        return lines
+
+    return collect
+
+
+def hash_pool_collector(pool) -> Callable[[], list]:
+    """Collector for auth.HashPool.stats()."""
+
+    def collect() -> list:
+        stats = pool.stats()
+        lines = []
+        for metric, key, kind, documentation in (
+            ("bcrypt_pool_queue_depth", "queue_depth", "gauge", "bcrypt jobs waiting for a worker."),
+            ("bcrypt_pool_in_flight", "in_flight", "gauge", "bcrypt jobs running."),
+            ("bcrypt_pool_workers", "workers", "gauge", "bcrypt worker threads."),
+            ("bcrypt_pool_submitted_total", "submitted", "counter", "bcrypt jobs accepted."),
+            ("bcrypt_pool_rejected_total", "rejected", "counter", "bcrypt jobs rejected with 503."),
+            ("bcrypt_pool_wait_seconds_total", "wait_seconds", "counter", "Time jobs spent queued."),
+            ("bcrypt_pool_busy_seconds_total", "busy_seconds", "counter", "Time workers spent hashing."),
+        ):
+            lines += [f"# HELP {metric} {documentation}", f"# TYPE {metric} {kind}", f"{metric} {stats[key]}"]
+        return lines
+
+    return collect
+
+
+def route_of(app, scope) -> str:
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match != Match.NONE:
+            return route.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming and background tasks are unaffected."""
+
+    def __init__(self, app, api):
+        self.app = app
+        # The FastAPI app whose route templates label the requests
+        self.api = api
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        route = route_of(self.api, scope)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = _RequestStats()
+        token = _current.set(stats)
+        IN_FLIGHT.inc((method, route))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec((method, route))
+            _current.reset(token)
+            REQUEST_SECONDS.observe((method, route, str(status)), elapsed)
+            REQUEST_STATEMENTS.observe((method, route), stats.statements)
+            REQUEST_DB_SECONDS.observe((method, route), stats.seconds)
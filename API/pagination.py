@@ -0,0 +1,68 @@
+"""
+Keyset (cursor) pagination.
+
+A cursor is the opaque, base64url-encoded sort key of the last row on a
+page, e.g. (ins_count, id). The next page is read with a row-value
+comparison "(key, id) < (:key, :id)" that an index on the same columns
+seeks to directly, so a deep page costs the same as the first one.
+"""
+
+import base64
+import json
+from typing import Callable, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(key: Sequence) -> str:
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, width: int) -> Optional[tuple]:
+    """Sort key stored in a cursor, or None for the first page. 400 if malformed."""
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    if (
+        not isinstance(key, list)
+        or len(key) != width
+        or not all(isinstance(v, (int, float, str)) for v in key)
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return tuple(key)
+
+
+def before(columns: Sequence, key: tuple):
+    """Filter for rows that come after `key` in descending `columns` order."""
+    if len(columns) == 1:
+        return columns[0] < key[0]
+    return tuple_(*columns) < tuple_(*key)
+
+
+def paginate(query, columns: Sequence, cursor: str, limit: int, key: Callable) -> tuple:
+    """
+    Order `query` by `columns` descending and return one page of it as
+    (rows, next_cursor). `key(row)` gives a row's sort key, matching
+    `columns`; next_cursor is None on the last page.
+    """
+    position = decode_cursor(cursor, len(columns))
+    if position is not None:
+        query = query.filter(before(columns, position))
+    rows = query.order_by(*[c.desc() for c in columns]).limit(limit + 1).all()
+    return page(rows, limit, key)
+
+
+def page(rows: list, limit: int, key: Callable) -> tuple:
+    """Trim a limit + 1 fetch to `limit` rows and build the next cursor."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
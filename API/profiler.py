@@ -0,0 +1,254 @@
+"""
+Opt-in sampling profiler for individual requests.
+
+With PROFILING=1, a request is profiled when it carries an
+"X-Profile: <ADMIN_TOKEN>" header, or at random with probability
+PROFILE_SAMPLE_RATE. While it runs, one background thread samples the
+event loop thread every PROFILE_INTERVAL_MS and keeps the frames below
+the profiler middleware, so concurrent requests do not leak into each
+other's profile. When the request is suspended (waiting on the bcrypt
+pool, a threadpool dependency, a lock) its awaiting coroutine chain is
+recorded instead, ending in "(waiting)", so the profile accounts for
+wall time, not only CPU.
+
+Samples are merged per route into PROFILE_DIR/<METHOD>_<route>.folded in
+the folded-stack format read by flamegraph.pl and speedscope, with
+request counts in index.json; /admin/profiles/ serves both to holders of
+ADMIN_TOKEN. Without the flag the middleware is not installed at all.
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+import auth
+import metrics
+
+PROFILING = os.environ.get("PROFILING", "").strip().lower() in ("1", "true", "yes", "on")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "db/profiles")
+
+HEADER = b"x-profile"
+INDEX = "index.json"
+WAITING = "(waiting)"
+
+logger = logging.getLogger("regime-maker.profiler")
+
+# Library paths shortened to their import path: fastapi/routing.py, inspect.py
+_LIBRARY = re.compile(r".*[/\\](?:site-packages|dist-packages|python3\.\d+)[/\\]")
+_API_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+
+def _label(code) -> str:
+    filename = _LIBRARY.sub("", code.co_filename)
+    if filename.startswith(_API_DIR):
+        filename = filename[len(_API_DIR):]
+    # co_qualname is 3.11+; older interpreters only have the bare name
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({filename}:{code.co_firstlineno})"
+
+
+def _running_stack(frame, anchor) -> Optional[list]:
+    """Labels from just below `anchor` down to `frame`, or None if `anchor` is not on the stack."""
+    labels = []
+    while frame is not None:
+        if frame is anchor:
+            labels.reverse()
+            return labels
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    return None
+
+
+def _suspended_stack(task, anchor) -> Optional[list]:
+    """Labels of the coroutines below `anchor` that `task` is awaiting through."""
+    if task is None or task.done():
+        return None
+    labels = []
+    found = False
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            break
+        if found:
+            labels.append(_label(frame.f_code))
+        elif frame is anchor:
+            found = True
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return labels + [WAITING] if found else None
+
+
+class _Session:
+    __slots__ = ("thread_id", "task", "anchor", "stacks")
+
+    def __init__(self, thread_id: int, task, anchor):
+        self.thread_id = thread_id
+        self.task = task
+        self.anchor = anchor
+        self.stacks = Counter()
+
+
+class Sampler:
+    """One daemon thread sampling every active session; it exits when none are left."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._sessions: set = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, session: _Session) -> None:
+        with self._lock:
+            self._sessions.add(session)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+
+    def stop(self, session: _Session) -> None:
+        with self._lock:
+            self._sessions.discard(session)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                sessions = list(self._sessions)
+                if not sessions:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            for session in sessions:
+                stack = _running_stack(frames.get(session.thread_id), session.anchor)
+                if stack is None:
+                    stack = _suspended_stack(session.task, session.anchor)
+                if stack:
+                    session.stacks[";".join(stack)] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+FILE_NAME = re.compile(r"^[A-Za-z0-9_]+\.folded$")
+
+
+def file_name(method: str, route: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", f"{method} {route}").strip("_") + ".folded"
+
+
+def _read_folded(path: str) -> Counter:
+    stacks = Counter()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if stack:
+                    stacks[stack] += int(count)
+    except FileNotFoundError:
+        pass
+    return stacks
+
+
+def read_index(directory: str) -> dict:
+    try:
+        with open(os.path.join(directory, INDEX), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+class Store:
+    """
+    Per-route folded stacks on disk, merged one request at a time.
+    add() does blocking file I/O; the middleware calls it from a worker thread.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def add(self, method: str, route: str, stacks: Counter, seconds: float) -> str:
+        name = file_name(method, route)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, name)
+            merged = _read_folded(path)
+            merged.update(stacks)
+            self._replace(path, "".join(f"{stack} {count}\n" for stack, count in merged.most_common()))
+
+            index = read_index(self.directory)
+            entry = index.setdefault(name, {"route": f"{method} {route}", "requests": 0, "samples": 0, "seconds": 0.0})
+            entry["requests"] += 1
+            entry["samples"] += sum(stacks.values())
+            entry["seconds"] = round(entry["seconds"] + seconds, 6)
+            entry["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            self._replace(os.path.join(self.directory, INDEX), json.dumps(index, indent=2))
+        return name
+
+    @staticmethod
+    def _replace(path: str, text: str) -> None:
+        # Readers of /admin/profiles/ never see a half-written file
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+
+class ProfilerMiddleware:
+    """Profiles the requests selected by header or sample rate; the rest pass straight through."""
+
+    def __init__(
+        self,
+        app,
+        api,
+        directory: str = None,
+        sample_rate: float = None,
+        interval_ms: float = None,
+        token: str = None,
+    ):
+        self.app = app
+        # The FastAPI app whose route templates name the profiles
+        self.api = api
+        self.store = Store(directory or PROFILE_DIR)
+        self.sample_rate = PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.sampler = Sampler((PROFILE_INTERVAL_MS if interval_ms is None else interval_ms) / 1000)
+        self.token = (auth.ADMIN_TOKEN if token is None else token).encode()
+
+    def _selected(self, scope) -> bool:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == HEADER:
+                    return hmac.compare_digest(value, self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        session = _Session(threading.get_ident(), task, sys._getframe())
+        self.sampler.start(session)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.sampler.stop(session)
+            route = metrics.route_of(self.api, scope)
+            # Read-merge-rewrite of the route file stays off the event loop
+            name = await asyncio.to_thread(self.store.add, scope["method"], route, session.stacks, elapsed)
+            logger.info(
+                "Profiled %s %s: %.1f ms, %d samples -> %s",
+                scope["method"], route, elapsed * 1000, sum(session.stacks.values()), name,
+            )
@@ -0,0 +1,82 @@
+"""
+Per-user profile summary cache for /profile/{username}/.
+
+Write paths call invalidate() for every user whose summary they change
+(follow, like, publish, notes, cycles, bio) after committing. Each
+invalidation bumps a per-user generation; a summary is only stored if the
+generation is still the one read before building it, so a request that
+raced with a write cannot cache the stale result. Entries also expire
+after PROFILE_CACHE_TTL_SECONDS to bound staleness across worker processes,
+which do not see each other's invalidations.
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from cache import LRUCache
+from responses import VIEW_FIELDS, dumps
+from data.notes import Note
+from data.users import User
+
+PROFILE_CACHE_TTL_SECONDS = float(os.environ.get("PROFILE_CACHE_TTL_SECONDS", "30"))
+
+profile_cache = LRUCache(int(os.environ.get("PROFILE_CACHE_MAX_BYTES", str(4 * 1024 * 1024))))
+
+_generations: dict = {}
+_lock = threading.Lock()
+
+
+def profile_stats(db: Session, username: str):
+    """User row, stored counters and notes count in one statement; None if no such user."""
+    notes_count = select(func.count(Note.id)).where(Note.user == User.username).scalar_subquery()
+    return (
+        db.query(
+            User.username,
+            User.bio,
+            User.cycles_count,
+            User.public_cycles_count,
+            User.followers_count,
+            User.following_count,
+            notes_count.label("notes_count"),
+        )
+        .filter(User.username == username)
+        .first()
+    )
+
+
+def generation(username: str) -> int:
+    with _lock:
+        return _generations.get(username, 0)
+
+
+def get(username: str, view: str = "full") -> Optional[dict]:
+    entry = profile_cache.get((username, view))
+    if entry is None:
+        return None
+    stored_at, summary = entry
+    if time.monotonic() - stored_at > PROFILE_CACHE_TTL_SECONDS:
+        profile_cache.pop((username, view))
+        return None
+    return summary
+
+
+def store(username: str, gen: int, summary: dict, view: str = "full") -> None:
+    """Cache a summary built after reading generation `gen`, unless it was invalidated since."""
+    size = len(dumps(summary))
+    with _lock:
+        if _generations.get(username, 0) != gen:
+            return
+        profile_cache.set((username, view), (time.monotonic(), summary), size)
+
+
+def invalidate(*usernames: str) -> None:
+    with _lock:
+        for username in usernames:
+            _generations[username] = _generations.get(username, 0) + 1
+            for view in VIEW_FIELDS:
+                profile_cache.pop((username, view))
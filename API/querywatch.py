@@ -0,0 +1,164 @@
+"""
+N+1 and slow-query detector for development and CI.
+
+With QUERY_WATCH=1, every request's SQL is traced: a request that runs
+more than QUERY_WATCH_MAX_STATEMENTS statements, or the same statement
+shape QUERY_WATCH_REPEAT times or more (a query in a loop), is logged
+with its shapes, and any statement slower than QUERY_WATCH_SLOW_MS is
+logged with SQLite's EXPLAIN QUERY PLAN so full-table scans stand out.
+Nothing is installed when the flag is off.
+
+Tests use max_queries() to pin a statement budget on an endpoint:
+
+    with querywatch.max_queries(2):
+        client.get(f"/profile/{name}/")
+"""
+
+import contextvars
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QUERY_WATCH = os.environ.get("QUERY_WATCH", "").strip().lower() in ("1", "true", "yes", "on")
+QUERY_WATCH_SLOW_MS = float(os.environ.get("QUERY_WATCH_SLOW_MS", "50"))
+QUERY_WATCH_REPEAT = int(os.environ.get("QUERY_WATCH_REPEAT", "5"))
+QUERY_WATCH_MAX_STATEMENTS = int(os.environ.get("QUERY_WATCH_MAX_STATEMENTS", "20"))
+
+logger = logging.getLogger("regime-maker.queries")
+
+_installed: set = set()
+_current: contextvars.ContextVar = contextvars.ContextVar("querywatch_trace", default=None)
+# Set by max_queries(); catches statements from any thread, tests run serially
+_global_trace: Optional["Trace"] = None
+
+
+def shape(statement: str) -> str:
+    """A statement with whitespace and expanded IN lists collapsed, so loops compare equal."""
+    statement = re.sub(r"\s+", " ", statement).strip()
+    return re.sub(r"\(\?(?:, \?)+\)", "(?...)", statement)
+
+
+class Trace:
+    def __init__(self, label: str):
+        self.label = label
+        self.statements: list = []  # (statement, seconds)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: int) -> list:
+        """(shape, times) for every shape run at least `threshold` times."""
+        counts = Counter(shape(statement) for statement, _ in self.statements)
+        return [(s, n) for s, n in counts.most_common() if n >= threshold]
+
+    def report(self) -> str:
+        counts = Counter(shape(statement) for statement, _ in self.statements)
+        return "\n".join(f"  {n}x {s}" for s, n in counts.most_common())
+
+
+def explain(conn, statement: str, parameters) -> list:
+    """SQLite's query plan lines for a statement, read on a raw cursor (no events)."""
+    if conn.dialect.name != "sqlite":
+        return []
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        return [row[-1] for row in cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)]
+    except Exception as exc:
+        return [f"(no plan: {exc})"]
+    finally:
+        cursor.close()
+
+
+def _full_scans(plan: list) -> list:
+    return [line for line in plan if line.startswith("SCAN ") and " INDEX " not in line]
+
+
+def install(engine: Engine) -> None:
+    """Trace statements on `engine` (idempotent)."""
+    if engine in _installed:
+        return
+    _installed.add(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._querywatch_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        trace = _current.get() or _global_trace
+        if trace is None:
+            return
+        elapsed = time.perf_counter() - context._querywatch_started
+        trace.statements.append((statement, elapsed))
+        if elapsed * 1000 >= QUERY_WATCH_SLOW_MS and not executemany:
+            plan = explain(conn, statement, parameters)
+            scans = _full_scans(plan)
+            logger.warning(
+                "Slow query (%.1f ms) in %s%s:\n  %s\n  plan: %s",
+                elapsed * 1000, trace.label,
+                f" with full scan ({'; '.join(scans)})" if scans else "",
+                shape(statement), " | ".join(plan),
+            )
+
+
+def check(trace: Trace) -> None:
+    """Log a request that ran too many statements or repeated one shape."""
+    repeated = trace.repeated(QUERY_WATCH_REPEAT)
+    if repeated:
+        logger.warning(
+            "Possible N+1 in %s: %s",
+            trace.label, "; ".join(f"{n}x {s}" for s, n in repeated),
+        )
+    if trace.count > QUERY_WATCH_MAX_STATEMENTS:
+        logger.warning("%s ran %d statements:\n%s", trace.label, trace.count, trace.report())
+
+
+class QueryWatchMiddleware:
+    """Traces each HTTP request's statements and checks them when it ends."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace = Trace(f"{scope['method']} {scope['path']}")
+        token = _current.set(trace)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            check(trace)
+
+
+@contextmanager
+def max_queries(limit: int, repeat: Optional[int] = None, engines: tuple = ()):
+    """
+    Fail with AssertionError if the block runs more than `limit` statements,
+    or (with `repeat`) any statement shape `repeat` times or more. Watches
+    db_session's engines unless others are given.
+    """
+    global _global_trace
+    if not engines:
+        from data import db_session
+        engines = (db_session.engine, db_session.read_engine)
+    for engine in engines:
+        install(engine)
+    trace = _global_trace = Trace("max_queries")
+    try:
+        yield trace
+    finally:
+        _global_trace = None
+    assert trace.count <= limit, f"{trace.count} statements, budget {limit}:\n{trace.report()}"
+    if repeat is not None:
+        repeated = trace.repeated(repeat)
+        assert not repeated, f"repeated statements:\n{trace.report()}"
@@ -0,0 +1,25 @@
+"""
+Recompute the denormalized social counters from the source tables.
+
+Usage: python repair_counters.py [path/to/db.db]
+(DATABASE_URL, when set, takes precedence over the path.)
+"""
+
+import sys
+
+from data.db_session import create_session, global_init
+from counters import repair
+
+
+def main():
+    global_init(sys.argv[1] if len(sys.argv) > 1 else "db/db.db")
+    db = create_session()
+    try:
+        fixed = repair(db)
+    finally:
+        db.close()
+    print(f"Repaired counters: {fixed['users']} users, {fixed['cycles']} cycles.")
+
+
+if __name__ == "__main__":
+    main()
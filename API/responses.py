@@ -0,0 +1,76 @@
+"""
+orjson-backed responses and pre-serialized cycle bodies.
+
+ORJSONResponse is the app's default response class. List endpoints build
+their payload with body_fragments() and return ORJSONResponse directly:
+a cycle body is immutable for a given hash, so its descriptions and data
+are serialized once per field and spliced into every later response as an
+orjson.Fragment instead of being walked and encoded again. Cycle rows do
+not load their body themselves (Cycle.body is lazy), so summary views that
+skip data never read it from the database. The response models in
+schemas.py document those payloads.
+"""
+
+import os
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session, load_only
+
+from cache import LRUCache
+from data.cycle_bodies import CycleBody
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Columns of a cycle body that can be requested, and those each view returns
+BODY_FIELDS = ("descriptions", "data")
+VIEW_FIELDS = {"full": BODY_FIELDS, "summary": ("descriptions",)}
+EMPTY = {"descriptions": [], "data": {}}
+EMPTY_FRAGMENTS = {"descriptions": orjson.Fragment(b"[]"), "data": orjson.Fragment(b"{}")}
+
+body_cache = LRUCache(int(os.environ.get("BODY_CACHE_MAX_BYTES", str(16 * 1024 * 1024))))
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def body_fragments(db: Session, cycles: list, fields: tuple = BODY_FIELDS) -> dict:
+    """
+    {body_hash: {field: Fragment}} for the bodies of `cycles`. Cached
+    fragments are reused; bodies with any requested field missing from the
+    cache are read in one query that loads only the requested columns.
+    """
+    result = {}
+    missing = set()
+    for cycle in cycles:
+        key = cycle.body_hash
+        if key is None or key in result or key in missing:
+            continue
+        fragments = {field: body_cache.get((key, field)) for field in fields}
+        if None in fragments.values():
+            missing.add(key)
+        else:
+            result[key] = fragments
+    if missing:
+        columns = [getattr(CycleBody, field) for field in fields]
+        for body in (
+            db.query(CycleBody)
+            .options(load_only(*columns))
+            .filter(CycleBody.hash.in_(missing))
+        ):
+            fragments = {}
+            for field in fields:
+                raw = dumps(getattr(body, field) or EMPTY[field])
+                fragments[field] = orjson.Fragment(raw)
+                body_cache.set((body.hash, field), fragments[field], len(raw))
+            result[body.hash] = fragments
+    return result
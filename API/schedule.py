@@ -0,0 +1,84 @@
+import datetime
+from typing import Iterable, Optional
+
+import numpy as np
+
+REST_DESCRIPTION = "Нет упражнений"
+# Longest range workout_counts is asked to project: two years plus a leap day
+MAX_RANGE_DAYS = 732
+
+
+class CycleSchedule:
+    """
+    A cycle reduced to what the calendar needs: the start date as an
+    ordinal, the period (days_count + pause) and the day descriptions.
+    The description for any date is descriptions[(ordinal - start) % period]
+    when that index falls inside the list; pause days fall outside it.
+    """
+
+    __slots__ = ("start", "period", "descriptions", "workout_mask")
+
+    def __init__(self, start: int, period: int, descriptions: list):
+        self.start = start
+        self.period = period
+        self.descriptions = descriptions
+        # True for cycle days that count as a workout on the calendar heatmap
+        self.workout_mask = np.zeros(period, dtype=np.int32)
+        for i, desc in enumerate(descriptions[:period]):
+            if desc and desc != REST_DESCRIPTION:
+                self.workout_mask[i] = 1
+
+    @classmethod
+    def from_cycle(cls, cycle) -> Optional["CycleSchedule"]:
+        """Parse a Cycle row once; None if it cannot be scheduled."""
+        try:
+            start = datetime.datetime.strptime(cycle.start_at, "%Y-%m-%d").date()
+        except (ValueError, TypeError):
+            return None
+        period = (cycle.days_count or 0) + (cycle.pause or 0)
+        if period <= 0:
+            return None
+        return cls(start.toordinal(), period, list(cycle.descriptions or []))
+
+    def description_on(self, ordinal: int) -> Optional[str]:
+        index = (ordinal - self.start) % self.period
+        if index < len(self.descriptions):
+            return self.descriptions[index]
+        return None
+
+
+def compile_cycles(cycles: Iterable) -> list:
+    """Compile Cycle rows into schedules, skipping ones with bad dates or periods."""
+    schedules = []
+    for cycle in cycles:
+        schedule = CycleSchedule.from_cycle(cycle)
+        if schedule is not None:
+            schedules.append(schedule)
+    return schedules
+
+
+def duties_on(schedules: list, date: datetime.date) -> dict:
+    """Duty names due on a date, each mapped to 0 (not done)."""
+    ordinal = date.toordinal()
+    duties = {}
+    for schedule in schedules:
+        desc = schedule.description_on(ordinal)
+        if desc is not None:
+            duties[desc] = 0
+    return duties
+
+
+def workout_counts(schedules: list, start: datetime.date, end: datetime.date) -> dict:
+    """
+    Number of workouts due on every date in [start, end], keyed by ISO date.
+    Each cycle is projected over the whole range at once with modular
+    arithmetic instead of per-day date parsing.
+    """
+    ordinals = np.arange(start.toordinal(), end.toordinal() + 1)
+    counts = np.zeros(len(ordinals), dtype=np.int32)
+    for schedule in schedules:
+        counts += schedule.workout_mask[(ordinals - schedule.start) % schedule.period]
+    return {
+        datetime.date.fromordinal(o).isoformat(): c
+        for o, c in zip(ordinals.tolist(), counts.tolist())
+    }
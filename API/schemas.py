@@ -1,5 +1,16 @@
+from typing import Literal, Optional
+
 from pydantic import BaseModel, field_validator
 
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+# Request bodies still accept the password for clients that have not moved to
+# session tokens yet; with an "Authorization: Bearer" header it can be omitted.
+
+# How much of each cycle list endpoints return: "summary" leaves out the
+# exercise data, which cards do not show and which is never read for it.
+CycleView = Literal["full", "summary"]
+
 
 class UserAuth(BaseModel):
     """Schema for user login (username + password)."""
@@ -35,7 +46,7 @@ class CycleCreate(BaseModel):
     pause: int = 0
     descriptions: list
     data_cycle: dict
-    password: str
+    password: str = ""
     start_at: str
 
     @field_validator("pause")
@@ -51,14 +62,15 @@ class CycleDelete(BaseModel):
 
     cycle_name: str
     user: str
-    password: str
+    password: str = ""
 
 
 class UserCyclesRequest(BaseModel):
     """Schema for fetching user's training cycles."""
 
     user: str
-    password: str
+    password: str = ""
+    view: CycleView = "full"
 
 
 class DayRequest(BaseModel):
@@ -66,7 +78,7 @@ class DayRequest(BaseModel):
 
     user: str
     day: str
-    password: str
+    password: str = ""
 
 
 class NoteCreate(BaseModel):
@@ -75,7 +87,7 @@ class NoteCreate(BaseModel):
     name: str = ""
     user: str
     descriptions: str
-    password: str
+    password: str = ""
 
 
 class NoteDelete(BaseModel):
@@ -83,23 +95,32 @@ class NoteDelete(BaseModel):
 
     note_name: str
     user: str
-    password: str
+    password: str = ""
 
 
 class NotesRequest(BaseModel):
     """Schema for fetching user's notes."""
 
     user: str
-    password: str
+    password: str = ""
 
 
 class DutyRequest(BaseModel):
-    """Schema for toggling a duty completion."""
+    """Schema for toggling a duty completion (or setting it with `done`)."""
 
     selected_date: str
     duty_name: str
     user: str
-    password: str
+    password: str = ""
+    done: Optional[int] = None
+    version: Optional[int] = None
+
+    @field_validator("done")
+    @classmethod
+    def done_is_flag(cls, v: Optional[int]) -> Optional[int]:
+        if v not in (None, 0, 1):
+            raise ValueError("done must be 0 or 1.")
+        return v
 
 
 class AnalyticsRequest(BaseModel):
@@ -107,18 +128,32 @@ class AnalyticsRequest(BaseModel):
 
     cycle_name: str
     user: str
-    password: str
+    password: str = ""
 
 
 # ======================== Social ========================
 
 
+class PageRequest(BaseModel):
+    """Keyset pagination fields: the next_cursor of the previous page and a page size."""
+
+    cursor: str = ""
+    limit: int = DEFAULT_PAGE_SIZE
+
+    @field_validator("limit")
+    @classmethod
+    def limit_in_range(cls, v: int) -> int:
+        if not 1 <= v <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}.")
+        return v
+
+
 class PublishCycleRequest(BaseModel):
     """Schema for publishing/unpublishing a cycle."""
 
     cycle_name: str
     user: str
-    password: str
+    password: str = ""
 
 
 class FollowRequest(BaseModel):
@@ -126,7 +161,7 @@ class FollowRequest(BaseModel):
 
     target_user: str
     user: str
-    password: str
+    password: str = ""
 
 
 class LikeCycleRequest(BaseModel):
@@ -134,7 +169,7 @@ class LikeCycleRequest(BaseModel):
 
     cycle_id: int
     user: str
-    password: str
+    password: str = ""
 
 
 class UpdateProfileRequest(BaseModel):
@@ -142,22 +177,24 @@ class UpdateProfileRequest(BaseModel):
 
     bio: str = ""
     user: str
-    password: str
+    password: str = ""
 
 
-class FeedRequest(BaseModel):
+class FeedRequest(PageRequest):
     """Schema for fetching the social feed."""
 
     user: str
-    password: str
+    password: str = ""
+    view: CycleView = "full"
 
 
-class SearchRequest(BaseModel):
+class SearchRequest(PageRequest):
     """Schema for searching public cycles (auth optional)."""
 
     query: str = ""
     user: str = ""
     password: str = ""
+    view: CycleView = "full"
 
 
 class MonthRequest(BaseModel):
@@ -166,7 +203,16 @@ class MonthRequest(BaseModel):
     year: int
     month: int
     user: str
-    password: str
+    password: str = ""
+
+
+class RangeRequest(BaseModel):
+    """Schema for fetching duty counts over a date range."""
+
+    start: str
+    end: str
+    user: str
+    password: str = ""
 
 
 class CloneCycleRequest(BaseModel):
@@ -174,17 +220,33 @@ class CloneCycleRequest(BaseModel):
 
     cycle_id: int
     user: str
-    password: str
+    password: str = ""
     start_at: str
 
 
+class BulkCloneRequest(BaseModel):
+    """Schema for cloning several public cycles at once."""
+
+    cycle_ids: list[int]
+    user: str
+    password: str = ""
+    start_at: str
+
+    @field_validator("cycle_ids")
+    @classmethod
+    def ids_in_range(cls, v: list[int]) -> list[int]:
+        if not 1 <= len(v) <= MAX_PAGE_SIZE:
+            raise ValueError(f"cycle_ids must contain 1 to {MAX_PAGE_SIZE} ids.")
+        return list(dict.fromkeys(v))
+
+
 class AnalyticsPublicRequest(BaseModel):
     """Schema for analyzing any user's cycle."""
 
     cycle_name: str
     target_user: str
     user: str
-    password: str
+    password: str = ""
 
 
 class CommentCreate(BaseModel):
@@ -194,7 +256,7 @@ class CommentCreate(BaseModel):
     target_id: int
     text: str
     user: str
-    password: str
+    password: str = ""
 
     @field_validator("text")
     @classmethod
@@ -209,17 +271,144 @@ class CommentDelete(BaseModel):
 
     comment_id: int
     user: str
-    password: str
+    password: str = ""
 
 
-class CommentsRequest(BaseModel):
+class CommentsRequest(PageRequest):
     """Schema for fetching comments."""
 
     target_type: str
     target_id: int
+    limit: int = MAX_PAGE_SIZE
 
 
-class InUsersRequest(BaseModel):
+class InUsersRequest(PageRequest):
     """Schema for fetching users who IN'd a cycle."""
 
     cycle_id: int
+    limit: int = MAX_PAGE_SIZE
+
+
+# ======================== Responses ========================
+
+
+class AuthorOut(BaseModel):
+    username: str
+    bio: str = ""
+    followers_count: int = 0
+
+
+class CycleOut(BaseModel):
+    """A public cycle as shown in feeds, search, trending and profiles (no data in the summary view)."""
+
+    id: int
+    name: str
+    user: str
+    days_count: Optional[int] = None
+    pause: Optional[int] = None
+    descriptions: list = []
+    data: dict = {}
+    start_at: Optional[str] = None
+    is_public: bool
+    original_author: str = ""
+    ins_count: int = 0
+    is_in: bool = False
+    author: AuthorOut
+
+
+class OwnCycleOut(BaseModel):
+    """One of the authenticated user's own cycles (no data in the summary view)."""
+
+    id: int
+    name: str
+    user: str
+    days_count: Optional[int] = None
+    pause: Optional[int] = None
+    descriptions: list = []
+    data: dict = {}
+    start_at: Optional[str] = None
+    is_public: int = 0
+    original_author: Optional[str] = ""
+    ins_count: int = 0
+
+
+class CyclePage(BaseModel):
+    cycles: list[CycleOut]
+    next_cursor: Optional[str] = None
+
+
+class FeedResponse(CyclePage):
+    verdict: str
+
+
+class UserCyclesResponse(BaseModel):
+    verdict: str
+    cycles: list[OwnCycleOut]
+
+
+class ProfileResponse(BaseModel):
+    username: str
+    bio: str
+    cycles_count: int
+    public_cycles_count: int
+    followers_count: int
+    following_count: int
+    notes_count: int
+    total_ins: int
+    public_cycles: list[CycleOut]
+
+
+class FollowersResponse(BaseModel):
+    username: str
+    followers: list[str]
+    count: int
+    next_cursor: Optional[str] = None
+    is_following: Optional[bool] = None
+
+
+class FollowingResponse(BaseModel):
+    username: str
+    following: list[str]
+    count: int
+    next_cursor: Optional[str] = None
+
+
+class CommentOut(BaseModel):
+    id: int
+    user: str
+    text: str
+    created_at: str
+
+
+class CommentsResponse(BaseModel):
+    comments: list[CommentOut]
+    next_cursor: Optional[str] = None
+
+
+class InUsersResponse(BaseModel):
+    users: list[str]
+    next_cursor: Optional[str] = None
+
+
+class NoteOut(BaseModel):
+    id: int
+    name: str
+    user: str
+    descriptions: Optional[str] = None
+    created_at: str
+
+
+class NotesResponse(BaseModel):
+    verdict: str
+    notes: list[NoteOut]
+
+
+class UserSearchOut(BaseModel):
+    username: str
+    bio: str
+    cycles_count: int
+    followers_count: int
+
+
+class UsersResponse(BaseModel):
+    users: list[UserSearchOut]
@@ -0,0 +1,156 @@
+"""
+Full-text search over public cycles and users (SQLite FTS5).
+
+cycles_fts has one row per public cycle (rowid = cycles.id) with its name,
+day descriptions and the names of the exercises in cycle.data; users_fts
+has username and bio (rowid = users.id). Both carry prefix indexes so
+"подт" finds "Подтягивания" without a table scan. Rows are written in the
+same transactions that publish, unpublish and delete cycles and create or
+update users: exercise names come from the catalog, which a trigger
+cannot see.
+
+Matches are ranked by bm25 scaled by a saturating popularity boost,
+bm25 * (1 + n / (n + POPULARITY_HALF)) where n is ins_count (followers for
+users); bm25 is negative, so popularity can at most double a score. When
+the tables do not exist (FTS5 missing, or not SQLite) callers fall back to
+ILIKE.
+"""
+
+import re
+from typing import Optional
+
+from sqlalchemy import column, inspect, literal_column, table, text
+from sqlalchemy.orm import Session, joinedload
+
+from catalog import ExerciseCatalog
+from data.cycles import Cycle
+from data.users import User
+from pagination import paginate
+
+POPULARITY_HALF = 10.0
+
+# bm25 column weights: a hit in the name outranks descriptions and exercises
+CYCLE_RANK = "bm25(cycles_fts, 10.0, 2.0, 1.0)"
+USER_RANK = "bm25(users_fts, 5.0, 1.0)"
+
+_cycles_fts = table("cycles_fts", column("rowid"))
+_users_fts = table("users_fts", column("rowid"))
+
+_available: dict = {}
+
+
+def available(db: Session) -> bool:
+    """Whether the FTS tables exist on this session's database (checked once per engine)."""
+    bind = db.get_bind()
+    if bind not in _available:
+        _available[bind] = inspect(bind).has_table("cycles_fts")
+    return _available[bind]
+
+
+def match_query(q: str) -> Optional[str]:
+    """FTS5 query matching every word of q as a prefix; None if q has no words."""
+    words = re.findall(r"\w+", q.lower())
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def exercise_names(data: dict, cat: ExerciseCatalog) -> str:
+    """Distinct names of the catalog exercises used anywhere in a cycle's data."""
+    names = {}
+    for day in (data or {}).values():
+        for item in day if isinstance(day, list) else []:
+            try:
+                ex = cat.by_id.get(int(item.get("id")))
+            except (AttributeError, TypeError, ValueError):
+                continue
+            if ex and ex.get("name"):
+                names[ex["name"]] = None
+    return " ".join(names)
+
+
+def index_cycle(db: Session, cycle: Cycle, cat: ExerciseCatalog) -> None:
+    if not available(db):
+        return
+    unindex_cycle(db, cycle.id)
+    db.execute(
+        text(
+            "INSERT INTO cycles_fts (rowid, name, descriptions, exercises) "
+            "VALUES (:id, :name, :descriptions, :exercises)"
+        ),
+        {
+            "id": cycle.id,
+            "name": cycle.name,
+            "descriptions": " ".join(d for d in cycle.descriptions or [] if isinstance(d, str)),
+            "exercises": exercise_names(cycle.data, cat),
+        },
+    )
+
+
+def unindex_cycle(db: Session, cycle_id: int) -> None:
+    if available(db):
+        db.execute(text("DELETE FROM cycles_fts WHERE rowid = :id"), {"id": cycle_id})
+
+
+def index_user(db: Session, user: User) -> None:
+    """(Re)index a user; the row must be flushed so user.id is set."""
+    if not available(db):
+        return
+    db.execute(text("DELETE FROM users_fts WHERE rowid = :id"), {"id": user.id})
+    db.execute(
+        text("INSERT INTO users_fts (rowid, username, bio) VALUES (:id, :username, :bio)"),
+        {"id": user.id, "username": user.username, "bio": user.bio or ""},
+    )
+
+
+def ensure_built(db: Session, cat: ExerciseCatalog) -> None:
+    """Fill empty FTS tables from existing rows (first boot after the migration)."""
+    if not available(db):
+        return
+    if (
+        db.execute(text("SELECT 1 FROM cycles_fts LIMIT 1")).first() is None
+        and db.query(Cycle.id).filter(Cycle.is_public == 1).first() is not None
+    ):
+        public = db.query(Cycle).filter(Cycle.is_public == 1).options(joinedload(Cycle.body))
+        for cycle in public.yield_per(500):
+            index_cycle(db, cycle, cat)
+    if (
+        db.execute(text("SELECT 1 FROM users_fts LIMIT 1")).first() is None
+        and db.query(User.id).first() is not None
+    ):
+        db.execute(text(
+            "INSERT INTO users_fts (rowid, username, bio) "
+            "SELECT id, username, COALESCE(bio, '') FROM users"
+        ))
+    db.commit()
+
+
+def _boosted(rank: str, popularity):
+    """Positive relevance, higher is better."""
+    return -literal_column(rank) * (1.0 + popularity / (popularity + POPULARITY_HALF))
+
+
+def search_cycles(db: Session, match: str, cursor: str, limit: int) -> tuple:
+    """One page of public cycles matching an FTS query, best first: (cycles, next_cursor)."""
+    relevance = _boosted(CYCLE_RANK, Cycle.ins_count)
+    rows, next_cursor = paginate(
+        db.query(Cycle, relevance.label("relevance"))
+        .join(_cycles_fts, _cycles_fts.c.rowid == Cycle.id)
+        .filter(literal_column("cycles_fts").op("MATCH")(match), Cycle.is_public == 1),
+        [relevance, Cycle.id], cursor, limit,
+        key=lambda row: (row.relevance, row.Cycle.id),
+    )
+    return [row.Cycle for row in rows], next_cursor
+
+
+def search_users(db: Session, match: str, limit: int) -> list:
+    """Best-matching users for an FTS query."""
+    relevance = _boosted(USER_RANK, User.followers_count)
+    return (
+        db.query(User)
+        .join(_users_fts, _users_fts.c.rowid == User.id)
+        .filter(literal_column("users_fts").op("MATCH")(match))
+        .order_by(relevance.desc(), User.id.desc())
+        .limit(limit)
+        .all()
+    )
@@ -4,6 +4,7 @@ from data.db_session import create_session, global_init
 from data.users import User
 from data.cycles import Cycle
 from data.notes import Note
+from data.duties import Duty
 
 global_init("db/db.db")
 
@@ -13,7 +14,8 @@ def show_all():
     try:
         print("=== Users ===")
         for user in db.query(User).all():
-            print(f"  id={user.id}  username={user.username}  days_count={len(user.days) if user.days else 0}")
+            days_count = db.query(Duty.date).filter(Duty.user_id == user.id).distinct().count()
+            print(f"  id={user.id}  username={user.username}  days_count={days_count}")
 
         print("\n=== Cycles ===")
         for cycle in db.query(Cycle).all():
@@ -0,0 +1,70 @@
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+# Manual scripts that expect a server running on 127.0.0.1:8001
+collect_ignore = ["test_analitic.py", "test_duty.py"]
+
+from data import db_session  # noqa: E402
+
+# Point the app at a throwaway database before web.py initialises db/db.db
+db_session.global_init(os.path.join(tempfile.mkdtemp(), "test.db"))
+
+import web  # noqa: E402
+from data.cycles import Cycle  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(web.app) as c:
+        yield c
+
+
+@pytest.fixture
+def make_user(client):
+    """Register a fresh user and return its credentials dict."""
+
+    def _make_user(password: str = "pass1234") -> dict:
+        username = f"user_{uuid.uuid4().hex[:8]}"
+        response = client.post("/sign_up/", json={"username": username, "password": password})
+        assert response.status_code == 200, response.text
+        return {"user": username, "password": password}
+
+    return _make_user
+
+
+@pytest.fixture
+def make_cycle(client):
+    """Create a private cycle for `creds` and return its name."""
+
+    def _make_cycle(creds: dict, name: str = "cycle", descriptions: list = None, data: dict = None) -> str:
+        descriptions = descriptions or ["x"]
+        response = client.post("/create_cycle/", json={
+            **creds, "name": name, "days_count": len(descriptions), "descriptions": descriptions,
+            "data_cycle": data or {}, "start_at": "2025-01-01",
+        })
+        assert response.status_code == 200, response.text
+        return name
+
+    return _make_cycle
+
+
+@pytest.fixture
+def publish_cycle(client, make_cycle):
+    """Create and publish a cycle for `creds` and return its id."""
+
+    def _publish_cycle(creds: dict, name: str = "cycle", **cycle) -> int:
+        make_cycle(creds, name, **cycle)
+        response = client.post("/publish_cycle/", json={**creds, "cycle_name": name})
+        assert response.status_code == 200, response.text
+        with db_session.create_session() as db:
+            return db.query(Cycle.id).filter(Cycle.user == creds["user"], Cycle.name == name).scalar()
+
+    return _publish_cycle
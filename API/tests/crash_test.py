@@ -1,57 +1,118 @@
-import requests
+"""Concurrent /duty/ toggles must not lose updates."""
+
+import asyncio
 import concurrent.futures
-import time
+import datetime
+
+from data import db_session
+from data.users import User
+from duties import set_duty, load_day
+
+DAY = "2025-12-04"
+
+
+def _user_with_duty(client, make_user) -> dict:
+    creds = make_user()
+    response = client.post("/create_cycle/", json={
+        **creds,
+        "name": "Ronnie Coleman",
+        "days_count": 1,
+        "pause": 0,
+        "descriptions": ["Ronnie Coleman"],
+        "data_cycle": {"Day 1": [{"id": 1, "sets": 3}]},
+        "start_at": "2025-01-01",
+    })
+    assert response.status_code == 200, response.text
+    response = client.post("/day/", json={**creds, "day": DAY})
+    assert response.json()["duties"] == {"Ronnie Coleman": 0}
+    return creds
+
+
+def _toggle(client, creds):
+    return client.post("/duty/", json={
+        **creds, "selected_date": DAY, "duty_name": "Ronnie Coleman",
+    })
+
+
+def _state(client, creds) -> int:
+    return client.post("/day/", json={**creds, "day": DAY}).json()["duties"]["Ronnie Coleman"]
+
+
+def test_concurrent_http_toggles(client, make_user):
+    creds = _user_with_duty(client, make_user)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+        responses = list(executor.map(lambda _: _toggle(client, creds), range(11)))
+    assert [r.status_code for r in responses] == [200] * 11
+    assert sorted(r.json()["version"] for r in responses) == list(range(1, 12))
+    assert _state(client, creds) == 1
+
+
+def test_concurrent_sessions_toggle(client, make_user):
+    creds = _user_with_duty(client, make_user)
+    setup = db_session.create_session()
+    user_id = setup.query(User.id).filter(User.username == creds["user"]).scalar()
+    setup.close()
 
+    def toggle(_):
+        db = db_session.create_session()
+        try:
+            return db_session.retry_on_busy(
+                db, lambda: set_duty(db, user_id, DAY, "Ronnie Coleman")
+            )
+        finally:
+            db.close()
 
-def test_single_request(i):
-    """Функция для одного запроса"""
-    params = {
-        "user": "Tima",
-        "password": "bacuk22q",
-        "selected_date": "2025-12-04",
-        "duty_name": "Ronnie Coleman"
-    }
+    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(toggle, range(50)))
+    assert sorted(version for _, version in results) == list(range(1, 51))
 
-    start = time.time()
-    try:
-        r = requests.post("http://127.0.0.1:8001/duty/", json=params, timeout=5)
-        elapsed = (time.time() - start) * 1000
+    db = db_session.create_session()
+    assert load_day(db, user_id, DAY) == {"Ronnie Coleman": 0}
+    db.close()
 
-        if r.status_code == 200:
-            return f"✓ {i}: {r.status_code} за {elapsed:.0f}ms"
-        else:
-            return f"✗ {i}: {r.status_code} за {elapsed:.0f}ms - {r.text[:50]}"
 
-    except Exception as e:
-        elapsed = (time.time() - start) * 1000
-        return f"💥 {i}: УПАЛ за {elapsed:.0f}ms - {str(e)[:50]}"
+def test_set_state_is_idempotent(client, make_user):
+    creds = _user_with_duty(client, make_user)
+    payload = {**creds, "selected_date": DAY, "duty_name": "Ronnie Coleman", "done": 1}
+    first = client.post("/duty/", json=payload).json()
+    second = client.post("/duty/", json=payload).json()
+    assert (first["done"], first["version"]) == (1, 1)
+    assert (second["done"], second["version"]) == (1, 1)
+    assert second["duties"] == {DAY: {"Ronnie Coleman": 1}}
 
 
-print("🚀 ТЕСТ ПАРАЛЛЕЛЬНЫХ ЗАПРОСОВ К /duty/")
-print("=" * 60)
+def test_stale_version_is_rejected(client, make_user):
+    creds = _user_with_duty(client, make_user)
+    assert _toggle(client, creds).json()["version"] == 1
+    response = client.post("/duty/", json={
+        **creds, "selected_date": DAY, "duty_name": "Ronnie Coleman", "version": 0,
+    })
+    assert response.status_code == 409
+    assert _state(client, creds) == 1
 
-# Тест 1: 10 запросов одновременно
-print("\n1. 10 запросов одновременно (имитация 10 быстрых кликов):")
-with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-    futures = [executor.submit(test_single_request, i) for i in range(10)]
-    for future in concurrent.futures.as_completed(futures):
-        print(future.result())
 
-time.sleep(1)  # Даем отдохнуть
+def test_unknown_duty_is_404(client, make_user):
+    creds = _user_with_duty(client, make_user)
+    response = client.post("/duty/", json={
+        **creds, "selected_date": str(datetime.date(2030, 1, 1)), "duty_name": "Ronnie Coleman",
+    })
+    assert response.status_code == 404
 
-# Тест 2: 5 потоков, но много запросов
-print("\n2. 50 запросов через 5 потоков:")
-with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-    futures = [executor.submit(test_single_request, i) for i in range(50)]
 
-    completed = 0
-    for future in concurrent.futures.as_completed(futures):
-        print(future.result())
-        completed += 1
+def test_duty_writes_run_off_the_event_loop(client, make_user, monkeypatch):
+    creds = _user_with_duty(client, make_user)
+    on_loop = []
+    retry_on_busy = db_session.retry_on_busy
 
-        # Прогресс-бар
-        if completed % 10 == 0:
-            print(f"   ... обработано {completed}/50")
+    def recording(db, fn, *args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return retry_on_busy(db, fn, *args, **kwargs)
 
-print("\n" + "=" * 60)
-print("🎯 ТЕСТ ЗАВЕРШЕН")
\ No newline at end of file
+    monkeypatch.setattr(db_session, "retry_on_busy", recording)
+    assert _toggle(client, creds).status_code == 200
+    assert _state(client, creds) == 1
+    assert on_loop == [False, False]
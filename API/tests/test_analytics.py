@@ -0,0 +1,93 @@
+"""Muscle-load analytics keep the per-term rounding of the original loop."""
+
+import random
+import time
+
+import pytest
+
+import analytics
+import web
+
+# Rounded once at the end instead, front_delts comes out at 40.0% and drops to "underloaded"
+PROGRAM = {
+    "0": [{"id": 17, "sets": 5}, {"id": 21, "sets": 4}],
+    "1": [{"id": 21, "sets": 1}],
+    "2": [{"id": 21, "sets": 1}],
+}
+
+# Output of the per-exercise loop /analytics/ used before the load matrix
+OPTIMAL = {
+    "chest": 0.0, "front_delts": 40.1, "biceps": 0.0, "triceps": 0.0, "abs": 105.0,
+    "back": 11.7, "rear_delts": 0.0, "traps": 0.0, "quads": 13.9, "hamstrings": 58.4,
+    "glutes": 134.0, "calves": 0.0, "forearms": 0.0,
+}
+AVERAGE = {
+    "chest": 0.0, "front_delts": 6.56, "biceps": 0.0, "triceps": 0.0, "abs": 19.6,
+    "back": 2.73, "rear_delts": 0.0, "traps": 0.0, "quads": 3.24, "hamstrings": 10.9,
+    "glutes": 25.01, "calves": 0.0, "forearms": 0.0,
+}
+TOTAL = {
+    "chest": 0.0, "front_delts": 2.81, "biceps": 0.0, "triceps": 0.0, "abs": 8.4,
+    "back": 1.17, "rear_delts": 0.0, "traps": 0.0, "quads": 1.39, "hamstrings": 4.67,
+    "glutes": 10.72, "calves": 0.0, "forearms": 0.0,
+}
+STATUS = {
+    "front_delts": "moderate", "abs": "optimal", "back": "underloaded",
+    "quads": "underloaded", "hamstrings": "moderate", "glutes": "overloaded",
+}
+
+
+def test_analytics_match_the_per_exercise_loop(client, make_user, publish_cycle):
+    author = make_user()
+    publish_cycle(author, "pinned", descriptions=["A", "B", "C"], data=PROGRAM)
+
+    own = client.post("/analytics/", json={**author, "cycle_name": "pinned"}).json()
+    public = client.post("/analytics_public/", json={
+        **make_user(), "target_user": author["user"], "cycle_name": "pinned",
+    }).json()
+    assert own["optimal_percentages"] == OPTIMAL
+    assert own["average_daily"] == AVERAGE
+    assert own["total_analytics"] == TOTAL
+    assert own["daily_analytics"]["0"]["glutes"] == 10.26
+    assert own["daily_analytics"]["1"]["front_delts"] == 0.47
+    for result in (own, public):
+        assert {m: s["status"] for m, s in result["load_status"].items()} == STATUS
+        assert result["load_status"]["front_delts"]["pr"] == 40.1
+
+
+def test_score_cycles_agrees_with_analyze_cycle():
+    cat = web._exercise_catalog()
+    total, optimal = analytics.score_cycles([PROGRAM, {}], cat)
+    assert dict(zip(analytics.MUSCLES, optimal[0].tolist())) == OPTIMAL
+    assert dict(zip(analytics.MUSCLES, total[0].tolist())) == pytest.approx(TOTAL)
+    assert not optimal[1].any()
+
+
+def _best_of(runs, fn) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def test_batch_scoring_beats_the_per_cycle_loop():
+    cat = web._exercise_catalog()
+    ids = list(analytics.load_matrix(cat).row_of)
+    rng = random.Random(7)
+    datas = [
+        {str(day): [{"id": rng.choice(ids), "sets": rng.randint(1, 6)} for _ in range(rng.randint(1, 6))]
+         for day in range(rng.randint(1, 7))}
+        for _ in range(2000)
+    ]
+
+    total, optimal = analytics.score_cycles(datas, cat)
+    for i in range(0, len(datas), 97):
+        one = analytics.analyze_cycle(datas[i], cat)
+        assert dict(zip(analytics.MUSCLES, optimal[i].tolist())) == one["optimal_percentages"]
+        assert dict(zip(analytics.MUSCLES, total[i].tolist())) == one["total_analytics"]
+
+    batch = _best_of(3, lambda: analytics.score_cycles(datas, cat))
+    loop = _best_of(3, lambda: [analytics.analyze_cycle(data, cat) for data in datas])
+    assert batch < loop, (batch, loop)
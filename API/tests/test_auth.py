@@ -0,0 +1,130 @@
+"""Session tokens, the bcrypt pool and password hash upgrades."""
+
+import asyncio
+import base64
+import json
+import threading
+
+import pytest
+from fastapi import HTTPException
+from passlib.hash import bcrypt
+
+import auth
+from data import db_session
+from data.users import User
+
+
+def _login(client, creds) -> dict:
+    response = client.post("/login/", json={"username": creds["user"], "password": creds["password"]})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+def _month(client, user, headers):
+    return client.post("/month_duties/", json={"user": user, "year": 2025, "month": 1}, headers=headers)
+
+
+def test_login_and_bearer_use(client, make_user):
+    creds = make_user()
+    assert client.post("/login/", json={"username": creds["user"], "password": "wrong123"}).status_code == 401
+    headers = _login(client, creds)
+    # no password in the body, the token stands in for it
+    assert _month(client, creds["user"], headers).status_code == 200
+    assert _month(client, creds["user"], {}).status_code == 401
+
+
+def test_token_for_another_user_is_forbidden(client, make_user):
+    owner, other = make_user(), make_user()
+    assert _month(client, other["user"], _login(client, owner)).status_code == 403
+
+
+def test_logout_revokes_the_token(client, make_user):
+    creds = make_user()
+    headers = _login(client, creds)
+    assert client.post("/logout/", headers=headers).status_code == 200
+    assert _month(client, creds["user"], headers).status_code == 401
+    assert client.post("/logout/").status_code == 401
+
+
+def test_expired_token(client, make_user, monkeypatch):
+    creds = make_user()
+    monkeypatch.setattr(auth, "SESSION_TTL_SECONDS", -60)
+    assert _month(client, creds["user"], _login(client, creds)).status_code == 401
+
+
+def test_malformed_tokens_are_rejected(client, make_user):
+    creds = make_user()
+
+    def signed(claims) -> str:
+        payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=").decode()
+        return f"{payload}.{auth._sign(payload)}"
+
+    for token in (
+        "тест.подпись".encode(),
+        b"garbage",
+        signed(["not", "a", "dict"]).encode(),
+        signed({"sub": creds["user"], "jti": "x", "exp": "never"}).encode(),
+    ):
+        response = _month(client, creds["user"], {"Authorization": b"Bearer " + token})
+        assert response.status_code == 401, token
+
+
+def _stored_hash(username: str) -> str:
+    with db_session.create_session() as db:
+        return db.query(User.password).filter(User.username == username).scalar()
+
+
+def _set_stored_hash(username: str, password: str) -> None:
+    with db_session.create_session() as db:
+        db.query(User).filter(User.username == username).update({User.password: password})
+        db.commit()
+
+
+def _user(client, creds):
+    return client.post("/user/", json={"username": creds["user"], "password": creds["password"]})
+
+
+def test_full_hash_pool_answers_503(client, make_user, monkeypatch):
+    creds = make_user()
+    pool = auth.HashPool(workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def fill_and_overflow():
+        jobs = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(HTTPException) as rejected:
+                await pool.run(release.wait)
+        finally:
+            release.set()
+            await asyncio.gather(*jobs)
+        return rejected.value.status_code
+
+    assert asyncio.run(fill_and_overflow()) == 503
+    assert pool.stats()["rejected"] == 1 and pool.stats()["completed"] == 2
+
+    busy = auth.hash_pool.workers + auth.hash_pool.max_queue
+    monkeypatch.setattr(auth.hash_pool, "pending", busy)
+    response = _user(client, creds)
+    assert response.status_code == 503
+    assert response.json() == {"error": "Server is busy, please try again."}
+
+
+def test_outdated_hash_is_rehashed_on_login(client, make_user):
+    creds = make_user()
+    _set_stored_hash(creds["user"], bcrypt.using(rounds=4).hash(creds["password"]))
+    assert _user(client, creds).status_code == 200
+    assert _stored_hash(creds["user"]).startswith(f"$2b${auth.BCRYPT_ROUNDS:02d}$")
+    assert _user(client, creds).status_code == 200
+
+
+def test_legacy_plaintext_password_is_upgraded(client, make_user):
+    creds = make_user()
+    _set_stored_hash(creds["user"], creds["password"])
+    assert _user(client, {**creds, "password": "wrong123"}).status_code == 401
+    assert _stored_hash(creds["user"]) == creds["password"]
+
+    assert _user(client, creds).status_code == 200
+    stored = _stored_hash(creds["user"])
+    assert stored.startswith("$2b$") and auth.verify_password(creds["password"], stored)
+    assert _user(client, creds).status_code == 200
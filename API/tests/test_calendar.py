@@ -0,0 +1,84 @@
+"""/range_duties/ validates its range and counts the same workouts as /day/ and /month_duties/."""
+
+import datetime
+
+import pytest
+
+from schedule import MAX_RANGE_DAYS, REST_DESCRIPTION
+
+
+def _range(client, creds, start, end):
+    return client.post("/range_duties/", json={**creds, "start": start, "end": end})
+
+
+def test_range_matches_day_and_month(client, make_user, make_cycle):
+    user = make_user()
+    # Starts 2025-01-01: Push, rest, Legs, then again
+    make_cycle(user, "ppl", descriptions=["Push", REST_DESCRIPTION, "Legs"])
+    make_cycle(user, "cardio", descriptions=["Run", "Swim"])
+
+    response = _range(client, user, "2024-12-30", "2025-01-10")
+    assert response.status_code == 200, response.text
+    days = response.json()["days"]
+    assert len(days) == 12
+    assert response.json()["max"] == 2
+
+    first = datetime.date(2024, 12, 30)
+    for offset in range(12):
+        date = (first + datetime.timedelta(days=offset)).isoformat()
+        duties = client.post("/day/", json={**user, "day": date}).json()["duties"]
+        workouts = [name for name in duties if name != REST_DESCRIPTION]
+        assert days[date] == len(workouts), date
+
+    month = client.post("/month_duties/", json={**user, "year": 2025, "month": 1}).json()["days"]
+    assert {d: c for d, c in month.items() if d <= "2025-01-10"} == {
+        d: c for d, c in days.items() if d >= "2025-01-01"
+    }
+
+
+def test_single_day_range(client, make_user, make_cycle):
+    user = make_user()
+    make_cycle(user, descriptions=["Push"])
+    response = _range(client, user, "2025-03-05", "2025-03-05")
+    assert response.json() == {"days": {"2025-03-05": 1}, "max": 1}
+
+
+def test_end_before_start_is_rejected(client, make_user):
+    response = _range(client, make_user(), "2025-02-02", "2025-02-01")
+    assert response.status_code == 400
+    assert response.json()["error"] == "Range end must not be before its start."
+
+
+def test_range_is_capped(client, make_user):
+    user = make_user()
+    start = datetime.date(2024, 1, 1)
+    longest = start + datetime.timedelta(days=MAX_RANGE_DAYS - 1)
+
+    response = _range(client, user, start.isoformat(), longest.isoformat())
+    assert response.status_code == 200
+    assert len(response.json()["days"]) == MAX_RANGE_DAYS
+
+    response = _range(client, user, start.isoformat(), (longest + datetime.timedelta(days=1)).isoformat())
+    assert response.status_code == 400
+    assert response.json()["error"] == f"Range must not exceed {MAX_RANGE_DAYS} days."
+
+
+@pytest.mark.parametrize("start, end", [
+    ("2025-13-01", "2025-12-31"),
+    ("2025-01-01", "01.02.2025"),
+    ("", "2025-01-01"),
+    ("2025-02-30", "2025-03-01"),
+])
+def test_malformed_dates_are_rejected(client, make_user, start, end):
+    response = _range(client, make_user(), start, end)
+    assert response.status_code == 400
+    assert response.json()["error"] == "Invalid date format. Use YYYY-MM-DD."
+
+
+def test_day_lists_duties_in_cycle_order(client, make_user, make_cycle):
+    user = make_user()
+    # created in the reverse of the (user, name) index order
+    make_cycle(user, "zeta", descriptions=["Squat"])
+    make_cycle(user, "alpha", descriptions=["Bench"])
+    duties = client.post("/day/", json={**user, "day": "2025-01-01"}).json()["duties"]
+    assert list(duties) == ["Squat", "Bench"]
@@ -0,0 +1,85 @@
+"""Bulk cloning resolves every name in one pass and keeps them unique."""
+
+import cloning
+import counters
+from data import db_session
+from data.cycle_bodies import CycleBody
+from data.cycles import Cycle
+from data.likes import Like
+
+
+def test_bulk_clone_names(client, make_user, publish_cycle):
+    author, reader = make_user(), make_user()
+    ids = [publish_cycle(author, name) for name in ("Push", "Push (2)")]
+
+    response = client.post("/clone_cycle/", json={**reader, "cycle_id": ids[0], "start_at": "2025-02-01"})
+    assert response.json()["new_name"] == "Push"
+    response = client.post("/clone_cycles/", json={
+        **reader, "cycle_ids": [ids[0], ids[1], ids[0]], "start_at": "2025-02-01",
+    })
+    assert [c["new_name"] for c in response.json()["clones"]] == ["Push (2)", "Push (2) (2)"]
+    assert client.get(f"/profile/{reader['user']}/").json()["cycles_count"] == 3
+
+    response = client.post("/clone_cycles/", json={**reader, "cycle_ids": [-1], "start_at": "2025-02-01"})
+    assert response.status_code == 404
+
+
+def test_clones_share_one_body(client, make_user, publish_cycle):
+    author, reader = make_user(), make_user()
+    program = {"Day 1": [{"id": 1, "sets": 5}], "note": author["user"]}
+    cycle_id = publish_cycle(author, "Pull", descriptions=["Pull"], data=program)
+    client.post("/clone_cycle/", json={**reader, "cycle_id": cycle_id, "start_at": "2025-02-01"})
+
+    db = db_session.create_session()
+    try:
+        hashes = {c.body_hash for c in db.query(Cycle).filter(
+            Cycle.user.in_([author["user"], reader["user"]])
+        )}
+        assert len(hashes) == 1
+        key = hashes.pop()
+        client.post("/delete_cycle/", json={**author, "cycle_name": "Pull"})
+        assert db.get(CycleBody, key) is not None
+        cycles = client.post("/user_cycles/", json=reader).json()["cycles"]
+        assert cycles[0]["data"] == program
+        client.post("/delete_cycle/", json={**reader, "cycle_name": "Pull"})
+        db.expire_all()
+        assert db.get(CycleBody, key) is None
+    finally:
+        db.close()
+
+
+def test_clone_name_race_is_409(client, make_user, publish_cycle, monkeypatch):
+    author, reader = make_user(), make_user()
+    cycle_id = publish_cycle(author, "Legs")
+    client.post("/clone_cycle/", json={**reader, "cycle_id": cycle_id, "start_at": "2025-02-01"})
+    # as if a concurrent clone took the name after it was found free
+    monkeypatch.setattr(cloning, "free_names", lambda db, user, base_names: list(base_names))
+
+    response = client.post("/clone_cycle/", json={**reader, "cycle_id": cycle_id, "start_at": "2025-02-01"})
+    assert response.status_code == 409
+    response = client.post("/like_cycle/", json={**reader, "cycle_id": cycle_id})
+    assert response.status_code == 409
+    assert response.json()["error"] == "Cycle names changed concurrently, try again."
+    profile = client.get(f"/profile/{reader['user']}/").json()
+    assert profile["cycles_count"] == 1
+
+
+def test_double_like_race_is_409(client, make_user, publish_cycle, monkeypatch):
+    author, reader = make_user(), make_user()
+    cycle_id = publish_cycle(author, "Arms")
+    bump_ins = counters.bump_ins
+
+    def like_lands_first(db, cycle_id, delta):
+        # the concurrent request commits its Like after this one checked for it
+        with db_session.create_session() as other:
+            other.add(Like(user=reader["user"], cycle_id=cycle_id))
+            bump_ins(other, cycle_id, 1)
+            other.commit()
+        return bump_ins(db, cycle_id, delta)
+
+    monkeypatch.setattr(counters, "bump_ins", like_lands_first)
+    response = client.post("/like_cycle/", json={**reader, "cycle_id": cycle_id})
+    assert response.status_code == 409
+    assert response.json()["error"] == "Already IN."
+    with db_session.create_session() as db:
+        assert db.get(Cycle, cycle_id).ins_count == 1
@@ -0,0 +1,27 @@
+"""Denormalized counters stay equal to what repair() recomputes."""
+
+from counters import repair
+from data import db_session
+
+
+def test_counters_match_source_tables(client, make_user, make_cycle, publish_cycle):
+    author, fan = make_user(), make_user()
+    cycle_id = publish_cycle(author, "a")
+    make_cycle(author, "b")
+    client.post("/follow/", json={**fan, "target_user": author["user"]})
+    assert client.post("/feed/", json=fan).json()["cycles"][0]["id"] == cycle_id
+    assert client.post("/like_cycle/", json={**fan, "cycle_id": cycle_id}).json()["ins_count"] == 1
+
+    profile = client.get(f"/profile/{author['user']}/").json()
+    assert (profile["cycles_count"], profile["public_cycles_count"]) == (2, 1)
+    assert (profile["followers_count"], profile["total_ins"]) == (1, 1)
+    # The IN cloned the cycle into the fan's account
+    assert client.get(f"/profile/{fan['user']}/").json()["cycles_count"] == 1
+
+    client.post("/delete_cycle/", json={**author, "cycle_name": "a"})
+    client.post("/unfollow/", json={**fan, "target_user": author["user"]})
+    db = db_session.create_session()
+    try:
+        assert repair(db) == {"users": 0, "cycles": 0}
+    finally:
+        db.close()
@@ -0,0 +1,33 @@
+"""/metrics exposes per-route latency, SQL statement counts, caches and the bcrypt pool."""
+
+import re
+
+
+def _sample(text: str, name: str, **labels) -> float:
+    for line in text.splitlines():
+        if line.startswith(name + "{") or line.startswith(name + " "):
+            found = dict(re.findall(r'(\w+)="([^"]*)"', line.split(" ")[0]))
+            if all(found.get(k) == v for k, v in labels.items()):
+                return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{name} {labels} not in /metrics")
+
+
+def test_metrics_by_route_template(client, make_user):
+    user = make_user()
+    client.get(f"/profile/{user['user']}/")
+    client.get(f"/profile/{user['user']}/")
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+
+    route = {"method": "GET", "route": "/profile/{username}/"}
+    assert _sample(text, "http_request_duration_seconds_count", status="200", **route) >= 2
+    assert _sample(text, "http_requests_in_flight", **route) == 0
+    # the second request is a profile cache hit and runs no SQL
+    assert _sample(text, "http_request_db_statements_bucket", le="0.0", **route) >= 1
+    assert _sample(text, "http_request_db_statements_count", **route) >= 2
+    assert user["user"] not in text
+
+    assert _sample(text, "cache_hits_total", cache="profile") >= 1
+    assert _sample(text, "bcrypt_pool_queue_depth") == 0
+    assert _sample(text, "db_statements_total", engine="write") > 0
@@ -0,0 +1,44 @@
+"""Cursor pagination walks every row exactly once, newest first."""
+
+
+def _walk(fetch) -> list:
+    items, cursor = [], ""
+    while True:
+        page_items, cursor = fetch(cursor)
+        items += page_items
+        if not cursor:
+            return items
+
+
+def test_followers_pages(client, make_user):
+    author = make_user()
+    fans = [make_user() for _ in range(7)]
+    for fan in fans:
+        client.post("/follow/", json={**fan, "target_user": author["user"]})
+
+    def fetch(cursor):
+        body = client.get(f"/followers/{author['user']}/?limit=3&cursor={cursor}").json()
+        assert body["count"] == 7
+        return body["followers"], body["next_cursor"]
+
+    assert _walk(fetch) == [fan["user"] for fan in reversed(fans)]
+
+
+def test_feed_pages(client, make_user, publish_cycle):
+    author, reader = make_user(), make_user()
+    client.post("/follow/", json={**reader, "target_user": author["user"]})
+    for i in range(5):
+        publish_cycle(author, f"c{i}")
+
+    def fetch(cursor):
+        body = client.post("/feed/", json={**reader, "cursor": cursor, "limit": 2}).json()
+        return [c["id"] for c in body["cycles"]], body["next_cursor"]
+
+    ids = _walk(fetch)
+    assert len(ids) == 5 and ids == sorted(ids, reverse=True)
+
+
+def test_bad_cursor_and_limit(client):
+    body = {"target_type": "cycle", "target_id": 1}
+    assert client.post("/get_comments/", json={**body, "cursor": "not a cursor"}).status_code == 400
+    assert client.post("/get_comments/", json={**body, "limit": 1000}).status_code == 422
@@ -0,0 +1,26 @@
+"""/profile/ is served from the summary cache and refreshed by writes."""
+
+import profiles
+
+
+def test_profile_cache_invalidated_by_writes(client, make_user, publish_cycle):
+    author, fan = make_user(), make_user()
+    cycle_id = publish_cycle(author, "a")
+    url = f"/profile/{author['user']}/"
+    assert client.get(url).json()["public_cycles_count"] == 1
+    assert profiles.get(author["user"]) is not None
+
+    client.post("/follow/", json={**fan, "target_user": author["user"]})
+    assert client.get(url).json()["followers_count"] == 1
+    assert client.get(url).json()["public_cycles"][0]["id"] == cycle_id
+    client.post("/like_cycle/", json={**fan, "cycle_id": cycle_id})
+    assert client.get(url).json()["total_ins"] == 1
+    client.post("/create_note/", json={**author, "descriptions": "note"})
+    assert client.get(url).json()["notes_count"] == 1
+
+
+def test_stale_build_is_not_cached():
+    gen = profiles.generation("racer")
+    profiles.invalidate("racer")
+    profiles.store("racer", gen, {"username": "racer"})
+    assert profiles.get("racer") is None
@@ -0,0 +1,71 @@
+"""Sampled request profiles are merged per route and served to admins only."""
+
+import threading
+import types
+
+import auth
+import profiler
+import web
+from fastapi.testclient import TestClient
+
+
+def test_profiled_requests_and_admin_endpoints(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", "s3cret")
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    app = profiler.ProfilerMiddleware(web.app, api=web.app, directory=str(tmp_path), interval_ms=1)
+
+    with TestClient(app) as profiled:
+        # no header and no sample rate: passes straight through
+        profiled.post("/sign_up/", json={"username": "prof_plain", "password": "pass1234"})
+        assert not list(tmp_path.iterdir())
+        for name in ("prof_a", "prof_b"):
+            response = profiled.post(
+                "/sign_up/", json={"username": name, "password": "pass1234"},
+                headers={"X-Profile": "s3cret"},
+            )
+            assert response.status_code == 200
+
+    assert client.get("/admin/profiles/").status_code == 403
+    listing = client.get("/admin/profiles/", headers={"X-Admin-Token": "s3cret"}).json()["profiles"]
+    assert [(p["name"], p["route"], p["requests"]) for p in listing] == [
+        ("POST_sign_up.folded", "POST /sign_up/", 2),
+    ]
+    assert listing[0]["samples"] > 0
+
+    text = client.get("/admin/profiles/POST_sign_up.folded", headers={"X-Admin-Token": "s3cret"}).text
+    stacks = dict(line.rsplit(" ", 1) for line in text.splitlines())
+    assert sum(int(n) for n in stacks.values()) == listing[0]["samples"]
+    # stacks start below the profiler and reach the endpoint; bcrypt time shows as waiting
+    assert all(stack.startswith("FastAPI.__call__ (fastapi/applications.py") for stack in stacks)
+    assert any("sign_up (web.py" in stack and stack.endswith(profiler.WAITING) for stack in stacks)
+
+    assert client.get("/admin/profiles/..%2Findex.json", headers={"X-Admin-Token": "s3cret"}).status_code == 404
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", "")
+    assert client.get("/admin/profiles/", headers={"X-Admin-Token": ""}).status_code == 404
+
+
+def test_store_writes_run_off_the_event_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", "s3cret")
+    app = profiler.ProfilerMiddleware(web.app, api=web.app, directory=str(tmp_path), interval_ms=1)
+    loop_threads, store_threads = set(), []
+    add = app.store.add
+
+    def recording_add(*args):
+        store_threads.append(threading.get_ident())
+        return add(*args)
+
+    monkeypatch.setattr(app.store, "add", recording_add)
+
+    async def outer(scope, receive, send):
+        loop_threads.add(threading.get_ident())
+        await app(scope, receive, send)
+
+    with TestClient(outer) as profiled:
+        profiled.get("/", headers={"X-Profile": "s3cret"})
+    assert len(store_threads) == 1
+    assert store_threads[0] not in loop_threads
+
+
+def test_label_without_qualname():
+    code = types.SimpleNamespace(co_name="handler", co_filename=__file__, co_firstlineno=7)
+    assert profiler._label(code).startswith("handler (")
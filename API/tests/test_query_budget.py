@@ -0,0 +1,40 @@
+"""Statement budgets for hot endpoints, so queries in loops cannot creep back in."""
+
+import profiles
+from querywatch import max_queries
+
+
+PROGRAM = {"0": [{"id": 1, "sets": 3}]}
+
+
+def test_read_endpoints_stay_within_budget(client, make_user, publish_cycle):
+    author, reader = make_user(), make_user()
+    for name in ("a", "b", "c"):
+        publish_cycle(author, name, data=PROGRAM)
+    client.post("/follow/", json={**reader, "target_user": author["user"]})
+
+    # user, cycles, and one batched load of bodies not cached yet
+    profiles.invalidate(author["user"])
+    with max_queries(3, repeat=2):
+        client.get(f"/profile/{author['user']}/")
+    with max_queries(0):
+        client.get(f"/profile/{author['user']}/")
+    with max_queries(6, repeat=2):
+        client.post("/feed/", json=reader)
+    with max_queries(2, repeat=2):
+        client.post("/search_users/", json={"query": author["user"][:6]})
+    with max_queries(2, repeat=2):
+        client.post("/month_duties/", json={**author, "year": 2025, "month": 1})
+    with max_queries(3, repeat=2):
+        client.get(f"/followers/{author['user']}/?viewer={reader['user']}")
+
+
+def test_bulk_clone_is_set_based(client, make_user, publish_cycle):
+    author, fan = make_user(), make_user()
+    ids = [publish_cycle(author, name, data=PROGRAM) for name in ("x", "y", "z")]
+    with max_queries(100) as one:
+        client.post("/clone_cycles/", json={**fan, "cycle_ids": ids[:1], "start_at": "2025-01-01"})
+    with max_queries(100) as three:
+        client.post("/clone_cycles/", json={**fan, "cycle_ids": ids, "start_at": "2025-01-01"})
+    # only the INSERT per clone grows with the batch
+    assert three.count - one.count == 2
@@ -0,0 +1,43 @@
+"""List endpoints render pre-serialized cycle bodies and match their response models."""
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from responses import body_cache
+from schemas import FeedResponse, ProfileResponse, UserCyclesResponse
+
+
+def test_cycle_bodies_round_trip(client, make_user, publish_cycle):
+    author = make_user()
+    descriptions = ["Push", "Pull"]
+    data = {"0": [{"name": "Bench", "sets": 5}], "1": [{"name": "Row", "sets": 4}]}
+    publish_cycle(author, "ppl", descriptions=descriptions, data=data)
+
+    own = UserCyclesResponse.model_validate(client.post("/user_cycles/", json=author).json())
+    assert own.cycles[0].descriptions == descriptions
+    assert own.cycles[0].data == data
+
+    profile = ProfileResponse.model_validate(client.get(f"/profile/{author['user']}/").json())
+    assert profile.public_cycles[0].data == data
+
+    feed = FeedResponse.model_validate(client.post("/feed/", json={**author, "limit": 100}).json())
+    assert any(c.data == data for c in feed.cycles)
+
+
+def test_summary_view_never_reads_data(client, make_user, make_cycle):
+    author = make_user()
+    make_cycle(author, "heavy", descriptions=["Legs"], data={"0": [{"name": "Squat", "sets": 5}]})
+    body_cache.clear()
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        own = client.post("/user_cycles/", json={**author, "view": "summary"}).json()
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    assert own["cycles"][0]["descriptions"] == ["Legs"]
+    assert "data" not in own["cycles"][0]
+    assert not any("cycle_bodies.data" in s for s in statements)
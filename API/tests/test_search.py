@@ -0,0 +1,27 @@
+"""Full-text search matches names, descriptions and exercises by prefix."""
+
+import uuid
+
+
+def test_search_cycles_fulltext(client, make_user, publish_cycle):
+    author = make_user()
+    tag = uuid.uuid4().hex[:8]
+    publish_cycle(author, f"Back {tag}", descriptions=["Спина"], data={"Day 1": [{"id": 1, "sets": 3}]})
+
+    def names(query):
+        body = client.post("/search_cycles/", json={"query": query}).json()
+        return [c["name"] for c in body["cycles"]]
+
+    assert names(tag[:4]) == [f"Back {tag}"]
+    assert f"Back {tag}" in names(f"подтяг {tag}")  # exercise name from the catalog
+    assert f"Back {tag}" in names(f"спин {tag}")
+
+    client.post("/unpublish_cycle/", json={**author, "cycle_name": f"Back {tag}"})
+    assert names(tag) == []
+
+
+def test_search_users_by_bio(client, make_user):
+    creds = make_user()
+    client.post("/update_profile/", json={**creds, "bio": "marathoner"})
+    users = client.post("/search_users/", json={"query": "marath"}).json()["users"]
+    assert creds["user"] in [u["username"] for u in users]
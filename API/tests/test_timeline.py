@@ -0,0 +1,65 @@
+"""Authors over the fan-out limit are pulled at read time and pushed again below it."""
+
+from sqlalchemy import event, update
+from sqlalchemy.engine import Engine
+
+import timeline
+from data import db_session
+from data.timeline import TimelineEntry
+from data.users import User
+
+
+def _timeline(owner: str) -> list:
+    with db_session.create_session() as db:
+        return [row[0] for row in db.query(TimelineEntry.cycle_id).filter(TimelineEntry.owner == owner)]
+
+
+def _feed(client, reader) -> list:
+    return [c["id"] for c in client.post("/feed/", json=reader).json()["cycles"]]
+
+
+def test_pull_mode_and_back_to_push(client, make_user, publish_cycle, monkeypatch):
+    monkeypatch.setattr(timeline, "TIMELINE_FANOUT_LIMIT", 1)
+    author, first, second = make_user(), make_user(), make_user()
+    pushed = publish_cycle(author, "pushed")
+
+    client.post("/follow/", json={**first, "target_user": author["user"]})
+    assert _timeline(first["user"]) == [pushed]
+    # the second follow takes the author over the limit: nothing is pushed
+    client.post("/follow/", json={**second, "target_user": author["user"]})
+    assert _timeline(second["user"]) == []
+
+    pulled = publish_cycle(author, "pulled")
+    assert _timeline(first["user"]) == [pushed]
+    assert _feed(client, first) == [pulled, pushed]
+    assert _feed(client, second) == [pulled, pushed]
+
+    # back at the limit, the remaining follower's timeline holds both again
+    client.post("/unfollow/", json={**second, "target_user": author["user"]})
+    assert sorted(_timeline(first["user"])) == [pushed, pulled]
+    assert _feed(client, first) == [pulled, pushed]
+    assert _timeline(second["user"]) == []
+
+
+def test_pull_mode_follows_the_denormalized_counter(client, make_user, publish_cycle, monkeypatch):
+    monkeypatch.setattr(timeline, "TIMELINE_FANOUT_LIMIT", 1)
+    author, reader = make_user(), make_user()
+    client.post("/follow/", json={**reader, "target_user": author["user"]})
+    with db_session.create_session() as db:
+        # one real follower, but the counter says the author is over the limit
+        db.execute(update(User).where(User.username == author["user"]).values(followers_count=5))
+        db.commit()
+    pulled = publish_cycle(author, "pulled")
+    assert _timeline(reader["user"]) == []
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement.lower())
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        assert _feed(client, reader) == [pulled]
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    assert not any("count(" in statement and "follows" in statement for statement in statements)
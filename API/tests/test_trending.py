@@ -0,0 +1,112 @@
+"""Trending scores follow likes and decay with time."""
+
+import threading
+import time
+
+import counters
+import trending
+from data import db_session, migrations
+from data.likes import Like
+from data.trending import TRENDING_HALF_LIFE_SECONDS, Trending, TrendingEpoch
+
+
+def test_trending_follows_likes(client, make_user, publish_cycle):
+    author, fans = make_user(), [make_user() for _ in range(2)]
+    ids = [publish_cycle(author, name) for name in ("old", "hot")]
+    for fan in fans:
+        client.post("/like_cycle/", json={**fan, "cycle_id": ids[1]})
+    client.post("/unlike_cycle/", json={**fans[0], "cycle_id": ids[1]})
+
+    db = db_session.create_session()
+    try:
+        scores = dict(db.query(Trending.cycle_id, Trending.score).filter(Trending.cycle_id.in_(ids)))
+        assert scores[ids[0]] == 0.0 and 0.99 < scores[ids[1]] < 1.01
+
+        # One half-life later the remaining like weighs half as much
+        trending.rebalance(db, now=time.time() + TRENDING_HALF_LIFE_SECONDS)
+        score = db.query(Trending.score).filter(Trending.cycle_id == ids[1]).scalar()
+        assert 0.49 < score < 0.51
+    finally:
+        db.close()
+
+    listed = []
+    cursor = ""
+    while True:
+        body = client.get("/trending/", params={"cursor": cursor, "limit": 50}).json()
+        listed += [c["id"] for c in body["cycles"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert listed.index(ids[1]) < listed.index(ids[0])
+
+
+def test_rebalance_keeps_likes_committed_while_it_waits(make_user, publish_cycle):
+    author, early, late = make_user(), make_user(), make_user()
+    cycle_id = publish_cycle(author, "raced")
+    writer = db_session.create_session()
+    try:
+        for fan in (early, late):
+            writer.add(Like(user=fan["user"], cycle_id=cycle_id))
+            counters.bump_ins(writer, cycle_id, 1)
+            trending.on_like(writer, cycle_id)
+            if fan is early:
+                writer.commit()
+        # the late like holds the write lock while the rebalance starts
+        scored = []
+
+        def run():
+            db = db_session.create_session()
+            try:
+                scored.append(trending.rebalance(db))
+            finally:
+                db.close()
+
+        rebalancer = threading.Thread(target=run)
+        rebalancer.start()
+        time.sleep(0.3)
+        writer.commit()
+        rebalancer.join()
+        assert scored and scored[0] >= 1
+        score = writer.query(Trending.score).filter(Trending.cycle_id == cycle_id).scalar()
+        assert 1.99 < score < 2.01
+    finally:
+        writer.close()
+
+
+def test_one_rebalancer_holds_the_lease():
+    db = db_session.create_session()
+    try:
+        # free the lease this process's startup rebalance took
+        db.query(TrendingEpoch).update({TrendingEpoch.lease_owner: None})
+        db.commit()
+        now = time.time()
+        assert trending.rebalance(db, now=now, owner="a", lease_seconds=60) is not None
+        assert trending.rebalance(db, now=now + 1, owner="b", lease_seconds=60) is None
+        assert trending.rebalance(db, now=now + 30, owner="a", lease_seconds=60) is not None
+        # the lease runs out when its owner stops renewing it
+        assert trending.rebalance(db, now=now + 91, owner="b", lease_seconds=60) is not None
+        assert trending.rebalance(db, now=now + 92, owner="a", lease_seconds=60) is None
+    finally:
+        db.close()
+
+
+def test_migration_seeds_scores_from_existing_likes(client, make_user, publish_cycle):
+    author, fan = make_user(), make_user()
+    cycle_id = publish_cycle(author, "upgraded")
+    client.post("/like_cycle/", json={**fan, "cycle_id": cycle_id})
+    db = db_session.create_session()
+    try:
+        # as the pre-trending schema left it: no score for an existing like
+        db.query(Trending).filter(Trending.cycle_id == cycle_id).update({Trending.score: 0.0})
+        db.commit()
+        with db_session.engine.begin() as conn:
+            migrations._trending(conn)
+
+        epoch = db.query(TrendingEpoch.epoch).scalar()
+        liked_at = db.query(Like.created_at).filter(Like.cycle_id == cycle_id).scalar()
+        expected = 2 ** ((trending._timestamp(liked_at) - epoch) / TRENDING_HALF_LIFE_SECONDS)
+        db.expire_all()
+        score = db.query(Trending.score).filter(Trending.cycle_id == cycle_id).scalar()
+        assert abs(score - expected) < 1e-6 * expected
+    finally:
+        db.close()
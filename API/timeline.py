@@ -0,0 +1,109 @@
+"""
+Fan-out-on-write timeline for /feed/.
+
+Publishing a cycle pushes one row per follower into the timeline table, so
+reading a feed is a single range scan over (owner, cycle_id DESC). Authors
+with more than TIMELINE_FANOUT_LIMIT followers are not fanned out; their
+public cycles are pulled at read time and merged in. When such an author
+drops back to the limit, their followers' timelines are backfilled so
+cycles published in pull mode stay in the feed.
+"""
+
+from typing import Optional
+
+from sqlalchemy import literal, select
+from sqlalchemy.orm import Session
+
+from data.cycles import Cycle
+from data.db_session import dialect_insert
+from data.follows import Follow
+from data.timeline import TIMELINE_FANOUT_LIMIT, TimelineEntry
+from data.users import User
+
+
+def _follower_count(db: Session, username: str) -> int:
+    """
+    The denormalized users.followers_count. /follow/ and /unfollow/ bump it
+    with an immediate UPDATE before calling in here, so it already includes
+    the Follow row they are adding or removing.
+    """
+    return db.query(User.followers_count).filter(User.username == username).scalar() or 0
+
+
+def _insert_entries(db: Session, rows_select) -> None:
+    db.execute(
+        dialect_insert(db, TimelineEntry)
+        .from_select(["owner", "cycle_id", "author"], rows_select)
+        .on_conflict_do_nothing(index_elements=["owner", "cycle_id"])
+    )
+
+
+def on_publish(db: Session, cycle: Cycle) -> None:
+    """Push a newly public cycle into its author's and followers' timelines."""
+    _insert_entries(db, select(literal(cycle.user), literal(cycle.id), literal(cycle.user)))
+    if _follower_count(db, cycle.user) <= TIMELINE_FANOUT_LIMIT:
+        _insert_entries(db, select(
+            Follow.follower, literal(cycle.id), literal(cycle.user)
+        ).where(Follow.following == cycle.user))
+
+
+def on_unpublish(db: Session, cycle_id: int) -> None:
+    """Remove a cycle from every timeline (unpublish or delete)."""
+    db.query(TimelineEntry).filter(TimelineEntry.cycle_id == cycle_id).delete(
+        synchronize_session=False
+    )
+
+
+def on_follow(db: Session, follower: str, following: str) -> None:
+    """Backfill the followed user's public cycles into the follower's timeline."""
+    if _follower_count(db, following) > TIMELINE_FANOUT_LIMIT:
+        return
+    _insert_entries(db, select(
+        literal(follower), Cycle.id, Cycle.user
+    ).where(Cycle.user == following, Cycle.is_public == 1))
+
+
+def on_unfollow(db: Session, follower: str, following: str) -> None:
+    """
+    Drop the unfollowed user's cycles from the follower's timeline. If that
+    brings the author back to the fan-out limit they leave pull mode, so
+    their remaining followers get every public cycle pushed now.
+    """
+    db.query(TimelineEntry).filter(
+        TimelineEntry.owner == follower, TimelineEntry.author == following
+    ).delete(synchronize_session=False)
+    # The backfill below must not see the deleted Follow; the session does not autoflush
+    db.flush()
+    if _follower_count(db, following) == TIMELINE_FANOUT_LIMIT:
+        _insert_entries(db, select(
+            Follow.follower, Cycle.id, Cycle.user
+        ).join(Cycle, Cycle.user == Follow.following).where(
+            Follow.following == following, Cycle.is_public == 1
+        ))
+
+
+def _pull_authors(db: Session, username: str) -> list:
+    """Followed authors above the fan-out limit, whose cycles are read on demand."""
+    return [
+        row[0] for row in
+        db.query(Follow.following)
+        .join(User, User.username == Follow.following)
+        .filter(Follow.follower == username, User.followers_count > TIMELINE_FANOUT_LIMIT)
+        .all()
+    ]
+
+
+def feed_cycle_ids(db: Session, username: str, limit: int, before_id: Optional[int] = None) -> list:
+    """Newest-first public cycle ids for a user's feed, optionally below before_id."""
+    query = db.query(TimelineEntry.cycle_id).filter(TimelineEntry.owner == username)
+    if before_id is not None:
+        query = query.filter(TimelineEntry.cycle_id < before_id)
+    ids = [row[0] for row in query.order_by(TimelineEntry.cycle_id.desc()).limit(limit)]
+    pull_authors = _pull_authors(db, username)
+    if pull_authors:
+        pulled = db.query(Cycle.id).filter(Cycle.user.in_(pull_authors), Cycle.is_public == 1)
+        if before_id is not None:
+            pulled = pulled.filter(Cycle.id < before_id)
+        ids.extend(row[0] for row in pulled.order_by(Cycle.id.desc()).limit(limit))
+        ids = sorted(set(ids), reverse=True)[:limit]
+    return ids
@@ -0,0 +1,179 @@
+"""
+Trending ranking for the no-follows feed and /trending/.
+
+A like at unix time t adds 2 ** ((t - epoch) / TRENDING_HALF_LIFE_SECONDS)
+to its cycle's score and an unlike subtracts the same weight (from the
+like's created_at). Every score decays at the same rate, so the order never
+needs rewriting as time passes; only the epoch has to move forward before
+fresh weights grow large. rebalance() does that by recomputing all scores
+from recent likes relative to epoch = now, which also repairs any drift,
+and run_rebalancer() repeats it every TRENDING_REBALANCE_SECONDS in the one
+worker process that holds the lease in trending_epoch.
+
+Weights are computed in SQL, in the statement that applies them, so a like
+never pairs a stale epoch with a rebalanced score. That SQL lives in
+data/trending.py, where the trending migration reuses it to seed scores.
+"""
+
+import asyncio
+import datetime
+import logging
+import os
+import secrets
+import time
+from typing import Optional
+
+from sqlalchemy import case, func, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from data import db_session
+from data.cycles import Cycle
+from data.db_session import dialect_insert, retry_on_busy
+from data.likes import Like
+from data.trending import Trending, TrendingEpoch, like_weight, recent_score
+from pagination import paginate
+
+TRENDING_REBALANCE_SECONDS = float(os.environ.get("TRENDING_REBALANCE_SECONDS", "3600"))
+
+# Names this process in the rebalance lease
+RUNNER_ID = f"{os.getpid()}-{secrets.token_hex(4)}"
+
+logger = logging.getLogger("regime-maker")
+
+
+def _timestamp(created_at: Optional[datetime.datetime]) -> float:
+    """Unix time of a naive-UTC created_at column value."""
+    if created_at is None:
+        return time.time()
+    return created_at.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def on_publish(db: Session, cycle_id: int) -> None:
+    """Give a newly public cycle a (zero) trending row."""
+    db.execute(
+        dialect_insert(db, Trending)
+        .values(cycle_id=cycle_id, score=0.0)
+        .on_conflict_do_nothing(index_elements=["cycle_id"])
+    )
+
+
+def on_unpublish(db: Session, cycle_id: int) -> None:
+    db.query(Trending).filter(Trending.cycle_id == cycle_id).delete(synchronize_session=False)
+
+
+def on_like(db: Session, cycle_id: int) -> None:
+    weight = like_weight(literal(time.time()))
+    db.execute(
+        update(Trending)
+        .where(Trending.cycle_id == cycle_id)
+        .values(score=Trending.score + weight),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def on_unlike(db: Session, like: Like) -> None:
+    weight = like_weight(literal(_timestamp(like.created_at)))
+    db.execute(
+        update(Trending)
+        .where(Trending.cycle_id == like.cycle_id)
+        .values(score=case((Trending.score > weight, Trending.score - weight), else_=0.0)),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def rebalance(
+    db: Session,
+    now: Optional[float] = None,
+    owner: Optional[str] = None,
+    lease_seconds: float = 0.0,
+) -> Optional[int]:
+    """
+    Recompute every score from the likes of the last RECENT_HALF_LIVES
+    half-lives relative to a new epoch, add rows for public cycles that
+    lack one and drop rows of cycles that are no longer public, in one
+    transaction. With `owner`, first take (or renew) the rebalance lease
+    for lease_seconds, and give up returning None while another owner
+    holds it. Commits and returns the number of cycles with a non-zero
+    score.
+    """
+    now = time.time() if now is None else now
+    # Write before reading any like: on SQLite this takes the write lock, so
+    # likes and unlikes wait for the commit instead of being overwritten
+    db.execute(
+        dialect_insert(db, TrendingEpoch)
+        .values(id=1, epoch=now)
+        .on_conflict_do_nothing(index_elements=["id"])
+    )
+    if owner is not None:
+        claimed = db.execute(
+            update(TrendingEpoch)
+            .where(TrendingEpoch.id == 1, or_(
+                TrendingEpoch.lease_owner.is_(None),
+                TrendingEpoch.lease_owner == owner,
+                TrendingEpoch.lease_until < now,
+            ))
+            .values(lease_owner=owner, lease_until=now + lease_seconds),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        if not claimed:
+            db.rollback()
+            return None
+
+    public = select(Cycle.id).where(Cycle.is_public == 1)
+    db.query(Trending).filter(Trending.cycle_id.not_in(public)).delete(synchronize_session=False)
+    db.execute(
+        dialect_insert(db, Trending)
+        .from_select(
+            ["cycle_id", "score"], select(Cycle.id, literal(0.0)).where(Cycle.is_public == 1)
+        )
+        .on_conflict_do_nothing(index_elements=["cycle_id"])
+    )
+    db.execute(
+        update(Trending).values(score=recent_score(db.get_bind().dialect.name, now)),
+        execution_options={"synchronize_session": False},
+    )
+    db.execute(
+        update(TrendingEpoch).where(TrendingEpoch.id == 1).values(epoch=now),
+        execution_options={"synchronize_session": False},
+    )
+    scored = db.query(func.count(Trending.cycle_id)).filter(Trending.score > 0).scalar()
+    db.commit()
+    return scored
+
+
+def page_trending(db: Session, cursor: str, limit: int) -> tuple:
+    """One page of public cycles by trending score: (cycles, next_cursor)."""
+    rows, next_cursor = paginate(
+        db.query(Cycle, Trending.score)
+        .join(Trending, Trending.cycle_id == Cycle.id)
+        .filter(Cycle.is_public == 1),
+        [Trending.score, Trending.cycle_id], cursor, limit,
+        key=lambda row: (row.score, row.Cycle.id),
+    )
+    return [row.Cycle for row in rows], next_cursor
+
+
+def _rebalance_once(lease_seconds: float) -> None:
+    db = db_session.create_session()
+    try:
+        scored = retry_on_busy(db, lambda: rebalance(db, owner=RUNNER_ID, lease_seconds=lease_seconds))
+        if scored is None:
+            logger.debug("Trending rebalance skipped: another worker holds the lease")
+        else:
+            logger.info("Trending rebalanced: %d cycles scored", scored)
+    finally:
+        db.close()
+
+
+async def run_rebalancer(interval: float = TRENDING_REBALANCE_SECONDS) -> None:
+    """
+    Rebalance now and then every `interval` seconds, off the event loop.
+    Every worker runs this loop; the lease, renewed each round and valid for
+    two intervals, lets only one of them do the work until it stops.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(_rebalance_once, 2 * interval)
+        except Exception:
+            logger.exception("Trending rebalance failed")
+        await asyncio.sleep(interval)
@@ -1,21 +1,26 @@
-import json
+import asyncio
 import datetime
 import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
 
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, status
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
 import uvicorn
 
 from data import db_session
 from data.users import User
 from data.cycles import Cycle
+from data.cycle_bodies import CycleBody, intern_body, release_body
 from data.notes import Note
 from data.follows import Follow
 from data.likes import Like
-from data.muscles import MUSCLE_GROUPS
 from schemas import (
     UserAuth,
     SignUpRequest,
@@ -35,7 +40,20 @@ from schemas import (
     FeedRequest,
     SearchRequest,
     MonthRequest,
+    RangeRequest,
     CloneCycleRequest,
+    BulkCloneRequest,
+    CommentsResponse,
+    CycleView,
+    CyclePage,
+    FeedResponse,
+    FollowersResponse,
+    FollowingResponse,
+    InUsersResponse,
+    NotesResponse,
+    ProfileResponse,
+    UserCyclesResponse,
+    UsersResponse,
     AnalyticsPublicRequest,
     CommentCreate,
     CommentDelete,
@@ -43,8 +61,31 @@ from schemas import (
     InUsersRequest,
 )
 from data.comments import Comment
+from catalog import ExerciseCatalog, catalog
+from analytics import analytics_cache, cached_analyze_cycle
+from schedule import MAX_RANGE_DAYS, compile_cycles, duties_on, workout_counts
+from duties import get_duty_version, load_day, set_duty, sync_day
+import cloning
+import counters
+import metrics
+import profiler
+import profiles
+import querywatch
+from responses import EMPTY_FRAGMENTS, VIEW_FIELDS, ORJSONResponse, body_cache, body_fragments
+import search_index
+import timeline
+import trending
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, page, paginate
 import calendar as cal_mod
-from auth import hash_password, authenticate_user
+from auth import (
+    hash_pool,
+    hash_password,
+    authenticate_user,
+    authenticate_token,
+    check_admin_token,
+    create_session_token,
+    revoke_session_token,
+)
 
 # --------------- Logging ---------------
 
@@ -56,7 +97,22 @@ logger = logging.getLogger("regime-maker")
 
 # --------------- App ---------------
 
-app = FastAPI(title="IN API", version="4.0.0")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    rebalancer = None
+    if trending.TRENDING_REBALANCE_SECONDS > 0:
+        rebalancer = asyncio.create_task(trending.run_rebalancer())
+    yield
+    if rebalancer is not None:
+        rebalancer.cancel()
+
+
+app = FastAPI(
+    title="IN API",
+    version="4.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -64,7 +120,29 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware, api=app)
+if querywatch.QUERY_WATCH:
+    app.add_middleware(querywatch.QueryWatchMiddleware)
+if profiler.PROFILING:
+    app.add_middleware(profiler.ProfilerMiddleware, api=app)
+
 db_session.global_init("db/db.db")
+metrics.instrument_engine(db_session.engine, "write")
+if db_session.read_engine is not db_session.engine:
+    metrics.instrument_engine(db_session.read_engine, "read")
+metrics.registry.collector(metrics.cache_collector({
+    "analytics": analytics_cache,
+    "profile": profiles.profile_cache,
+    "body": body_cache,
+}))
+metrics.registry.collector(metrics.hash_pool_collector(hash_pool))
+if querywatch.QUERY_WATCH:
+    querywatch.install(db_session.engine)
+    querywatch.install(db_session.read_engine)
+catalog.on_reload(lambda _: analytics_cache.clear())
+catalog.refresh()
+with db_session.create_session() as _db:
+    search_index.ensure_built(_db, catalog)
 
 
 # --------------- Exception Handlers ---------------
@@ -93,12 +171,45 @@ def get_db():
         session.close()
 
 
+def get_read_db():
+    session = db_session.create_read_session()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def get_session_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    db: Session = Depends(get_db),
+) -> Optional[User]:
+    """Resolve an "Authorization: Bearer" session token, if present, to its User."""
+    if credentials is None:
+        return None
+    return authenticate_token(credentials.credentials, db)
+
+
+def require_admin(x_admin_token: str = Header(default="")) -> None:
+    """Admin endpoints need an "X-Admin-Token" header matching ADMIN_TOKEN."""
+    check_admin_token(x_admin_token)
+
+
 # --------------- Helpers ---------------
 
 
+def _exercise_catalog() -> ExerciseCatalog:
+    """Return the in-memory exercise catalog (hot-reloaded on file change)."""
+    try:
+        return catalog.current()
+    except FileNotFoundError:
+        raise HTTPException(status_code=500, detail="Exercises database not found.")
+
+
 def _cycle_to_dict(cycle: Cycle, db: Session, current_user: str = "") -> dict:
     """Convert a Cycle ORM object to a response dict with social stats."""
-    ins_count = db.query(Like).filter(Like.cycle_id == cycle.id).count()
     is_in = False
     if current_user:
         is_in = (
@@ -118,7 +229,7 @@ def _cycle_to_dict(cycle: Cycle, db: Session, current_user: str = "") -> dict:
         "start_at": cycle.start_at,
         "is_public": bool(getattr(cycle, "is_public", 0)),
         "original_author": getattr(cycle, "original_author", "") or "",
-        "ins_count": ins_count,
+        "ins_count": cycle.ins_count,
         "is_in": is_in,
         "author": {
             "username": cycle.user,
@@ -128,19 +239,17 @@ def _cycle_to_dict(cycle: Cycle, db: Session, current_user: str = "") -> dict:
     }
 
 
-def _cycles_to_dicts(cycles: list, db: Session, current_user: str = "") -> list:
-    """Batch-convert cycles with optimized queries."""
-    from sqlalchemy import func
+def _cycles_to_dicts(
+    cycles: list, db: Session, current_user: str = "", view: CycleView = "full"
+) -> list:
+    """
+    Batch-convert cycles with optimized queries. descriptions/data are
+    pre-serialized fragments, so the result must be rendered by
+    ORJSONResponse rather than the default JSON encoder.
+    """
     if not cycles:
         return []
     cycle_ids = [c.id for c in cycles]
-    # Batch count likes
-    counts = dict(
-        db.query(Like.cycle_id, func.count(Like.id))
-        .filter(Like.cycle_id.in_(cycle_ids))
-        .group_by(Like.cycle_id)
-        .all()
-    )
     # Batch check user's likes
     user_likes = set()
     if current_user:
@@ -150,6 +259,8 @@ def _cycles_to_dicts(cycles: list, db: Session, current_user: str = "") -> list:
             .filter(Like.cycle_id.in_(cycle_ids), Like.user == current_user)
             .all()
         }
+    fields = VIEW_FIELDS[view]
+    bodies = body_fragments(db, cycles, fields)
     result = []
     for c in cycles:
         result.append({
@@ -158,18 +269,27 @@ def _cycles_to_dicts(cycles: list, db: Session, current_user: str = "") -> list:
             "user": c.user,
             "days_count": c.days_count,
             "pause": c.pause,
-            "descriptions": c.descriptions,
-            "data": c.data,
+            **{field: bodies.get(c.body_hash, EMPTY_FRAGMENTS)[field] for field in fields},
             "start_at": c.start_at,
             "is_public": bool(getattr(c, "is_public", 0)),
             "original_author": getattr(c, "original_author", "") or "",
-            "ins_count": counts.get(c.id, 0),
+            "ins_count": c.ins_count,
             "is_in": c.id in user_likes,
             "author": {"username": c.user, "bio": "", "followers_count": 0},
         })
     return result
 
 
+def _user_schedules(db: Session, user: str) -> list:
+    """Compile a user's cycles for the calendar, reading only body descriptions."""
+    return compile_cycles(
+        db.query(Cycle)
+        .filter(Cycle.user == user)
+        .options(joinedload(Cycle.body).load_only(CycleBody.descriptions))
+        .order_by(Cycle.id)
+    )
+
+
 # ======================== AUTH ========================
 
 
@@ -178,14 +298,76 @@ def index():
     return {"message": "Hello World"}
 
 
+@app.get("/stats/")
+async def stats():
+    """Internal counters (bcrypt pool load, cache hit rates)."""
+    return {
+        "hash_pool": hash_pool.stats(),
+        "analytics_cache": analytics_cache.stats(),
+        "profile_cache": profiles.profile_cache.stats(),
+        "body_cache": body_cache.stats(),
+    }
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of request, SQL, cache and bcrypt pool metrics."""
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/admin/profiles/", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """Per-route request profiles recorded with PROFILING=1, slowest total first."""
+    index = profiler.read_index(profiler.PROFILE_DIR)
+    entries = [{"name": name, **entry} for name, entry in index.items()]
+    entries.sort(key=lambda entry: entry["seconds"], reverse=True)
+    return {"profiles": entries}
+
+
+@app.get("/admin/profiles/{name}", dependencies=[Depends(require_admin)])
+async def get_profile_stacks(name: str):
+    """One route's aggregated stacks in folded format (flamegraph.pl, speedscope)."""
+    path = os.path.join(profiler.PROFILE_DIR, name)
+    if not profiler.FILE_NAME.match(name) or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    with open(path, "r", encoding="utf-8") as f:
+        return Response(f.read(), media_type="text/plain; charset=utf-8")
+
+
 @app.post("/user/")
 async def user(body: UserAuth, db: Session = Depends(get_db)):
     """Verify that a user exists and credentials are valid."""
-    authenticate_user(body.username, body.password, db)
+    await authenticate_user(body.username, body.password, db)
     logger.info("User login: %s", body.username)
     return {"verdict": "This user exists."}
 
 
+@app.post("/login/")
+async def login(body: UserAuth, db: Session = Depends(get_db)):
+    """Check credentials once and issue a short-lived session token."""
+    user_obj = await authenticate_user(body.username, body.password, db)
+    token, expires_at = create_session_token(user_obj, db)
+    logger.info("Session issued: %s", body.username)
+    return {
+        "verdict": "Logged in.",
+        "token": token,
+        "token_type": "bearer",
+        "expires_at": expires_at.isoformat(),
+    }
+
+
+@app.post("/logout/")
+async def logout(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    db: Session = Depends(get_db),
+):
+    """Revoke the session token sent in the Authorization header."""
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Session token is required.")
+    revoke_session_token(credentials.credentials, db)
+    return {"verdict": "Logged out."}
+
+
 @app.post("/sign_up/")
 async def sign_up(body: SignUpRequest, db: Session = Depends(get_db)):
     """Register a new user with a hashed password."""
@@ -194,11 +376,13 @@ async def sign_up(body: SignUpRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=409, detail="This name is already taken.")
     new_user = User(
         username=body.username,
-        password=hash_password(body.password),
+        password=await hash_pool.run(hash_password, body.password),
         days={},
         bio="",
     )
     db.add(new_user)
+    db.flush()
+    search_index.index_user(db, new_user)
     db.commit()
     logger.info("New user registered: %s", body.username)
     return {"verdict": f"You successful sign up with username: {body.username}."}
@@ -208,7 +392,11 @@ async def sign_up(body: SignUpRequest, db: Session = Depends(get_db)):
 
 
 @app.post("/create_cycle/")
-async def create_cycle(body: CycleCreate, db: Session = Depends(get_db)):
+async def create_cycle(
+    body: CycleCreate,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Create a new training cycle for the user."""
     try:
         datetime.datetime.strptime(body.start_at, "%Y-%m-%d")
@@ -216,7 +404,7 @@ async def create_cycle(body: CycleCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Invalid start_at date format. Use YYYY-MM-DD.")
     if body.days_count != len(body.descriptions):
         raise HTTPException(status_code=400, detail="Invalid count elements in descriptions.")
-    authenticate_user(body.user, body.password, db)
+    await authenticate_user(body.user, body.password, db, session_user)
     if db.query(Cycle).filter(Cycle.user == body.user, Cycle.name == body.name).first():
         raise HTTPException(status_code=409, detail="You already have this cycle name.")
     new_cycle = Cycle(
@@ -224,117 +412,173 @@ async def create_cycle(body: CycleCreate, db: Session = Depends(get_db)):
         user=body.user,
         days_count=body.days_count,
         pause=body.pause,
-        descriptions=body.descriptions,
-        data=body.data_cycle,
+        body_hash=intern_body(db, body.descriptions, body.data_cycle),
         start_at=body.start_at,
         is_public=0,
     )
     db.add(new_cycle)
-    db.commit()
+    counters.bump_user(db, body.user, cycles_count=1)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="You already have this cycle name.")
+    profiles.invalidate(body.user)
     logger.info("Cycle created: %s by %s", body.name, body.user)
     return {"verdict": f"You successful create new cycle with name: {body.name}"}
 
 
 @app.post("/delete_cycle/")
-async def delete_cycle(body: CycleDelete, db: Session = Depends(get_db)):
+async def delete_cycle(
+    body: CycleDelete,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Delete a training cycle and its associated likes."""
-    authenticate_user(body.user, body.password, db)
+    await authenticate_user(body.user, body.password, db, session_user)
     cycle = db.query(Cycle).filter(Cycle.user == body.user, Cycle.name == body.cycle_name).first()
     if not cycle:
         user_cycles = [c.name for c in db.query(Cycle).filter(Cycle.user == body.user)]
         raise HTTPException(status_code=404, detail=f"Cycle not found. Your cycles: {user_cycles}")
     db.query(Like).filter(Like.cycle_id == cycle.id).delete()
+    timeline.on_unpublish(db, cycle.id)
+    trending.on_unpublish(db, cycle.id)
+    search_index.unindex_cycle(db, cycle.id)
+    counters.bump_user(
+        db, body.user, cycles_count=-1, public_cycles_count=-1 if cycle.is_public else 0
+    )
     db.delete(cycle)
+    db.flush()
+    release_body(db, cycle.body_hash)
     db.commit()
+    profiles.invalidate(body.user)
     logger.info("Cycle deleted: %s by %s", body.cycle_name, body.user)
     return {"verdict": f"Successful delete cycle: {body.cycle_name}"}
 
 
-@app.post("/user_cycles/")
-async def get_cycles(body: UserCyclesRequest, db: Session = Depends(get_db)):
+@app.post("/user_cycles/", response_model=UserCyclesResponse)
+async def get_cycles(
+    body: UserCyclesRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Get all training cycles for a user."""
-    authenticate_user(body.user, body.password, db)
-    user_cycles = list(db.query(Cycle).filter(Cycle.user == body.user))
-    return {"verdict": "Successful getting cycles.", "cycles": user_cycles}
+    await authenticate_user(body.user, body.password, db, session_user)
+    cycles = db.query(Cycle).filter(Cycle.user == body.user).all()
+    fields = VIEW_FIELDS[body.view]
+    bodies = body_fragments(db, cycles, fields)
+    user_cycles = []
+    for c in cycles:
+        user_cycles.append({
+            "id": c.id,
+            "name": c.name,
+            "user": c.user,
+            "days_count": c.days_count,
+            "pause": c.pause,
+            **{field: bodies.get(c.body_hash, EMPTY_FRAGMENTS)[field] for field in fields},
+            "start_at": c.start_at,
+            "is_public": c.is_public,
+            "original_author": c.original_author,
+            "ins_count": c.ins_count,
+        })
+    return ORJSONResponse({"verdict": "Successful getting cycles.", "cycles": user_cycles})
 
 
 # ======================== DAY / DUTIES ========================
 
 
 @app.post("/day/")
-async def day(body: DayRequest, db: Session = Depends(get_db)):
+async def day(
+    body: DayRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Get or create the duty list for a specific day."""
-    user_obj = authenticate_user(body.user, body.password, db)
+    user_obj = await authenticate_user(body.user, body.password, db, session_user)
     try:
         date = datetime.datetime.strptime(body.day, "%Y-%m-%d").date()
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid day format. Use YYYY-MM-DD.")
 
-    duties = {}
-    for cycle in db.query(Cycle).filter(Cycle.user == body.user).all():
-        cycle_date = datetime.datetime.strptime(cycle.start_at, "%Y-%m-%d").date()
-        days_diff = (date - cycle_date).days
-        day_index = days_diff % (cycle.days_count + cycle.pause)
-        try:
-            duties[cycle.descriptions[abs(day_index)]] = 0
-        except IndexError:
-            pass
+    duties = duties_on(_user_schedules(db, body.user), date)
 
-    if body.day in user_obj.days:
-        existing = user_obj.days[body.day].copy()
-        for key in duties:
-            if key in existing:
-                duties[key] = existing[key]
-
-    user_days = user_obj.days.copy()
-    user_days[body.day] = duties
-    user_obj.days = user_days.copy()
-    db.commit()
+    user_id = user_obj.id
+    # Off the event loop: the write may wait on SQLite's lock and back off
+    duties = await asyncio.to_thread(
+        db_session.retry_on_busy, db, lambda: sync_day(db, user_id, body.day, duties)
+    )
     return {"verdict": "Successful getting duties.", "duties": duties}
 
 
 @app.post("/duty/")
-async def duty(body: DutyRequest, db: Session = Depends(get_db)):
-    """Toggle the completion state of a duty."""
-    user_obj = authenticate_user(body.user, body.password, db)
-    day_data = user_obj.days.get(body.selected_date)
-    if not day_data or body.duty_name not in day_data:
-        raise HTTPException(status_code=404, detail="Duty not found for the selected date.")
-    current = day_data[body.duty_name]
-    new_days = user_obj.days.copy()
-    new_days[body.selected_date][body.duty_name] = 1 - current
-    user_obj.days = new_days.copy()
-    db.commit()
-    return {"verdict": "Successful change of duty completion.", "duties": user_obj.days.copy()}
+async def duty(
+    body: DutyRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
+    """
+    Toggle the completion state of a duty, or set it when `done` is given.
+    With `version` the change only applies if nobody changed the duty since.
+    """
+    user_obj = await authenticate_user(body.user, body.password, db, session_user)
+    user_id = user_obj.id
+    changed = await asyncio.to_thread(db_session.retry_on_busy, db, lambda: set_duty(
+        db, user_id, body.selected_date, body.duty_name, body.done, body.version
+    ))
+    if changed is None:
+        current_version = get_duty_version(db, user_id, body.selected_date, body.duty_name)
+        if current_version is None:
+            raise HTTPException(status_code=404, detail="Duty not found for the selected date.")
+        raise HTTPException(
+            status_code=409,
+            detail=f"Duty was changed concurrently (current version {current_version}).",
+        )
+    day_data = load_day(db, user_id, body.selected_date)
+    return {
+        "verdict": "Successful change of duty completion.",
+        "duties": {body.selected_date: day_data},
+        "done": changed[0],
+        "version": changed[1],
+    }
 
 
 @app.post("/month_duties/")
-async def month_duties(body: MonthRequest, db: Session = Depends(get_db)):
+async def month_duties(
+    body: MonthRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Get duty counts for each day in a month (for calendar coloring)."""
-    authenticate_user(body.user, body.password, db)
-    user_cycles = list(db.query(Cycle).filter(Cycle.user == body.user).all())
+    await authenticate_user(body.user, body.password, db, session_user)
     _, days_in_month = cal_mod.monthrange(body.year, body.month)
-    result = {}
-    for d in range(1, days_in_month + 1):
-        date = datetime.date(body.year, body.month, d)
-        date_str = date.isoformat()
-        count = 0
-        for cycle in user_cycles:
-            try:
-                cycle_date = datetime.datetime.strptime(cycle.start_at, "%Y-%m-%d").date()
-            except (ValueError, TypeError):
-                continue
-            days_diff = (date - cycle_date).days
-            total = cycle.days_count + cycle.pause
-            if total <= 0:
-                continue
-            day_index = days_diff % total
-            try:
-                if cycle.descriptions[abs(day_index)] and cycle.descriptions[abs(day_index)] != "Нет упражнений":
-                    count += 1
-            except (IndexError, TypeError):
-                pass
-        result[date_str] = count
+    schedules = _user_schedules(db, body.user)
+    result = workout_counts(
+        schedules,
+        datetime.date(body.year, body.month, 1),
+        datetime.date(body.year, body.month, days_in_month),
+    )
+    return {"days": result, "max": max(result.values()) if result else 0}
+
+
+@app.post("/range_duties/")
+async def range_duties(
+    body: RangeRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
+    """Get duty counts for every day in a date range (e.g. a full-year heatmap)."""
+    await authenticate_user(body.user, body.password, db, session_user)
+    try:
+        start = datetime.datetime.strptime(body.start, "%Y-%m-%d").date()
+        end = datetime.datetime.strptime(body.end, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
+    if end < start:
+        raise HTTPException(status_code=400, detail="Range end must not be before its start.")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range must not exceed {MAX_RANGE_DAYS} days.")
+    schedules = _user_schedules(db, body.user)
+    result = workout_counts(schedules, start, end)
     return {"days": result, "max": max(result.values()) if result else 0}
 
 
@@ -342,22 +586,31 @@ async def month_duties(body: MonthRequest, db: Session = Depends(get_db)):
 
 
 @app.post("/create_note/")
-async def create_note(body: NoteCreate, db: Session = Depends(get_db)):
+async def create_note(
+    body: NoteCreate,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Create a new note for the user."""
-    authenticate_user(body.user, body.password, db)
+    await authenticate_user(body.user, body.password, db, session_user)
     import uuid
     note_name = body.name if body.name.strip() else f"note_{uuid.uuid4().hex[:8]}"
     if db.query(Note).filter(Note.user == body.user, Note.name == note_name).first():
         note_name = f"{note_name}_{uuid.uuid4().hex[:6]}"
     db.add(Note(name=note_name, user=body.user, descriptions=body.descriptions))
     db.commit()
+    profiles.invalidate(body.user)
     return {"verdict": f"Note created."}
 
 
-@app.post("/get_notes/")
-async def get_notes(body: NotesRequest, db: Session = Depends(get_db)):
+@app.post("/get_notes/", response_model=NotesResponse)
+async def get_notes(
+    body: NotesRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Get all notes for a user."""
-    authenticate_user(body.user, body.password, db)
+    await authenticate_user(body.user, body.password, db, session_user)
     notes = list(db.query(Note).filter(Note.user == body.user).order_by(Note.id.desc()))
     return {"verdict": "Successful getting notes.", "notes": [{
         "id": n.id, "name": n.name, "user": n.user,
@@ -367,15 +620,20 @@ async def get_notes(body: NotesRequest, db: Session = Depends(get_db)):
 
 
 @app.post("/delete_note/")
-async def delete_note(body: NoteDelete, db: Session = Depends(get_db)):
+async def delete_note(
+    body: NoteDelete,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Delete a note by name."""
-    authenticate_user(body.user, body.password, db)
+    await authenticate_user(body.user, body.password, db, session_user)
     note = db.query(Note).filter(Note.user == body.user, Note.name == body.note_name).first()
     if not note:
         user_notes = [n.name for n in db.query(Note).filter(Note.user == body.user)]
         raise HTTPException(status_code=404, detail=f"Note not found. Your notes: {user_notes}")
     db.delete(note)
     db.commit()
+    profiles.invalidate(body.user)
     return {"verdict": f"Successful delete note: {body.note_name}"}
 
 
@@ -383,137 +641,85 @@ async def delete_note(body: NoteDelete, db: Session = Depends(get_db)):
 
 
 @app.post("/analytics/")
-async def analytics(body: AnalyticsRequest, db: Session = Depends(get_db)):
+async def analytics(
+    body: AnalyticsRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Calculate muscle load analytics for a training cycle."""
-    authenticate_user(body.user, body.password, db)
-    try:
-        with open("db/exercises.json", "r", encoding="utf-8") as f:
-            exercises_db = json.load(f)
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Exercises database not found.")
-
-    cycle = db.query(Cycle).filter(Cycle.user == body.user, Cycle.name == body.cycle_name).first()
+    await authenticate_user(body.user, body.password, db, session_user)
+    cycle = (
+        db.query(Cycle)
+        .filter(Cycle.user == body.user, Cycle.name == body.cycle_name)
+        .options(joinedload(Cycle.body))
+        .first()
+    )
     if not cycle:
         raise HTTPException(status_code=404, detail=f"Cycle '{body.cycle_name}' not found.")
     if not cycle.data:
         raise HTTPException(status_code=400, detail="Cycle data is empty.")
 
-    daily_analytics = {}
-    total_analytics = {m: 0.0 for m in MUSCLE_GROUPS}
-    days_count = len(cycle.data)
-
-    for day_name, day_exercises in cycle.data.items():
-        day_load = {m: 0.0 for m in MUSCLE_GROUPS}
-        for ex in day_exercises:
-            ex_id = str(ex.get("id", ""))
-            if not ex_id:
-                continue
-            sets = int(ex.get("sets", 3))
-            info = exercises_db[int(ex_id)]
-            if not info:
-                continue
-            for muscle, pr in info.get("muscles", {}).items():
-                wl = round(sets * float(pr) * (7 / days_count), 2)
-                if muscle in day_load:
-                    day_load[muscle] += wl
-                if muscle in total_analytics:
-                    total_analytics[muscle] += wl
-        daily_analytics[day_name] = day_load
-
-    avg_daily = {m: 0.0 for m in MUSCLE_GROUPS}
-    if days_count > 0:
-        for m in MUSCLE_GROUPS:
-            avg_daily[m] = round(
-                sum(daily_analytics[d][m] for d in daily_analytics) * (7 / days_count), 2
-            )
-
-    optimal_prs = {}
-    for mid, load in total_analytics.items():
-        opt = MUSCLE_GROUPS.get(mid, {}).get("optimal_weekly", 10)
-        optimal_prs[mid] = round((load / opt) * 100, 1) if opt > 0 else 0
-
-    THRESHOLDS = [
-        (130, "overloaded", "#ff4444"),
-        (80, "optimal", "#44ff44"),
-        (40, "moderate", "#ffa500"),
-        (10, "underloaded", "#ffff00"),
-        (0, "untrained", "#cccccc"),
-    ]
-    load_status = {}
-    for mid, pr in optimal_prs.items():
-        for thr, lbl, clr in THRESHOLDS:
-            if pr > thr:
-                load_status[mid] = {"status": lbl, "color": clr, "pr": pr}
-                break
-
-    MSGS = {
-        "overloaded": ("Перегрузка ({pr}%). Снизьте нагрузку.", "high"),
-        "optimal": ("Оптимально ({pr}%).", "low"),
-        "moderate": ("Средняя нагрузка ({pr}%). Можно увеличить.", "medium"),
-        "underloaded": ("Недогруз ({pr}%). Добавьте упражнения.", "high"),
-        "untrained": ("Не тренируется ({pr}%).", "high"),
-    }
-    recs = []
-    for mid, data in load_status.items():
-        name = MUSCLE_GROUPS[mid]["name"]
-        tmpl, prio = MSGS[data["status"]]
-        recs.append({
-            "message": f"{name}: {tmpl.format(pr=data['pr'])}",
-            "priority": prio,
-            "muscle": name,
-        })
-    recs.sort(key=lambda x: {"high": 0, "medium": 1, "low": 2}[x["priority"]])
-
+    result = cached_analyze_cycle(cycle.data, _exercise_catalog())
     return {
         "verdict": "Analytics calculated successfully",
         "cycle_name": body.cycle_name,
-        "days_count": days_count,
-        "daily_analytics": daily_analytics,
-        "total_analytics": total_analytics,
-        "average_daily": avg_daily,
-        "optimal_percentages": optimal_prs,
-        "load_status": load_status,
-        "recommendations": recs[:5],
+        **result,
     }
 
 
 @app.post("/get_exercises/")
 async def exercises():
     """Return all available exercises."""
-    try:
-        with open("db/exercises.json", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Exercises database not found.")
+    return Response(content=_exercise_catalog().payload, media_type="application/json")
 
 
 # ======================== SOCIAL: PUBLISH ========================
 
 
 @app.post("/publish_cycle/")
-async def publish_cycle(body: PublishCycleRequest, db: Session = Depends(get_db)):
+async def publish_cycle(
+    body: PublishCycleRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Make a training cycle public. Only original (non-cloned) cycles can be published."""
-    authenticate_user(body.user, body.password, db)
+    await authenticate_user(body.user, body.password, db, session_user)
     cycle = db.query(Cycle).filter(Cycle.user == body.user, Cycle.name == body.cycle_name).first()
     if not cycle:
         raise HTTPException(status_code=404, detail="Cycle not found.")
     if getattr(cycle, "original_author", ""):
         raise HTTPException(status_code=403, detail="Cloned cycles cannot be published. Only your own creations can be public.")
+    if not cycle.is_public:
+        counters.bump_user(db, body.user, public_cycles_count=1)
     cycle.is_public = 1
+    timeline.on_publish(db, cycle)
+    trending.on_publish(db, cycle.id)
+    search_index.index_cycle(db, cycle, catalog)
     db.commit()
+    profiles.invalidate(body.user)
     logger.info("Cycle published: %s by %s", body.cycle_name, body.user)
     return {"verdict": f"Cycle '{body.cycle_name}' is now public."}
 
 
 @app.post("/unpublish_cycle/")
-async def unpublish_cycle(body: PublishCycleRequest, db: Session = Depends(get_db)):
+async def unpublish_cycle(
+    body: PublishCycleRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Make a training cycle private."""
-    authenticate_user(body.user, body.password, db)
+    await authenticate_user(body.user, body.password, db, session_user)
     cycle = db.query(Cycle).filter(Cycle.user == body.user, Cycle.name == body.cycle_name).first()
     if not cycle:
         raise HTTPException(status_code=404, detail="Cycle not found.")
+    if cycle.is_public:
+        counters.bump_user(db, body.user, public_cycles_count=-1)
     cycle.is_public = 0
+    timeline.on_unpublish(db, cycle.id)
+    trending.on_unpublish(db, cycle.id)
+    search_index.unindex_cycle(db, cycle.id)
     db.commit()
+    profiles.invalidate(body.user)
     logger.info("Cycle unpublished: %s by %s", body.cycle_name, body.user)
     return {"verdict": f"Cycle '{body.cycle_name}' is now private."}
 
@@ -522,9 +728,13 @@ async def unpublish_cycle(body: PublishCycleRequest, db: Session = Depends(get_d
 
 
 @app.post("/follow/")
-async def follow_user(body: FollowRequest, db: Session = Depends(get_db)):
+async def follow_user(
+    body: FollowRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Follow another user."""
-    authenticate_user(body.user, body.password, db)
+    await authenticate_user(body.user, body.password, db, session_user)
     if body.user == body.target_user:
         raise HTTPException(status_code=400, detail="You cannot follow yourself.")
     target = db.query(User).filter(User.username == body.target_user).first()
@@ -536,51 +746,105 @@ async def follow_user(body: FollowRequest, db: Session = Depends(get_db)):
     if existing:
         raise HTTPException(status_code=409, detail="Already following this user.")
     db.add(Follow(follower=body.user, following=body.target_user))
+    counters.bump_user(db, body.user, following_count=1)
+    counters.bump_user(db, body.target_user, followers_count=1)
+    timeline.on_follow(db, body.user, body.target_user)
     db.commit()
+    profiles.invalidate(body.user, body.target_user)
     logger.info("%s followed %s", body.user, body.target_user)
     return {"verdict": f"You are now following {body.target_user}."}
 
 
 @app.post("/unfollow/")
-async def unfollow_user(body: FollowRequest, db: Session = Depends(get_db)):
+async def unfollow_user(
+    body: FollowRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Unfollow a user."""
-    authenticate_user(body.user, body.password, db)
+    await authenticate_user(body.user, body.password, db, session_user)
     follow_obj = db.query(Follow).filter(
         Follow.follower == body.user, Follow.following == body.target_user
     ).first()
     if not follow_obj:
         raise HTTPException(status_code=404, detail="You are not following this user.")
     db.delete(follow_obj)
+    counters.bump_user(db, body.user, following_count=-1)
+    counters.bump_user(db, body.target_user, followers_count=-1)
+    timeline.on_unfollow(db, body.user, body.target_user)
     db.commit()
+    profiles.invalidate(body.user, body.target_user)
     logger.info("%s unfollowed %s", body.user, body.target_user)
     return {"verdict": f"You unfollowed {body.target_user}."}
 
 
-@app.get("/followers/{username}/")
-async def get_followers(username: str, db: Session = Depends(get_db)):
-    """Get the list of followers for a user."""
-    if not db.query(User).filter(User.username == username).first():
+@app.get(
+    "/followers/{username}/",
+    response_model=FollowersResponse,
+    response_model_exclude_unset=True,
+)
+async def get_followers(
+    username: str,
+    cursor: str = "",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    viewer: str = "",
+    db: Session = Depends(get_read_db),
+):
+    """Get a page of a user's followers, newest first; `viewer` adds is_following."""
+    user_obj = db.query(User).filter(User.username == username).first()
+    if not user_obj:
         raise HTTPException(status_code=404, detail="User not found.")
-    followers = [f.follower for f in db.query(Follow).filter(Follow.following == username)]
-    return {"username": username, "followers": followers, "count": len(followers)}
+    rows, next_cursor = paginate(
+        db.query(Follow.id, Follow.follower).filter(Follow.following == username),
+        [Follow.id], cursor, limit, key=lambda row: (row.id,),
+    )
+    result = {
+        "username": username,
+        "followers": [row.follower for row in rows],
+        "count": user_obj.followers_count,
+        "next_cursor": next_cursor,
+    }
+    if viewer:
+        result["is_following"] = db.query(Follow.id).filter(
+            Follow.follower == viewer, Follow.following == username
+        ).first() is not None
+    return result
 
 
-@app.get("/following/{username}/")
-async def get_following(username: str, db: Session = Depends(get_db)):
-    """Get the list of users that a user is following."""
-    if not db.query(User).filter(User.username == username).first():
+@app.get("/following/{username}/", response_model=FollowingResponse)
+async def get_following(
+    username: str,
+    cursor: str = "",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db),
+):
+    """Get a page of the users that a user is following, newest first."""
+    user_obj = db.query(User).filter(User.username == username).first()
+    if not user_obj:
         raise HTTPException(status_code=404, detail="User not found.")
-    following = [f.following for f in db.query(Follow).filter(Follow.follower == username)]
-    return {"username": username, "following": following, "count": len(following)}
+    rows, next_cursor = paginate(
+        db.query(Follow.id, Follow.following).filter(Follow.follower == username),
+        [Follow.id], cursor, limit, key=lambda row: (row.id,),
+    )
+    return {
+        "username": username,
+        "following": [row.following for row in rows],
+        "count": user_obj.following_count,
+        "next_cursor": next_cursor,
+    }
 
 
 # ======================== SOCIAL: LIKES ========================
 
 
 @app.post("/like_cycle/")
-async def like_cycle(body: LikeCycleRequest, db: Session = Depends(get_db)):
+async def like_cycle(
+    body: LikeCycleRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """IN a public training cycle — marks it and clones to user's private list."""
-    authenticate_user(body.user, body.password, db)
+    await authenticate_user(body.user, body.password, db, session_user)
     cycle = db.query(Cycle).filter(Cycle.id == body.cycle_id, Cycle.is_public == 1).first()
     if not cycle:
         raise HTTPException(status_code=404, detail="Public cycle not found.")
@@ -588,38 +852,42 @@ async def like_cycle(body: LikeCycleRequest, db: Session = Depends(get_db)):
     if existing:
         raise HTTPException(status_code=409, detail="Already IN.")
     db.add(Like(user=body.user, cycle_id=body.cycle_id))
+    ins_count = counters.bump_ins(db, body.cycle_id, 1)
+    trending.on_like(db, body.cycle_id)
     # Clone to user's private workouts
     if cycle.user != body.user:
-        original = getattr(cycle, "original_author", "") or cycle.user
-        base_name = cycle.name
-        new_name = base_name
-        counter = 1
-        while db.query(Cycle).filter(Cycle.user == body.user, Cycle.name == new_name).first():
-            counter += 1
-            new_name = f"{base_name} ({counter})"
-        today = datetime.date.today().isoformat()
-        new_cycle = Cycle(
-            name=new_name, user=body.user, days_count=cycle.days_count,
-            pause=cycle.pause, descriptions=cycle.descriptions, data=cycle.data,
-            start_at=today, is_public=0, original_author=original,
-        )
-        db.add(new_cycle)
-    db.commit()
-    ins_count = db.query(Like).filter(Like.cycle_id == body.cycle_id).count()
+        cloning.clone_cycles(db, body.user, [cycle], datetime.date.today().isoformat())
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        # A concurrent like of the same cycle, or a clone that took the same name
+        if db.query(Like.id).filter(Like.user == body.user, Like.cycle_id == body.cycle_id).first():
+            raise HTTPException(status_code=409, detail="Already IN.")
+        raise HTTPException(status_code=409, detail="Cycle names changed concurrently, try again.")
+    profiles.invalidate(cycle.user, body.user)
     logger.info("%s IN cycle #%d", body.user, body.cycle_id)
     return {"verdict": "IN!", "ins_count": ins_count}
 
 
 @app.post("/unlike_cycle/")
-async def unlike_cycle(body: LikeCycleRequest, db: Session = Depends(get_db)):
+async def unlike_cycle(
+    body: LikeCycleRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Remove a like from a training cycle."""
-    authenticate_user(body.user, body.password, db)
+    await authenticate_user(body.user, body.password, db, session_user)
     like_obj = db.query(Like).filter(Like.user == body.user, Like.cycle_id == body.cycle_id).first()
     if not like_obj:
         raise HTTPException(status_code=404, detail="Like not found.")
+    trending.on_unlike(db, like_obj)
     db.delete(like_obj)
+    ins_count = counters.bump_ins(db, body.cycle_id, -1) or 0
+    owner = db.query(Cycle.user).filter(Cycle.id == body.cycle_id).scalar()
     db.commit()
-    ins_count = db.query(Like).filter(Like.cycle_id == body.cycle_id).count()
+    if owner:
+        profiles.invalidate(owner)
     logger.info("%s un-IN cycle #%d", body.user, body.cycle_id)
     return {"verdict": "Removed.", "ins_count": ins_count}
 
@@ -627,249 +895,246 @@ async def unlike_cycle(body: LikeCycleRequest, db: Session = Depends(get_db)):
 # ======================== SOCIAL: FEED & SEARCH ========================
 
 
-@app.post("/feed/")
-async def feed(body: FeedRequest, db: Session = Depends(get_db)):
-    """Get public cycles: from followed users, or top by IN count globally."""
-    from sqlalchemy import func
-    authenticate_user(body.user, body.password, db)
-    following = [f.following for f in db.query(Follow).filter(Follow.follower == body.user)]
-    sources = following + [body.user]  # include own published
-    if following:
+@app.post("/feed/", response_model=FeedResponse)
+async def feed(
+    body: FeedRequest,
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
+    """Get public cycles: from followed users, or trending ones globally."""
+    await authenticate_user(body.user, body.password, db, session_user)
+    follows_anyone = read_db.query(Follow.id).filter(Follow.follower == body.user).first()
+    if follows_anyone:
+        # Followed users' and own published cycles, from the materialized timeline
+        position = decode_cursor(body.cursor, 1)
+        cycle_ids = timeline.feed_cycle_ids(
+            read_db, body.user, body.limit + 1, position[0] if position else None
+        )
         cycles = (
-            db.query(Cycle)
-            .filter(Cycle.user.in_(sources), Cycle.is_public == 1)
+            read_db.query(Cycle)
+            .filter(Cycle.id.in_(cycle_ids))
             .order_by(Cycle.id.desc())
-            .limit(50)
             .all()
-        )
+        ) if cycle_ids else []
+        cycles, next_cursor = page(cycles, body.limit, key=lambda c: (c.id,))
     else:
-        # No subscriptions — show global top by IN count + own published
-        from sqlalchemy import or_
-        cycles = (
-            db.query(Cycle)
-            .outerjoin(Like, Like.cycle_id == Cycle.id)
-            .filter(Cycle.is_public == 1)
-            .group_by(Cycle.id)
-            .order_by(func.count(Like.id).desc(), Cycle.id.desc())
-            .limit(50)
-            .all()
-        )
-    result = _cycles_to_dicts(cycles, db, body.user)
-    return {"verdict": f"Feed loaded. {len(result)} cycles.", "cycles": result}
-
-
-@app.post("/search_cycles/")
-async def search_cycles(body: SearchRequest, db: Session = Depends(get_db)):
-    """Search public training cycles by name. Auth is optional (for is_liked)."""
+        # No subscriptions — show what is trending globally
+        cycles, next_cursor = trending.page_trending(read_db, body.cursor, body.limit)
+    result = _cycles_to_dicts(cycles, read_db, body.user, body.view)
+    return ORJSONResponse({
+        "verdict": f"Feed loaded. {len(result)} cycles.",
+        "cycles": result,
+        "next_cursor": next_cursor,
+    })
+
+
+@app.get("/trending/", response_model=CyclePage)
+async def get_trending(
+    cursor: str = "",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db),
+):
+    """Public cycles ranked by recent INs (time-decayed), one page at a time."""
+    cycles, next_cursor = trending.page_trending(db, cursor, limit)
+    return ORJSONResponse({"cycles": _cycles_to_dicts(cycles, db), "next_cursor": next_cursor})
+
+
+@app.post("/search_cycles/", response_model=FeedResponse)
+async def search_cycles(
+    body: SearchRequest,
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
+    """
+    Search public cycles by name, day descriptions and exercise names,
+    best matches first. Auth is optional (for is_liked).
+    """
     current_user = ""
-    if body.user and body.password:
+    if body.user and (body.password or session_user):
         try:
-            authenticate_user(body.user, body.password, db)
+            await authenticate_user(body.user, body.password, db, session_user)
             current_user = body.user
         except HTTPException:
             pass
 
     q = body.query.strip()
-    query = db.query(Cycle).filter(Cycle.is_public == 1)
-    if q:
-        query = query.filter(Cycle.name.ilike(f"%{q}%"))
-    cycles = query.order_by(Cycle.id.desc()).limit(50).all()
+    match = search_index.match_query(q)
+    if match and search_index.available(read_db):
+        cycles, next_cursor = search_index.search_cycles(read_db, match, body.cursor, body.limit)
+    else:
+        query = read_db.query(Cycle).filter(Cycle.is_public == 1)
+        if q:
+            query = query.filter(Cycle.name.ilike(f"%{q}%"))
+        cycles, next_cursor = paginate(
+            query, [Cycle.id], body.cursor, body.limit, key=lambda c: (c.id,)
+        )
 
-    result = _cycles_to_dicts(cycles, db, current_user)
-    return {"verdict": f"Found {len(result)} cycles.", "cycles": result}
+    result = _cycles_to_dicts(cycles, read_db, current_user, body.view)
+    return ORJSONResponse({
+        "verdict": f"Found {len(result)} cycles.",
+        "cycles": result,
+        "next_cursor": next_cursor,
+    })
 
 
-@app.post("/search_users/")
-async def search_users(body: SearchRequest, db: Session = Depends(get_db)):
-    """Search users by username."""
+@app.post("/search_users/", response_model=UsersResponse)
+async def search_users(body: SearchRequest, db: Session = Depends(get_read_db)):
+    """Search users by username and bio prefixes, best matches first."""
     q = body.query.strip()
     if not q:
         return {"users": []}
-    users = db.query(User).filter(User.username.ilike(f"%{q}%")).limit(20).all()
+    match = search_index.match_query(q)
+    if match and search_index.available(db):
+        users = search_index.search_users(db, match, 20)
+    else:
+        users = db.query(User).filter(User.username.ilike(f"%{q}%")).limit(20).all()
     result = []
     for u in users:
-        cycles_count = db.query(Cycle).filter(Cycle.user == u.username).count()
-        followers_count = db.query(Follow).filter(Follow.following == u.username).count()
         result.append({
             "username": u.username,
             "bio": getattr(u, "bio", "") or "",
-            "cycles_count": cycles_count,
-            "followers_count": followers_count,
+            "cycles_count": u.cycles_count,
+            "followers_count": u.followers_count,
         })
     return {"users": result}
 
 
 @app.post("/clone_cycle/")
-async def clone_cycle(body: CloneCycleRequest, db: Session = Depends(get_db)):
+async def clone_cycle(
+    body: CloneCycleRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Clone a public cycle to the authenticated user's account."""
-    authenticate_user(body.user, body.password, db)
+    await authenticate_user(body.user, body.password, db, session_user)
     cycle = db.query(Cycle).filter(Cycle.id == body.cycle_id, Cycle.is_public == 1).first()
     if not cycle:
         raise HTTPException(status_code=404, detail="Public cycle not found.")
-    # Determine original author (follow chain)
-    original = getattr(cycle, "original_author", "") or cycle.user
-    # Generate unique name
-    base_name = cycle.name
-    new_name = base_name
-    counter = 1
-    while db.query(Cycle).filter(Cycle.user == body.user, Cycle.name == new_name).first():
-        counter += 1
-        new_name = f"{base_name} ({counter})"
-    new_cycle = Cycle(
-        name=new_name,
-        user=body.user,
-        days_count=cycle.days_count,
-        pause=cycle.pause,
-        descriptions=cycle.descriptions,
-        data=cycle.data,
-        start_at=body.start_at,
-        is_public=0,
-        original_author=original,
-    )
-    db.add(new_cycle)
-    db.commit()
+    new_name = cloning.clone_cycles(db, body.user, [cycle], body.start_at)[0].name
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Cycle names changed concurrently, try again.")
+    profiles.invalidate(body.user)
     logger.info("%s cloned cycle #%d ('%s') from %s", body.user, cycle.id, cycle.name, cycle.user)
     return {"verdict": f"Cycle '{new_name}' cloned successfully.", "new_name": new_name}
 
 
+@app.post("/clone_cycles/")
+async def clone_cycles(
+    body: BulkCloneRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
+    """Clone several public cycles to the authenticated user's account in one transaction."""
+    try:
+        datetime.datetime.strptime(body.start_at, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid start_at date format. Use YYYY-MM-DD.")
+    await authenticate_user(body.user, body.password, db, session_user)
+    found = {
+        c.id: c for c in
+        db.query(Cycle).filter(Cycle.id.in_(body.cycle_ids), Cycle.is_public == 1)
+    }
+    missing = [cycle_id for cycle_id in body.cycle_ids if cycle_id not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Public cycles not found: {missing}")
+    sources = [found[cycle_id] for cycle_id in body.cycle_ids]
+    clones = cloning.clone_cycles(db, body.user, sources, body.start_at)
+    # Read before commit expires the objects, which would reload each one
+    result = [
+        {"cycle_id": source.id, "new_name": clone.name}
+        for source, clone in zip(sources, clones)
+    ]
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Cycle names changed concurrently, try again.")
+    profiles.invalidate(body.user)
+    logger.info("%s cloned %d cycles", body.user, len(result))
+    return {"verdict": f"{len(result)} cycles cloned successfully.", "clones": result}
+
+
 @app.post("/analytics_public/")
-async def analytics_public(body: AnalyticsPublicRequest, db: Session = Depends(get_db)):
+async def analytics_public(
+    body: AnalyticsPublicRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Calculate analytics for any user's public cycle."""
-    authenticate_user(body.user, body.password, db)
+    await authenticate_user(body.user, body.password, db, session_user)
     cycle = db.query(Cycle).filter(
         Cycle.user == body.target_user,
         Cycle.name == body.cycle_name,
         Cycle.is_public == 1,
-    ).first()
+    ).options(joinedload(Cycle.body)).first()
     if not cycle:
         raise HTTPException(status_code=404, detail=f"Public cycle '{body.cycle_name}' not found for user '{body.target_user}'.")
     if not cycle.data:
         raise HTTPException(status_code=400, detail="Cycle data is empty.")
 
-    try:
-        with open("db/exercises.json", "r", encoding="utf-8") as f:
-            exercises_db = json.load(f)
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Exercises database not found.")
-
-    daily_analytics = {}
-    total_analytics = {m: 0.0 for m in MUSCLE_GROUPS}
-    days_count = len(cycle.data)
-    for day_name, day_exercises in cycle.data.items():
-        day_load = {m: 0.0 for m in MUSCLE_GROUPS}
-        for ex in day_exercises:
-            ex_id = str(ex.get("id", ""))
-            if not ex_id:
-                continue
-            sets = int(ex.get("sets", 3))
-            info = exercises_db[int(ex_id)]
-            if not info:
-                continue
-            for muscle, pr in info.get("muscles", {}).items():
-                wl = round(sets * float(pr) * (7 / days_count), 2)
-                if muscle in day_load:
-                    day_load[muscle] += wl
-                if muscle in total_analytics:
-                    total_analytics[muscle] += wl
-        daily_analytics[day_name] = day_load
-
-    optimal_prs = {}
-    for mid, load in total_analytics.items():
-        opt = MUSCLE_GROUPS.get(mid, {}).get("optimal_weekly", 10)
-        optimal_prs[mid] = round((load / opt) * 100, 1) if opt > 0 else 0
-
-    THRESHOLDS = [
-        (130, "overloaded", "#ff4444"),
-        (80, "optimal", "#44ff44"),
-        (40, "moderate", "#ffa500"),
-        (10, "underloaded", "#ffff00"),
-        (0, "untrained", "#cccccc"),
-    ]
-    load_status = {}
-    for mid, pr in optimal_prs.items():
-        for thr, lbl, clr in THRESHOLDS:
-            if pr > thr:
-                load_status[mid] = {"status": lbl, "color": clr, "pr": pr}
-                break
-
-    MSGS = {
-        "overloaded": ("Перегрузка ({pr}%). Снизьте нагрузку.", "high"),
-        "optimal": ("Оптимально ({pr}%).", "low"),
-        "moderate": ("Средняя нагрузка ({pr}%). Можно увеличить.", "medium"),
-        "underloaded": ("Недогруз ({pr}%). Добавьте упражнения.", "high"),
-        "untrained": ("Не тренируется ({pr}%).", "high"),
-    }
-    recs = []
-    for mid, data in load_status.items():
-        name = MUSCLE_GROUPS[mid]["name"]
-        tmpl, prio = MSGS[data["status"]]
-        recs.append({
-            "message": f"{name}: {tmpl.format(pr=data['pr'])}",
-            "priority": prio,
-            "muscle": name,
-        })
-    recs.sort(key=lambda x: {"high": 0, "medium": 1, "low": 2}[x["priority"]])
-
+    result = cached_analyze_cycle(cycle.data, _exercise_catalog())
     return {
         "verdict": "Analytics calculated successfully",
         "cycle_name": body.cycle_name,
-        "days_count": days_count,
-        "load_status": load_status,
-        "recommendations": recs[:5],
+        "days_count": result["days_count"],
+        "load_status": result["load_status"],
+        "recommendations": result["recommendations"],
     }
 
 
 # ======================== SOCIAL: PROFILE ========================
 
 
-@app.get("/profile/{username}/")
-async def get_profile(username: str, db: Session = Depends(get_db)):
-    """Get a user's public profile with stats."""
-    user_obj = db.query(User).filter(User.username == username).first()
-    if not user_obj:
+@app.get("/profile/{username}/", response_model=ProfileResponse)
+async def get_profile(
+    username: str,
+    view: CycleView = "full",
+    db: Session = Depends(get_read_db),
+):
+    """Get a user's public profile with stats (cached per user and view, see profiles.py)."""
+    cached = profiles.get(username, view)
+    if cached is not None:
+        return ORJSONResponse(cached)
+    gen = profiles.generation(username)
+    stats = profiles.profile_stats(db, username)
+    if stats is None:
         raise HTTPException(status_code=404, detail="User not found.")
-
-    cycles_count = db.query(Cycle).filter(Cycle.user == username).count()
-    public_cycles_count = db.query(Cycle).filter(
-        Cycle.user == username, Cycle.is_public == 1
-    ).count()
-    followers_count = db.query(Follow).filter(Follow.following == username).count()
-    following_count = db.query(Follow).filter(Follow.follower == username).count()
-    notes_count = db.query(Note).filter(Note.user == username).count()
-
-    public_cycle_ids = [
-        c.id for c in db.query(Cycle).filter(Cycle.user == username, Cycle.is_public == 1)
-    ]
-    total_ins = (
-        db.query(Like).filter(Like.cycle_id.in_(public_cycle_ids)).count()
-        if public_cycle_ids
-        else 0
-    )
-
     public_cycles = db.query(Cycle).filter(
         Cycle.user == username, Cycle.is_public == 1
     ).all()
-    cycles_data = _cycles_to_dicts(public_cycles, db)
 
-    return {
+    result = {
         "username": username,
-        "bio": getattr(user_obj, "bio", "") or "",
-        "cycles_count": cycles_count,
-        "public_cycles_count": public_cycles_count,
-        "followers_count": followers_count,
-        "following_count": following_count,
-        "notes_count": notes_count,
-        "total_ins": total_ins,
-        "public_cycles": cycles_data,
+        "bio": stats.bio or "",
+        "cycles_count": stats.cycles_count,
+        "public_cycles_count": stats.public_cycles_count,
+        "followers_count": stats.followers_count,
+        "following_count": stats.following_count,
+        "notes_count": stats.notes_count,
+        "total_ins": sum(c.ins_count for c in public_cycles),
+        "public_cycles": _cycles_to_dicts(public_cycles, db, view=view),
     }
+    profiles.store(username, gen, result, view)
+    return ORJSONResponse(result)
 
 
 @app.post("/update_profile/")
-async def update_profile(body: UpdateProfileRequest, db: Session = Depends(get_db)):
+async def update_profile(
+    body: UpdateProfileRequest,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Update the authenticated user's profile."""
-    user_obj = authenticate_user(body.user, body.password, db)
+    user_obj = await authenticate_user(body.user, body.password, db, session_user)
     user_obj.bio = body.bio
+    search_index.index_user(db, user_obj)
     db.commit()
+    profiles.invalidate(body.user)
     logger.info("Profile updated: %s", body.user)
     return {"verdict": "Profile updated."}
 
@@ -878,9 +1143,13 @@ async def update_profile(body: UpdateProfileRequest, db: Session = Depends(get_d
 
 
 @app.post("/create_comment/")
-async def create_comment(body: CommentCreate, db: Session = Depends(get_db)):
+async def create_comment(
+    body: CommentCreate,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Create a comment on a cycle or note."""
-    authenticate_user(body.user, body.password, db)
+    await authenticate_user(body.user, body.password, db, session_user)
     if body.target_type not in ("cycle", "note"):
         raise HTTPException(status_code=400, detail="target_type must be 'cycle' or 'note'.")
     comment = Comment(
@@ -899,9 +1168,13 @@ async def create_comment(body: CommentCreate, db: Session = Depends(get_db)):
 
 
 @app.post("/delete_comment/")
-async def delete_comment(body: CommentDelete, db: Session = Depends(get_db)):
+async def delete_comment(
+    body: CommentDelete,
+    db: Session = Depends(get_db),
+    session_user: Optional[User] = Depends(get_session_user),
+):
     """Delete own comment."""
-    authenticate_user(body.user, body.password, db)
+    await authenticate_user(body.user, body.password, db, session_user)
     comment = db.query(Comment).filter(Comment.id == body.comment_id, Comment.user == body.user).first()
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found or not yours.")
@@ -910,27 +1183,29 @@ async def delete_comment(body: CommentDelete, db: Session = Depends(get_db)):
     return {"verdict": "Comment deleted."}
 
 
-@app.post("/get_comments/")
-async def get_comments(body: CommentsRequest, db: Session = Depends(get_db)):
-    """Get comments for a cycle or note."""
-    comments = (
-        db.query(Comment)
-        .filter(Comment.target_type == body.target_type, Comment.target_id == body.target_id)
-        .order_by(Comment.id.desc())
-        .limit(100)
-        .all()
+@app.post("/get_comments/", response_model=CommentsResponse)
+async def get_comments(body: CommentsRequest, db: Session = Depends(get_read_db)):
+    """Get a page of comments for a cycle or note, newest first."""
+    comments, next_cursor = paginate(
+        db.query(Comment).filter(
+            Comment.target_type == body.target_type, Comment.target_id == body.target_id
+        ),
+        [Comment.id], body.cursor, body.limit, key=lambda c: (c.id,),
     )
     return {"comments": [{
         "id": c.id, "user": c.user, "text": c.text,
         "created_at": c.created_at.isoformat() if c.created_at else "",
-    } for c in comments]}
+    } for c in comments], "next_cursor": next_cursor}
 
 
-@app.post("/get_in_users/")
-async def get_in_users(body: InUsersRequest, db: Session = Depends(get_db)):
-    """Get list of users who IN'd a cycle."""
-    likes = db.query(Like).filter(Like.cycle_id == body.cycle_id).all()
-    return {"users": [l.user for l in likes]}
+@app.post("/get_in_users/", response_model=InUsersResponse)
+async def get_in_users(body: InUsersRequest, db: Session = Depends(get_read_db)):
+    """Get a page of users who IN'd a cycle, most recent first."""
+    likes, next_cursor = paginate(
+        db.query(Like.id, Like.user).filter(Like.cycle_id == body.cycle_id),
+        [Like.id], body.cursor, body.limit, key=lambda l: (l.id,),
+    )
+    return {"users": [l.user for l in likes], "next_cursor": next_cursor}
 
 
 # ======================== MAIN ========================
@@ -0,0 +1,22 @@
+import { useState } from 'react'
+import { Loader2 } from 'lucide-react'
+import { Button } from './ui/Button'
+
+// "Показать ещё" for cursor-paginated lists; hidden once there is no next page
+export default function LoadMore({ hasMore, onMore }) {
+  const [loading, setLoading] = useState(false)
+  if (!hasMore) return null
+
+  const more = async () => {
+    setLoading(true)
+    try { await onMore() } catch {}
+    finally { setLoading(false) }
+  }
+
+  return (
+    <Button variant="outline" className="w-full" onClick={more} disabled={loading}>
+      {loading && <Loader2 className="w-4 h-4 animate-spin" />}
+      Показать ещё
+    </Button>
+  )
+}
@@ -0,0 +1,32 @@
+import { Link } from 'react-router-dom'
+import { Avatar, AvatarFallback } from './ui/Avatar'
+import LoadMore from './LoadMore'
+
+// Followers / following tab: one page of usernames plus "load more"
+export default function UserList({ users, me, empty, hasMore, onMore }) {
+  if (!users.length) {
+    return (
+      <div className="text-center py-12 text-muted-foreground">
+        <p>{empty}</p>
+      </div>
+    )
+  }
+
+  return (
+    <div className="space-y-2">
+      {users.map(u => (
+        <Link
+          to={u === me ? '/profile' : `/user/${u}`}
+          key={u}
+          className="flex items-center gap-3 p-3 bg-card rounded-xl border border-border hover:bg-muted transition-colors"
+        >
+          <Avatar>
+            <AvatarFallback>{u[0]}</AvatarFallback>
+          </Avatar>
+          <span className="font-medium">{u}</span>
+        </Link>
+      ))}
+      <LoadMore hasMore={hasMore} onMore={onMore} />
+    </div>
+  )
+}
@@ -39,7 +39,7 @@ export default function Explore() {
     setLoading(true)
     try {
       const [cycles, users] = await Promise.all([
-        post('/search_cycles/', auth(user, { query: term })),
+        post('/search_cycles/', auth(user, { query: term, view: 'summary' })),
         post('/search_users/', auth(user, { query: term })),
       ])
       setCycleResults(cycles.cycles || [])
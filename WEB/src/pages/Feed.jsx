@@ -2,23 +2,32 @@ import { useState, useEffect, useCallback } from 'react'
 import { useAuth } from '../context/AuthContext'
 import { post, auth } from '../api'
 import WorkoutCard from '../components/WorkoutCard'
+import LoadMore from '../components/LoadMore'
 import { Loader2 } from 'lucide-react'
 
 export default function Feed() {
   const { user } = useAuth()
   const [cycles, setCycles] = useState([])
+  const [cursor, setCursor] = useState('')
   const [loading, setLoading] = useState(true)
 
   const load = useCallback(async () => {
     try {
-      const data = await post('/feed/', auth(user))
+      const data = await post('/feed/', auth(user, { view: 'summary' }))
       setCycles(data.cycles || [])
+      setCursor(data.next_cursor || '')
     } catch { setCycles([]) }
     finally { setLoading(false) }
   }, [user])
 
   useEffect(() => { load() }, [load])
 
+  const more = async () => {
+    const data = await post('/feed/', auth(user, { view: 'summary', cursor }))
+    setCycles(prev => [...prev, ...(data.cycles || [])])
+    setCursor(data.next_cursor || '')
+  }
+
   const toggleIn = async (cycle) => {
     const endpoint = cycle.is_in ? '/unlike_cycle/' : '/like_cycle/'
     try {
@@ -54,6 +63,7 @@ export default function Feed() {
       {cycles.map(c => (
         <WorkoutCard key={c.id} cycle={c} onIn={toggleIn} showDate />
       ))}
+      <LoadMore hasMore={!!cursor} onMore={more} />
     </div>
   )
 }
@@ -9,6 +9,7 @@ import { Avatar, AvatarFallback } from '../components/ui/Avatar'
 import { Textarea } from '../components/ui/Input'
 import { DropdownMenu, DropdownMenuTrigger, DropdownMenuContent, DropdownMenuItem } from '../components/ui/DropdownMenu'
 import CommentSection from '../components/CommentSection'
+import UserList from '../components/UserList'
 
 export default function Profile() {
   const { user, logout } = useAuth()
@@ -18,6 +19,8 @@ export default function Profile() {
   const [notes, setNotes] = useState([])
   const [followers, setFollowers] = useState([])
   const [following, setFollowing] = useState([])
+  const [followersCursor, setFollowersCursor] = useState('')
+  const [followingCursor, setFollowingCursor] = useState('')
   const [bio, setBio] = useState('')
   const [editBio, setEditBio] = useState(false)
   const [loading, setLoading] = useState(true)
@@ -26,7 +29,7 @@ export default function Profile() {
   const load = useCallback(async () => {
     try {
       const [prof, nt, fData, fgData] = await Promise.all([
-        get(`/profile/${user.username}/`),
+        get(`/profile/${user.username}/?view=summary`),
         post('/get_notes/', auth(user)),
         get(`/followers/${user.username}/`),
         get(`/following/${user.username}/`),
@@ -35,6 +38,8 @@ export default function Profile() {
       setNotes(nt.notes || [])
       setFollowers(fData.followers || [])
       setFollowing(fgData.following || [])
+      setFollowersCursor(fData.next_cursor || '')
+      setFollowingCursor(fgData.next_cursor || '')
       setBio(prof.bio || '')
     } catch {}
     finally { setLoading(false) }
@@ -42,6 +47,18 @@ export default function Profile() {
 
   useEffect(() => { load() }, [load])
 
+  const moreFollowers = async () => {
+    const data = await get(`/followers/${user.username}/?cursor=${encodeURIComponent(followersCursor)}`)
+    setFollowers(prev => [...prev, ...(data.followers || [])])
+    setFollowersCursor(data.next_cursor || '')
+  }
+
+  const moreFollowing = async () => {
+    const data = await get(`/following/${user.username}/?cursor=${encodeURIComponent(followingCursor)}`)
+    setFollowing(prev => [...prev, ...(data.following || [])])
+    setFollowingCursor(data.next_cursor || '')
+  }
+
   const saveBio = async () => {
     try {
       await post('/update_profile/', auth(user, { bio }))
@@ -349,46 +366,24 @@ export default function Profile() {
 
       {/* Followers */}
       {tab === 'followers' && (
-        <div className="space-y-2">
-          {followers.length > 0 ? followers.map(f => (
-            <Link
-              to={f === user.username ? '/profile' : `/user/${f}`}
-              key={f}
-              className="flex items-center gap-3 p-3 bg-card rounded-xl border border-border hover:bg-muted transition-colors"
-            >
-              <Avatar>
-                <AvatarFallback>{f[0]}</AvatarFallback>
-              </Avatar>
-              <span className="font-medium">{f}</span>
-            </Link>
-          )) : (
-            <div className="text-center py-12 text-muted-foreground">
-              <p>Нет подписчиков</p>
-            </div>
-          )}
-        </div>
+        <UserList
+          users={followers}
+          me={user.username}
+          empty="Нет подписчиков"
+          hasMore={!!followersCursor}
+          onMore={moreFollowers}
+        />
       )}
 
       {/* Following */}
       {tab === 'following' && (
-        <div className="space-y-2">
-          {following.length > 0 ? following.map(f => (
-            <Link
-              to={f === user.username ? '/profile' : `/user/${f}`}
-              key={f}
-              className="flex items-center gap-3 p-3 bg-card rounded-xl border border-border hover:bg-muted transition-colors"
-            >
-              <Avatar>
-                <AvatarFallback>{f[0]}</AvatarFallback>
-              </Avatar>
-              <span className="font-medium">{f}</span>
-            </Link>
-          )) : (
-            <div className="text-center py-12 text-muted-foreground">
-              <p>Нет подписок</p>
-            </div>
-          )}
-        </div>
+        <UserList
+          users={following}
+          me={user.username}
+          empty="Нет подписок"
+          hasMore={!!followingCursor}
+          onMore={moreFollowing}
+        />
       )}
 
 
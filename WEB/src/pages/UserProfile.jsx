@@ -1,8 +1,9 @@
 import { useState, useEffect, useCallback } from 'react'
-import { useParams, useNavigate, Link, Navigate } from 'react-router-dom'
+import { useParams, useNavigate, Navigate } from 'react-router-dom'
 import { useAuth } from '../context/AuthContext'
 import { get, post, auth } from '../api'
 import WorkoutCard from '../components/WorkoutCard'
+import UserList from '../components/UserList'
 import { ArrowLeft, UserPlus, UserCheck, Loader2 } from 'lucide-react'
 import { Card, CardContent } from '../components/ui/Card'
 import { Button } from '../components/ui/Button'
@@ -18,19 +19,23 @@ export default function UserProfile() {
   const [tab, setTab] = useState('workouts')
   const [followers, setFollowers] = useState([])
   const [following, setFollowing] = useState([])
+  const [followersCursor, setFollowersCursor] = useState('')
+  const [followingCursor, setFollowingCursor] = useState('')
 
   const load = useCallback(async () => {
     try {
       const [prof, fData, fgData] = await Promise.all([
-        get(`/profile/${username}/`),
-        get(`/followers/${username}/`),
+        get(`/profile/${username}/?view=summary`),
+        get(`/followers/${username}/${user ? `?viewer=${encodeURIComponent(user.username)}` : ''}`),
         get(`/following/${username}/`),
       ])
       setProfile(prof)
       setFollowers(fData.followers || [])
       setFollowing(fgData.following || [])
+      setFollowersCursor(fData.next_cursor || '')
+      setFollowingCursor(fgData.next_cursor || '')
       if (user && user.username !== username) {
-        setIsFollowing((fData.followers || []).includes(user.username))
+        setIsFollowing(!!fData.is_following)
       }
     } catch {}
     finally { setLoading(false) }
@@ -38,6 +43,18 @@ export default function UserProfile() {
 
   useEffect(() => { load() }, [load])
 
+  const moreFollowers = async () => {
+    const data = await get(`/followers/${username}/?cursor=${encodeURIComponent(followersCursor)}`)
+    setFollowers(prev => [...prev, ...(data.followers || [])])
+    setFollowersCursor(data.next_cursor || '')
+  }
+
+  const moreFollowing = async () => {
+    const data = await get(`/following/${username}/?cursor=${encodeURIComponent(followingCursor)}`)
+    setFollowing(prev => [...prev, ...(data.following || [])])
+    setFollowingCursor(data.next_cursor || '')
+  }
+
   const toggleFollow = async () => {
     const endpoint = isFollowing ? '/unfollow/' : '/follow/'
     try {
@@ -191,46 +208,24 @@ export default function UserProfile() {
 
       {/* Followers tab */}
       {tab === 'followers' && (
-        <div className="space-y-2">
-          {followers.length > 0 ? followers.map(f => (
-            <Link 
-              to={f === user?.username ? '/profile' : `/user/${f}`} 
-              key={f} 
-              className="flex items-center gap-3 p-3 bg-card rounded-xl border border-border hover:bg-muted transition-colors"
-            >
-              <Avatar>
-                <AvatarFallback>{f[0]}</AvatarFallback>
-              </Avatar>
-              <span className="font-medium">{f}</span>
-            </Link>
-          )) : (
-            <div className="text-center py-12 text-muted-foreground">
-              <p>Нет подписчиков</p>
-            </div>
-          )}
-        </div>
+        <UserList
+          users={followers}
+          me={user?.username}
+          empty="Нет подписчиков"
+          hasMore={!!followersCursor}
+          onMore={moreFollowers}
+        />
       )}
 
       {/* Following tab */}
       {tab === 'following' && (
-        <div className="space-y-2">
-          {following.length > 0 ? following.map(f => (
-            <Link 
-              to={f === user?.username ? '/profile' : `/user/${f}`} 
-              key={f} 
-              className="flex items-center gap-3 p-3 bg-card rounded-xl border border-border hover:bg-muted transition-colors"
-            >
-              <Avatar>
-                <AvatarFallback>{f[0]}</AvatarFallback>
-              </Avatar>
-              <span className="font-medium">{f}</span>
-            </Link>
-          )) : (
-            <div className="text-center py-12 text-muted-foreground">
-              <p>Нет подписок</p>
-            </div>
-          )}
-        </div>
+        <UserList
+          users={following}
+          me={user?.username}
+          empty="Нет подписок"
+          hasMore={!!followingCursor}
+          onMore={moreFollowing}
+        />
       )}
     </div>
   )
@@ -15,7 +15,7 @@ export default function Workouts() {
 
   const load = useCallback(async () => {
     try {
-      const data = await post('/user_cycles/', auth(user))
+      const data = await post('/user_cycles/', auth(user, { view: 'summary' }))
       setCycles(data.cycles || [])
     } catch {}
     finally { setLoading(false) }